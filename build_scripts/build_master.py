@@ -63,7 +63,7 @@ spec_hidden_imports = [
     'PySide6.QtPrintSupport', 'PySide6.QtSvg', 'PySide6.QtNetwork',
     
     # PDF processing modules
-    'pypdf', 'pypdf.PdfReader', 'pypdf.PdfWriter', 'fitz',
+    'pypdf', 'pypdf.PdfReader', 'pypdf.PdfWriter', 'fitz', 'pikepdf',
     
     # Image processing modules
     'PIL', 'PIL.Image', 'PIL.ImageDraw', 'PIL.ImageFont',
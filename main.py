@@ -1449,4 +1449,7 @@ def main():
     sys.exit(result)
 
 if __name__ == "__main__":
+    # مطلوب لعمليات المعالجة المتوازية في النسخة المجمعة (PyInstaller)
+    import multiprocessing
+    multiprocessing.freeze_support()
     main()
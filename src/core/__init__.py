@@ -8,8 +8,8 @@ from .split import split_pdf, split_pdf_by_ranges, split_pdf_by_size, extract_pa
 from .compress import compress_pdf, batch_compress
 from .convert import pdf_to_images
 from .rotate import rotate_pdf, rotate_specific_pages
-from .security import encrypt_pdf, decrypt_pdf
-from .pdf_worker import PDFLoadWorker
+from .security import (encrypt_pdf, decrypt_pdf, decrypt_pdf_with_candidates, batch_security,
+                       update_pdf_metadata, batch_update_metadata)
 
 __all__ = [
     # Merge functions
@@ -28,8 +28,19 @@ __all__ = [
     'rotate_pdf', 'rotate_specific_pages',
 
     # Security functions
-    'encrypt_pdf', 'decrypt_pdf',
+    'encrypt_pdf', 'decrypt_pdf', 'decrypt_pdf_with_candidates', 'batch_security',
+    'update_pdf_metadata', 'batch_update_metadata',
 
     # PDF Worker
     'PDFLoadWorker'
 ]
+
+
+def __getattr__(name):
+    """
+    تحميل كسول لعامل Qt: استيراد الحزمة من العمليات المتوازية (spawn) لا يحمّل PySide6.
+    """
+    if name == 'PDFLoadWorker':
+        from .pdf_worker import PDFLoadWorker
+        return PDFLoadWorker
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
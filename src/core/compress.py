@@ -39,9 +39,11 @@ def format_file_size(size_bytes: int) -> str:
         i += 1
     return f"{size:.1f} {size_names[i]}"
 
-def compress_pdf(input_file: str, output_file: str, compression_level: int = 3) -> bool:
+def compress_pdf(input_file: str, output_file: str, compression_level: int = 3,
+                 linearize: bool = False) -> bool:
     """
     ضغط PDF فعلي مع إعادة ترميز الصور وتقليل دقتها.
+    linearize: حفظ الناتج كملف خطي (عرض سريع على الويب).
     """
     try:
         if not os.path.exists(input_file):
@@ -91,6 +93,11 @@ def compress_pdf(input_file: str, output_file: str, compression_level: int = 3)
         doc.save(output_file, **save_options)
         doc.close()
 
+        if linearize:
+            from src.core.pdf_output import linearize_pdf
+            if not linearize_pdf(output_file):
+                return False
+
         compressed_size = os.path.getsize(output_file)
         ratio = (original_size - compressed_size) / original_size * 100
         info(f"✅ تم الضغط: {format_file_size(original_size)} → {format_file_size(compressed_size)} ({ratio:.1f}% توفير)")
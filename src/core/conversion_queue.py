@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+طابور مهام التحويل في الخلفية
+Background Conversion Queue - runs conversion jobs off the GUI thread
+"""
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from PySide6.QtCore import QObject, Signal
+
+from src.utils.logger import info, error
+
+# الحد الافتراضي لعدد الملفات التي تُحوّل في نفس الوقت
+DEFAULT_MAX_CONCURRENT = 2
+
+
+class ConversionCancelled(Exception):
+    """يُرفع من دالة التقدم لإيقاف تحويل جارٍ عند الإلغاء"""
+
+
+class ConversionQueueWorker(QObject):
+    """
+    عامل ينفذ قائمة مهام تحويل بشكل متزامن محدود.
+
+    Each job is a dict {'input', 'output', 'function', 'kwargs', 'reports_progress'};
+    function is called as function(**kwargs, progress_callback=...) (the callback is
+    omitted when reports_progress is False) and must return True on success.
+    Runs in a QThread (moveToThread); up to max_concurrent jobs run at once.
+    """
+
+    file_started = Signal(int, str)           # رقم المهمة، اسم الملف
+    file_progress = Signal(int, int, int)     # رقم المهمة، المنجز، الإجمالي
+    file_finished = Signal(int, bool, str)    # رقم المهمة، نجح، مسار الناتج
+    progress = Signal(int, int)               # المهام المنتهية، إجمالي المهام
+    finished = Signal(dict)                   # ملخص النتائج
+
+    def __init__(self, jobs: List[Dict[str, Any]], max_concurrent: int = DEFAULT_MAX_CONCURRENT):
+        super().__init__()
+        self.jobs = jobs
+        self.max_concurrent = max(1, min(max_concurrent, len(jobs) or 1))
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """طلب إلغاء المهام المتبقية وإيقاف المهام الجارية عند أول تحديث للتقدم"""
+        self._cancel_event.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def _make_progress_callback(self, index: int) -> Callable[[int, int], None]:
+        def callback(done: int, total: int) -> None:
+            if self._cancel_event.is_set():
+                raise ConversionCancelled()
+            self.file_progress.emit(index, done, total)
+        return callback
+
+    def _run_job(self, index: int) -> tuple:
+        """تنفيذ مهمة واحدة وإرجاع (الحالة، المدة)"""
+        job = self.jobs[index]
+        if self._cancel_event.is_set():
+            return 'ملغى', 0.0
+
+        self.file_started.emit(index, os.path.basename(job['input']))
+        start_time = time.perf_counter()
+        kwargs = dict(job.get('kwargs', {}))
+        if job.get('reports_progress', True):
+            kwargs['progress_callback'] = self._make_progress_callback(index)
+        success = bool(job['function'](**kwargs))
+        duration = time.perf_counter() - start_time
+
+        if self._cancel_event.is_set() and not success:
+            return 'ملغى', duration
+        return ('نجح' if success else 'فشل'), duration
+
+    def run(self):
+        """تشغيل كل المهام وإرسال ملخص النتائج"""
+        results = {
+            'processed': 0,
+            'successful': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'files': [],
+            'elapsed_time': 0.0
+        }
+        start_time = time.perf_counter()
+        file_results: List[Optional[dict]] = [None] * len(self.jobs)
+
+        info(f"بدء طابور التحويل: {len(self.jobs)} مهمة، {self.max_concurrent} متزامنة")
+        with ThreadPoolExecutor(max_workers=self.max_concurrent) as executor:
+            futures = {executor.submit(self._run_job, index): index for index in range(len(self.jobs))}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    status, duration = future.result()
+                except ConversionCancelled:
+                    status, duration = 'ملغى', 0.0
+                except Exception as e:
+                    error(f"خطأ في تحويل {self.jobs[index]['input']}: {e}")
+                    status, duration = 'فشل', 0.0
+
+                file_results[index] = {
+                    'filename': os.path.basename(self.jobs[index]['input']),
+                    'output_path': self.jobs[index]['output'],
+                    'status': status,
+                    'duration': round(duration, 3)
+                }
+                results['processed'] += 1
+                if status == 'نجح':
+                    results['successful'] += 1
+                elif status == 'ملغى':
+                    results['cancelled'] += 1
+                else:
+                    results['failed'] += 1
+
+                if status != 'ملغى':
+                    self.file_finished.emit(index, status == 'نجح', self.jobs[index]['output'])
+                self.progress.emit(results['processed'], len(self.jobs))
+
+        results['files'] = [r for r in file_results if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"طابور التحويل: {results['successful']} نجح، {results['failed']} فشل، "
+             f"{results['cancelled']} ملغى خلال {results['elapsed_time']} ثانية")
+        self.finished.emit(results)
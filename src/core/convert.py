@@ -6,30 +6,259 @@ This module provides functionality to convert PDF files to other formats and vic
 
 import os
 import io
+import re
+import json
+import time
+import math
+import random
+import threading
 import fitz  # PyMuPDF
 from PIL import Image
-from typing import List, Optional, Dict, Any
+from typing import Callable, List, Optional, Dict, Any
 import tempfile
+import zipfile
+from functools import lru_cache
+from collections import OrderedDict
 import arabic_reshaper
 from bidi.algorithm import get_display
 from utils.logger import info, warning, error
+from src.utils.font_registry import font_registry
+from utils.parallel import (get_worker_count, run_in_pool, run_ordered, split_into_chunks,
+                            WORKER_MP_CONTEXT)
+
+# أقل عدد صفحات يستحق تشغيل عمليات متوازية (تكلفة بدء العمليات)
+PARALLEL_MIN_PAGES = 8
+
+def _page_image_path(input_file: str, output_folder: str, page_num: int, image_format: str) -> str:
+    """تحديد اسم ملف الصورة لصفحة معينة"""
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    output_filename = f"{base_name}_page_{page_num + 1:03d}.{image_format.lower()}"
+    return os.path.join(output_folder, output_filename)
+
+# التنسيقات التي يكتبها MuPDF مباشرة دون المرور عبر PIL
+_NATIVE_FORMATS = {"PNG", "PNM", "PPM", "PGM"}
+
+# صيغ مضغوطة أصلاً لا فائدة من ضغطها مرة أخرى داخل ZIP
+_PRECOMPRESSED_FORMATS = {"PNG", "JPEG", "JPG", "WEBP"}
+
+# أنواع الحاويات المدعومة في pdf_to_images
+CONTAINER_FORMATS = ("tiff", "zip", "cbz")
+
+# حجم مجموعة الصفحات في وضع الحاوية: صفحات TIFF تنتقل كبكسلات خام (~25MB للصفحة
+# عند 300 DPI) لذلك تُرسل صفحة واحدة لكل مهمة، والصور المرمزة 4 صفحات لكل مهمة
+CONTAINER_RAW_CHUNK_PAGES = 1
+CONTAINER_CHUNK_PAGES = 4
+
+# الحد الأقصى للصفحات قيد المعالجة أو بانتظار الكتابة لكل عامل
+CONTAINER_PENDING_PAGES_PER_WORKER = 2
+
+def _pixmap_to_pil(pix) -> Image.Image:
+    """
+    بناء صورة PIL فوق ذاكرة البكسلات مباشرة دون نسخ إضافي.
+    Wrap the pixmap samples in a PIL image without an intermediate copy.
+    """
+    mode = "L" if pix.n == 1 else "RGB"
+    samples = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+    return Image.frombuffer(mode, (pix.width, pix.height), samples, "raw", mode, pix.stride, 1)
+
+def _render_page_pixmap(page, dpi: int, options: Dict[str, Any]):
+    """رسم الصفحة بالدقة ونظام الألوان المطلوبين"""
+    zoom = dpi / 72.0  # 72 DPI هو الافتراضي
+    colorspace = fitz.csGRAY if options.get("grayscale") else fitz.csRGB
+    return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), colorspace=colorspace, alpha=False)
+
+def _save_page_image(page, output, image_format: str, dpi: int,
+                     options: Optional[Dict[str, Any]] = None) -> None:
+    """
+    تحويل صفحة واحدة إلى صورة وحفظها في مسار أو كائن ملف ثنائي.
+    
+    options:
+        jpeg_quality (int): جودة JPEG/WebP (1-100)
+        progressive (bool): JPEG تدريجي
+        grayscale (bool): التحويل بتدرج الرمادي مباشرة من MuPDF
+    """
+    options = options or {}
+    image_format = image_format.upper()
+    quality = int(options.get("jpeg_quality", 90))
+    pix = _render_page_pixmap(page, dpi, options)
+    
+    native_output = None
+    if image_format in _NATIVE_FORMATS:
+        native_output = "png" if image_format == "PNG" else "pnm"
+    elif image_format in ("JPEG", "JPG") and not options.get("progressive"):
+        # مرمز JPEG الداخلي في MuPDF
+        native_output = "jpg"
+    
+    if native_output:
+        save_args = {"jpg_quality": quality} if native_output == "jpg" else {}
+        if isinstance(output, str):
+            pix.save(output, output=native_output, **save_args)
+        else:
+            output.write(pix.tobytes(native_output, **save_args))
+        return
+    
+    save_args = {}
+    if image_format in ("JPEG", "JPG"):
+        image_format = "JPEG"
+        save_args = {"quality": quality, "progressive": True, "optimize": True}
+    elif image_format == "WEBP":
+        save_args = {"quality": quality, "method": 4}
+    img = _pixmap_to_pil(pix)
+    try:
+        img.save(output, image_format, **save_args)
+    finally:
+        # الصورة تشير إلى ذاكرة الـ pixmap: يجب تحريرها قبله
+        img.close()
+        del img
+
+def _render_pages_task(input_file: str, output_folder: str, page_numbers: List[int],
+                       image_format: str, dpi: int, options: Optional[Dict[str, Any]] = None) -> int:
+    """
+    مهمة عامل: فتح نسخة مستقلة من المستند وتحويل مجموعة صفحات مباشرة إلى مجلد الحفظ.
+    
+    Returns:
+        int: عدد الصفحات المحولة
+    """
+    pdf_document = fitz.open(input_file)
+    try:
+        for page_num in page_numbers:
+            output_path = _page_image_path(input_file, output_folder, page_num, image_format)
+            _save_page_image(pdf_document[page_num], output_path, image_format, dpi, options)
+        return len(page_numbers)
+    finally:
+        pdf_document.close()
+
+def _encode_pages_task(input_file: str, page_numbers: List[int], image_format: str,
+                       dpi: int, options: Dict[str, Any]) -> List[Any]:
+    """
+    مهمة عامل: ترميز مجموعة صفحات وإرجاعها بدلاً من كتابتها.
+    Encode a chunk of pages and return them to the parent process.
+    
+    With image_format "RAW" each item is (mode, width, height, stride, samples) for
+    the multi-page TIFF writer; otherwise each item is the encoded image bytes.
+    """
+    pdf_document = fitz.open(input_file)
+    try:
+        encoded = []
+        for page_num in page_numbers:
+            page = pdf_document[page_num]
+            if image_format == "RAW":
+                pix = _render_page_pixmap(page, dpi, options)
+                encoded.append(("L" if pix.n == 1 else "RGB", pix.width, pix.height,
+                                pix.stride, pix.samples))
+            else:
+                buffer = io.BytesIO()
+                _save_page_image(page, buffer, image_format, dpi, options)
+                encoded.append(buffer.getvalue())
+        return encoded
+    finally:
+        pdf_document.close()
+
+def _container_path(input_file: str, output_folder: str, container: str) -> str:
+    """تحديد اسم ملف الحاوية (TIFF/ZIP/CBZ)"""
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    extension = "tif" if container == "tiff" else container
+    return os.path.join(output_folder, f"{base_name}.{extension}")
+
+def _write_page_container(input_file: str, output_path: str, container: str, total_pages: int,
+                          tasks: List[tuple], workers: int, max_pending: int,
+                          image_format: str, dpi: int,
+                          tiff_compression: Optional[str],
+                          on_progress: Callable[[int], None]) -> None:
+    """
+    كتابة الصفحات في ملف واحد (TIFF متعدد الصفحات أو ZIP/CBZ) بترتيبها.
+    
+    Chunks are small (see CONTAINER_CHUNK_PAGES) and consumed in page order with the
+    number of pages in flight bounded per worker, and every page is appended to the
+    container as soon as it arrives, so memory stays flat no matter how long the
+    document is. The file is written under a temporary name and moved
+    into place once complete.
+    """
+    partial_path = output_path + ".part"
+    completed_pages = 0
+    try:
+        if container == "tiff":
+            from PIL import TiffImagePlugin
+            save_args = {"dpi": (dpi, dpi)}
+            if tiff_compression:
+                save_args["compression"] = tiff_compression
+            
+            with TiffImagePlugin.AppendingTiffWriter(partial_path, True) as tiff_file:
+                for _, pages, exc in run_ordered(_encode_pages_task, tasks, workers,
+                                                 max_pending=max_pending,
+                                                 mp_context=WORKER_MP_CONTEXT):
+                    if exc is not None:
+                        raise exc
+                    for mode, width, height, stride, samples in pages:
+                        img = Image.frombuffer(mode, (width, height), samples, "raw", mode, stride, 1)
+                        if tiff_compression in ("group3", "group4"):
+                            # ضغط CCITT يتطلب صوراً ثنائية اللون
+                            img = img.convert("L").convert("1", dither=Image.NONE)
+                        img.save(tiff_file, "TIFF", **save_args)
+                        tiff_file.newFrame()
+                        completed_pages += 1
+                        on_progress(completed_pages)
+        else:
+            # الصيغ المضغوطة أصلاً تُخزن دون ضغط إضافي لتوفير الوقت
+            compress_type = zipfile.ZIP_STORED if image_format.upper() in _PRECOMPRESSED_FORMATS \
+                else zipfile.ZIP_DEFLATED
+            base_name = os.path.splitext(os.path.basename(input_file))[0]
+            digits = max(3, len(str(total_pages)))
+            extension = image_format.lower()
+            
+            with zipfile.ZipFile(partial_path, "w", compression=compress_type) as archive:
+                for _, pages, exc in run_ordered(_encode_pages_task, tasks, workers,
+                                                 max_pending=max_pending,
+                                                 mp_context=WORKER_MP_CONTEXT):
+                    if exc is not None:
+                        raise exc
+                    for data in pages:
+                        completed_pages += 1
+                        archive.writestr(f"{base_name}_page_{completed_pages:0{digits}d}.{extension}", data)
+                        on_progress(completed_pages)
+        
+        os.replace(partial_path, output_path)
+    finally:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
 
 def pdf_to_images(input_file: str, output_folder: str, 
-                 image_format: str = "PNG", dpi: int = 150) -> bool:
+                 image_format: str = "PNG", dpi: int = 150,
+                 max_workers: Optional[int] = None,
+                 progress_callback: Optional[Callable[[int, int], None]] = None,
+                 jpeg_quality: int = 90, progressive: bool = False,
+                 grayscale: bool = False, container: Optional[str] = None,
+                 tiff_compression: Optional[str] = "tiff_lzw") -> bool:
     """
     Convert PDF pages to image files.
     تحويل صفحات PDF إلى ملفات صور
     
+    Large documents are sharded across worker processes; each worker opens its own
+    document handle, renders its pages and writes them directly to the output folder.
+    
     Args:
         input_file (str): Path to the input PDF file
         output_folder (str): Folder where images will be saved
-        image_format (str): Output image format (PNG, JPEG, TIFF)
+        image_format (str): Output image format (PNG, JPEG, TIFF, WEBP, BMP, PNM)
         dpi (int): Resolution in DPI
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        progress_callback (Optional[Callable]): Called as (completed_pages, total_pages)
+        jpeg_quality (int): JPEG/WebP quality (1-100)
+        progressive (bool): Write progressive JPEG files
+        grayscale (bool): Render pages in the gray colorspace
+        container (Optional[str]): None writes one file per page; "tiff" writes a single
+            multi-page TIFF, "zip"/"cbz" stream the page images into one archive
+        tiff_compression (Optional[str]): TIFF compression (tiff_lzw, tiff_deflate,
+            group4 for bilevel, jpeg, or None)
         
     Returns:
         bool: True if conversion was successful, False otherwise
     """
     try:
+        if container:
+            container = container.lower()
+            if container not in CONTAINER_FORMATS:
+                raise ValueError(f"نوع الحاوية غير مدعوم: {container}")
         # التحقق من وجود الملف المدخل
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"الملف غير موجود: {input_file}")
@@ -41,42 +270,61 @@ def pdf_to_images(input_file: str, output_folder: str,
         if not os.path.exists(output_folder):
             os.makedirs(output_folder)
         
-        # فتح ملف PDF
+        # فتح ملف PDF لمعرفة عدد الصفحات فقط
         pdf_document = fitz.open(input_file)
         total_pages = len(pdf_document)
+        pdf_document.close()
         
         info(f"تحويل {total_pages} صفحة إلى صور {image_format}")
         info(f"الدقة: {dpi} DPI")
         
-        # تحويل كل صفحة
-        for page_num in range(total_pages):
-            page = pdf_document[page_num]
-            
-            # تحديد معامل التكبير حسب DPI
-            zoom = dpi / 72.0  # 72 DPI هو الافتراضي
-            mat = fitz.Matrix(zoom, zoom)
-            
-            # تحويل الصفحة إلى صورة
-            pix = page.get_pixmap(matrix=mat)
+        workers = get_worker_count(max_workers, total_pages)
+        if total_pages < PARALLEL_MIN_PAGES:
+            workers = 1
+        if workers > 1:
+            info(f"استخدام {workers} عملية متوازية")
+        
+        options = {"jpeg_quality": jpeg_quality, "progressive": progressive, "grayscale": grayscale}
+        
+        if container:
+            if container == "tiff" and tiff_compression in ("group3", "group4"):
+                options["grayscale"] = True
+            encode_format = "RAW" if container == "tiff" else image_format
+            chunk_pages = CONTAINER_RAW_CHUNK_PAGES if container == "tiff" else CONTAINER_CHUNK_PAGES
+            tasks = [(input_file, chunk, encode_format, dpi, options)
+                     for chunk in split_into_chunks(total_pages, workers, max_chunk_size=chunk_pages)]
+            # النافذة محسوبة بالصفحات وليس بالمجموعات
+            max_pending = max(1, workers * CONTAINER_PENDING_PAGES_PER_WORKER // chunk_pages)
+            output_path = _container_path(input_file, output_folder, container)
             
-            # تحديد اسم الملف
-            base_name = os.path.splitext(os.path.basename(input_file))[0]
-            output_filename = f"{base_name}_page_{page_num + 1:03d}.{image_format.lower()}"
-            output_path = os.path.join(output_folder, output_filename)
+            def on_progress(done: int) -> None:
+                if progress_callback:
+                    progress_callback(done, total_pages)
+                if done % 10 == 0:
+                    info(f"تم تحويل {done}/{total_pages} صفحة")
             
-            # حفظ الصورة
-            if image_format.upper() == "PNG":
-                pix.save(output_path)
-            else:
-                # تحويل إلى PIL للتنسيقات الأخرى
-                img_data = pix.tobytes("ppm")
-                img = Image.open(io.BytesIO(img_data))
-                img.save(output_path, image_format.upper())
+            _write_page_container(input_file, output_path, container, total_pages, tasks, workers,
+                                  max_pending, image_format, dpi, tiff_compression, on_progress)
+            info(f"تم تحويل جميع الصفحات بنجاح إلى: {output_path}")
+            return True
+        
+        tasks = [(input_file, output_folder, chunk, image_format, dpi, options)
+                 for chunk in split_into_chunks(total_pages, workers)]
+        
+        completed_pages = 0
+        last_logged = 0
+        for _, converted, exc in run_in_pool(_render_pages_task, tasks, workers,
+                                                  mp_context=WORKER_MP_CONTEXT):
+            if exc is not None:
+                raise exc
+            completed_pages += converted
             
-            if (page_num + 1) % 10 == 0:
-                info(f"تم تحويل {page_num + 1}/{total_pages} صفحة")
+            if progress_callback:
+                progress_callback(completed_pages, total_pages)
+            if completed_pages - last_logged >= 10:
+                last_logged = completed_pages
+                info(f"تم تحويل {completed_pages}/{total_pages} صفحة")
         
-        pdf_document.close()
         info(f"تم تحويل جميع الصفحات بنجاح إلى: {output_folder}")
         return True
         
@@ -84,14 +332,277 @@ def pdf_to_images(input_file: str, output_folder: str,
         error(f"خطأ في تحويل PDF إلى صور: {str(e)}")
         return False
 
-def images_to_pdf(image_files: List[str], output_file: str) -> bool:
+# التوقيعات الثنائية لأنواع الصور التي يفتحها MuPDF مباشرة
+_IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpg"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"\x00\x00\x00\x0cjP  ", "jpx"),
+    (b"\xff\x4f\xff\x51", "jpx"),
+)
+
+def _detect_image_type(image_file: str) -> Optional[str]:
+    """
+    تحديد نوع الصورة من محتواها وليس من امتداد الملف.
+    Detect the image type from its header bytes; None if MuPDF cannot open it natively.
+    """
+    with open(image_file, "rb") as f:
+        header = f.read(16)
+    for signature, image_type in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:1] == b"P" and header[1:2] in b"123456":
+        return "pnm"
+    return None
+
+def _resolve_page_size(page_size) -> Optional[tuple]:
+    """تحويل اسم مقاس الورق (A4, Letter...) أو (عرض، ارتفاع) بالنقاط إلى أبعاد"""
+    if not page_size:
+        return None
+    if isinstance(page_size, str):
+        width, height = fitz.paper_size(page_size.lower())
+        if width <= 0:
+            raise ValueError(f"مقاس ورق غير معروف: {page_size}")
+        return float(width), float(height)
+    return float(page_size[0]), float(page_size[1])
+
+def _flatten_alpha(img: Image.Image) -> Image.Image:
+    """دمج الشفافية على خلفية بيضاء (JPEG والصور الثنائية لا تدعمها)"""
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        return background
+    if img.mode not in ("RGB", "L", "1"):
+        return img.convert("RGB")
+    return img
+
+# نطاق زوايا البحث عن الميل وخطوتها (بالدرجات) ودقة الصورة المصغرة المستخدمة للقياس
+DESKEW_MAX_ANGLE = 5.0
+DESKEW_STEP = 0.5
+DESKEW_SAMPLE_SIZE = 800
+# أقل تحسن نسبي في التباين مقارنة بالزاوية 0 حتى يُعتبر الميل حقيقياً (لا ضوضاء)
+DESKEW_MIN_GAIN = 0.25
+# الدقة التي يفترضها MuPDF للصور بدون DPI (تحدد مقاس الصفحة عند الإدراج)
+MUPDF_DEFAULT_DPI = 96
+
+def _estimate_skew(img: Image.Image, max_angle: float = DESKEW_MAX_ANGLE,
+                   step: float = DESKEW_STEP) -> float:
+    """
+    تقدير ميل صفحة ممسوحة بطريقة إسقاط الأسطر.
+    Estimate the skew angle (degrees, counter-clockwise) of a scanned page.
+    
+    A small inverted grayscale copy is rotated through candidate angles; the angle
+    whose row profile has the highest variance (text lines aligned with rows) wins.
+    Row means come from resizing to one column with a box filter, so no NumPy is needed.
+    
+    Only the central box that stays inside the image at every candidate angle is
+    scored, so the corners filled in by the rotation never affect the profile. The
+    best angle must also beat the unrotated profile by DESKEW_MIN_GAIN; flat pages,
+    photos and noise have no dominant line direction and return 0.
+    """
+    sample = _flatten_alpha(img).convert("L")
+    sample.thumbnail((DESKEW_SAMPLE_SIZE, DESKEW_SAMPLE_SIZE))
+    sample = sample.point(lambda v: 255 if v < 128 else 0)
+    
+    # أكبر مستطيل مركزي بنفس النسبة يبقى داخل الصورة عند الدوران بأقصى زاوية
+    width, height = sample.size
+    sin_a, cos_a = abs(math.sin(math.radians(max_angle))), math.cos(math.radians(max_angle))
+    factor = min(width / (width * cos_a + height * sin_a), height / (width * sin_a + height * cos_a))
+    margin_x = int(math.ceil(width * (1 - factor) / 2))
+    margin_y = int(math.ceil(height * (1 - factor) / 2))
+    box = (margin_x, margin_y, width - margin_x, height - margin_y)
+    if box[2] - box[0] < 2 or box[3] - box[1] < 2:
+        return 0.0
+    
+    def row_variance(angle: float) -> float:
+        rotated = sample.rotate(angle, resample=Image.NEAREST) if angle else sample
+        region = rotated.crop(box)
+        rows = list(region.resize((1, region.height), Image.BOX).getdata())
+        mean = sum(rows) / len(rows)
+        return sum((v - mean) ** 2 for v in rows)
+    
+    base_score = row_variance(0.0)
+    best_angle, best_score = 0.0, base_score
+    steps = int(max_angle / step)
+    for i in range(-steps, steps + 1):
+        if i:
+            score = row_variance(i * step)
+            if score > best_score:
+                best_angle, best_score = i * step, score
+    if best_score <= base_score * (1 + DESKEW_MIN_GAIN):
+        return 0.0
+    return best_angle
+
+def _mupdf_image_dpi(image_file: str, pixel_size: tuple) -> tuple:
+    """
+    الدقة الفعلية التي يستخدمها MuPDF لحساب مقاس صفحة الصورة الأصلية.
+    Resolution MuPDF derives for the original file (96 DPI when it has none), so
+    re-encoded images keep the page size the unprocessed file would get.
+    """
+    try:
+        with fitz.open(image_file, filetype=_detect_image_type(image_file)) as img_doc:
+            rect = img_doc[0].rect
+        return pixel_size[0] * 72.0 / rect.width, pixel_size[1] * 72.0 / rect.height
+    except Exception:
+        # صيغ لا يفتحها MuPDF تُدرج كـ PNG بدون DPI
+        return float(MUPDF_DEFAULT_DPI), float(MUPDF_DEFAULT_DPI)
+
+def _prepare_image_task(image_file: str, preprocess: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    مهمة عامل: تجهيز الصورة قبل إدراجها في PDF.
+    
+    Returns None when the image can be embedded unchanged (or is multi-frame), so the
+    writer falls back to inserting the original file. Otherwise returns
+    {"data": bytes or None, "page_size": (w, h) or None}; data is None when only the
+    page size changes.
+    
+    preprocess:
+        exif_transpose (bool): Apply the EXIF orientation tag (default True)
+        page_size (str | tuple): Fit images onto this paper size ("A4", "Letter", or points)
+        dpi (int): Target resolution when fitting to page_size (default 150)
+        max_size (int): Longest side in pixels; larger images are downscaled
+        deskew (bool): Straighten scanned pages tilted by up to DESKEW_MAX_ANGLE degrees
+        color (str): "color" (default), "grayscale" or "bilevel"
+        jpeg_quality (int): Re-encode as JPEG with this quality
+    """
+    quality = preprocess.get("jpeg_quality")
+    color = preprocess.get("color", "color")
+    page_size = _resolve_page_size(preprocess.get("page_size"))
+    
+    with Image.open(image_file) as original:
+        if getattr(original, "n_frames", 1) > 1:
+            return None
+        
+        img = original
+        changed = False
+        if preprocess.get("exif_transpose", True) and original.getexif().get(0x0112, 1) != 1:
+            # صور الهاتف تُخزن غالباً مع وسم اتجاه EXIF بدلاً من تدوير البكسلات
+            from PIL import ImageOps
+            img = ImageOps.exif_transpose(original)
+            changed = True
+        
+        if preprocess.get("deskew"):
+            angle = _estimate_skew(img)
+            if angle:
+                img = _flatten_alpha(img)
+                if img.mode == "1":
+                    img = img.convert("L")
+                img = img.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor="white")
+                changed = True
+        
+        # تحديد الحد الأقصى للأبعاد بالبكسل
+        limit = None
+        if page_size:
+            # مطابقة اتجاه الصفحة مع اتجاه الصورة
+            if (img.width > img.height) != (page_size[0] > page_size[1]):
+                page_size = (page_size[1], page_size[0])
+            dpi = preprocess.get("dpi", 150)
+            limit = (page_size[0] / 72.0 * dpi, page_size[1] / 72.0 * dpi)
+        elif preprocess.get("max_size"):
+            limit = (preprocess["max_size"], preprocess["max_size"])
+        
+        scale = 1.0
+        if limit:
+            scale = min(1.0, limit[0] / img.width, limit[1] / img.height)
+        
+        if scale == 1.0 and not quality and color == "color" and not changed:
+            # لا حاجة لإعادة الترميز: إدراج الملف الأصلي (على صفحة بالمقاس المطلوب إن وُجد)
+            return {"data": None, "page_size": page_size} if page_size else None
+        
+        # الحفاظ على الحجم الفعلي للصفحة عبر تعديل DPI بنفس نسبة التصغير
+        xres, yres = _mupdf_image_dpi(image_file, original.size)
+        dpi_info = (xres * scale, yres * scale)
+        source_format = original.format
+        
+        if scale != 1.0:
+            img = img.resize((max(1, round(img.width * scale)), max(1, round(img.height * scale))),
+                             Image.LANCZOS)
+        
+        if color == "grayscale":
+            img = _flatten_alpha(img).convert("L")
+        elif color == "bilevel":
+            img = _flatten_alpha(img).convert("L").convert("1", dither=Image.NONE)
+        
+        buffer = io.BytesIO()
+        if img.mode != "1" and (quality or source_format == "JPEG"):
+            _flatten_alpha(img).save(buffer, "JPEG", quality=int(quality or 90),
+                                     optimize=True, dpi=dpi_info)
+        else:
+            img.save(buffer, "PNG", optimize=img.mode == "1", dpi=dpi_info)
+        return {"data": buffer.getvalue(), "page_size": page_size}
+
+def _append_image(pdf_document, image_file: str, data: Optional[bytes] = None,
+                  page_size: Optional[tuple] = None) -> int:
+    """
+    إضافة صورة (أو كل إطارات TIFF متعدد الصفحات) كصفحات جديدة.
+    Append one image file, or the prepared bytes for it, as new page(s).
+    
+    Files are passed to MuPDF by name so it reads them directly; data is never
+    copied through Python unless pre-processing produced new bytes. With page_size
+    the image is fitted and centered on a page of that size; otherwise the page
+    takes the image's own size.
+    
+    Returns:
+        int: Number of pages added
+    """
+    if data is not None:
+        img_doc = fitz.open(stream=data, filetype="jpg" if data[:2] == b"\xff\xd8" else "png")
+    else:
+        image_type = _detect_image_type(image_file)
+        if image_type is None:
+            # صيغ لا يدعمها MuPDF (مثل WebP في بعض الإصدارات) تُحوّل عبر PIL
+            buffer = io.BytesIO()
+            with Image.open(image_file) as img:
+                img.save(buffer, "PNG")
+            return _append_image(pdf_document, image_file, buffer.getvalue(), page_size)
+        img_doc = fitz.open(image_file, filetype=image_type)
+    
+    with img_doc:
+        if len(img_doc) > 1:
+            # TIFF متعدد الإطارات: تحويل المستند كاملاً ثم دمجه
+            with fitz.open("pdf", img_doc.convert_to_pdf()) as frames_pdf:
+                pdf_document.insert_pdf(frames_pdf)
+            return len(img_doc)
+        
+        if page_size:
+            width, height = page_size
+        else:
+            width, height = img_doc[0].rect.width, img_doc[0].rect.height
+        page = pdf_document.new_page(width=width, height=height)
+        if data is not None:
+            page.insert_image(page.rect, stream=data, keep_proportion=True)
+        else:
+            page.insert_image(page.rect, filename=image_file, keep_proportion=True)
+        return 1
+
+def images_to_pdf(image_files: List[str], output_file: str,
+                  preprocess: Optional[Dict[str, Any]] = None,
+                  max_workers: Optional[int] = None,
+                  progress_callback: Optional[Callable[[int, int], None]] = None) -> bool:
     """
     Convert image files to a single PDF without reducing quality.
     تحويل ملفات الصور إلى PDF واحد بدون تقليل الجودة
     
+    Images are detected by content and inserted by file name, so MuPDF reads them
+    directly and JPEG data is embedded as-is. Multi-frame TIFF files contribute one
+    page per frame. When preprocess is given, images go through a pre-processing
+    pipeline (EXIF orientation, fitting to a page size/DPI, grayscale or bilevel
+    conversion, recompression) in worker processes and are fed to the writer in
+    their original order.
+    
     Args:
         image_files (List[str]): List of image file paths
         output_file (str): Path for the output PDF file
+        preprocess (Optional[Dict]): Pre-processing options, e.g.
+            {"page_size": "A4", "dpi": 150, "color": "grayscale", "jpeg_quality": 75}
+            (see _prepare_image_task)
+        max_workers (Optional[int]): Concurrency limit for pre-processing
+        progress_callback (Optional[Callable]): Called as (processed_images, total_images)
         
     Returns:
         bool: True if conversion was successful, False otherwise
@@ -108,32 +619,42 @@ def images_to_pdf(image_files: List[str], output_file: str) -> bool:
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        pdf_document = fitz.open()
-        
         info(f"تحويل {len(valid_images)} صورة إلى PDF بالجودة الكاملة")
         
-        for i, img_file in enumerate(valid_images):
-            try:
-                img_data = open(img_file, "rb").read()
-                img = fitz.open("png", img_data) # Use fitz to handle images
-                
-                page_width = img[0].rect.width
-                page_height = img[0].rect.height
-                
-                page = pdf_document.new_page(width=page_width, height=page_height)
-                page.insert_image(page.rect, stream=img_data)
-                
-                img.close()
+        if preprocess:
+            prepared = run_ordered(_prepare_image_task,
+                                   [(img_file, preprocess) for img_file in valid_images], max_workers,
+                                   mp_context=WORKER_MP_CONTEXT)
+        else:
+            prepared = ((i, None, None) for i in range(len(valid_images)))
+        
+        pdf_document = fitz.open()
+        try:
+            total_pages = 0
+            for i, result, exc in prepared:
+                img_file = valid_images[i]
+                try:
+                    if exc is not None:
+                        warning(f"تعذرت المعالجة المسبقة للصورة {img_file}: {str(exc)}")
+                    if result:
+                        total_pages += _append_image(pdf_document, img_file, result["data"],
+                                                     result["page_size"])
+                    else:
+                        total_pages += _append_image(pdf_document, img_file)
+                except Exception as e:
+                    warning(f"خطأ في معالجة الصورة {img_file}: {str(e)}")
                 
+                if progress_callback:
+                    progress_callback(i + 1, len(valid_images))
                 if (i + 1) % 5 == 0:
                     info(f"تم معالجة {i + 1}/{len(valid_images)} صورة")
-                    
-            except Exception as e:
-                warning(f"خطأ في معالجة الصورة {img_file}: {str(e)}")
-                continue
-        
-        pdf_document.save(output_file)
-        pdf_document.close()
+            
+            if total_pages == 0:
+                raise ValueError("لم يتم تحويل أي صورة")
+            
+            pdf_document.save(output_file, garbage=3, deflate=True)
+        finally:
+            pdf_document.close()
         
         info(f"تم تحويل الصور بنجاح إلى: {output_file}")
         return True
@@ -142,16 +663,74 @@ def images_to_pdf(image_files: List[str], output_file: str) -> bool:
         error(f"خطأ في تحويل الصور إلى PDF: {str(e)}")
         return False
 
+# صيغ إخراج النص المدعومة في pdf_to_text
+TEXT_FORMATS = ("plain", "jsonl", "markdown")
+
+# أكبر عدد صفحات في المهمة الواحدة عند الاستخراج المتوازي (يحدد استهلاك الذاكرة)
+TEXT_CHUNK_PAGES = 64
+
+def _format_page_text(page, page_num: int, output_format: str) -> str:
+    """
+    استخراج نص صفحة واحدة وتنسيقه حسب صيغة الإخراج.
+    Extract one page's text formatted for the output; may be empty for blank pages.
+    """
+    if output_format == "jsonl":
+        blocks = [
+            {"bbox": [round(v, 2) for v in block[:4]], "text": block[4].strip()}
+            for block in page.get_text("blocks", sort=True)
+            if block[6] == 0 and block[4].strip()
+        ]
+        record = {
+            "page": page_num + 1,
+            "width": round(page.rect.width, 2),
+            "height": round(page.rect.height, 2),
+            "text": "\n".join(block["text"] for block in blocks),
+            "blocks": blocks,
+        }
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    
+    if output_format == "markdown":
+        paragraphs = [" ".join(block[4].split())
+                      for block in page.get_text("blocks", sort=True)
+                      if block[6] == 0 and block[4].strip()]
+        if not paragraphs:
+            return ""
+        return f"## الصفحة {page_num + 1}\n\n" + "\n\n".join(paragraphs) + "\n\n"
+    
+    page_text = page.get_text("text")
+    if not page_text.strip():
+        return ""
+    return f"--- الصفحة {page_num + 1} ---\n" + page_text + "\n\n"
+
+def _extract_text_task(input_file: str, page_numbers: List[int], output_format: str) -> List[str]:
+    """مهمة عامل: استخراج نص مجموعة صفحات متتالية بمقبض مستند مستقل"""
+    pdf_document = fitz.open(input_file)
+    try:
+        return [_format_page_text(pdf_document[page_num], page_num, output_format)
+                for page_num in page_numbers]
+    finally:
+        pdf_document.close()
+
 def pdf_to_text(input_file: str, output_file: str, 
-               encoding: str = "utf-8") -> bool:
+               encoding: str = "utf-8", output_format: str = "plain",
+               max_workers: Optional[int] = None,
+               progress_callback: Optional[Callable[[int, int], None]] = None) -> bool:
     """
     Extract text from PDF and save to text file.
     استخراج النص من PDF وحفظه في ملف نصي
     
+    Text is written to the output as it is extracted, so memory use does not grow
+    with the document. Large documents are split into page shards extracted in
+    worker processes; shards are written back in page order.
+    
     Args:
         input_file (str): Path to the input PDF file
         output_file (str): Path for the output text file
         encoding (str): Text encoding (utf-8, cp1256 for Arabic)
+        output_format (str): "plain", "jsonl" (one JSON record per page with block
+            bounding boxes) or "markdown"
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        progress_callback (Optional[Callable]): Called as (completed_pages, total_pages)
         
     Returns:
         bool: True if extraction was successful, False otherwise
@@ -160,31 +739,56 @@ def pdf_to_text(input_file: str, output_file: str,
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"الملف غير موجود: {input_file}")
         
+        output_format = (output_format or "plain").lower()
+        if output_format not in TEXT_FORMATS:
+            raise ValueError(f"صيغة إخراج غير مدعومة: {output_format}")
+        
         pdf_document = fitz.open(input_file)
         total_pages = len(pdf_document)
         
         info(f"استخراج النص من {total_pages} صفحة")
         
-        full_text = ""
-        for page_num in range(total_pages):
-            page = pdf_document[page_num]
-            page_text = page.get_text("text")
-            
-            if page_text.strip():
-                full_text += f"--- الصفحة {page_num + 1} ---\n"
-                full_text += page_text + "\n\n"
-            
-            if (page_num + 1) % 10 == 0:
-                info(f"تم معالجة {page_num + 1}/{total_pages} صفحة")
-        
-        pdf_document.close()
-        
         output_dir = os.path.dirname(output_file)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
+        workers = get_worker_count(max_workers, total_pages)
+        if total_pages < PARALLEL_MIN_PAGES:
+            workers = 1
+        
+        completed_pages = 0
+        
+        def report(pages_done: int) -> None:
+            if progress_callback:
+                progress_callback(pages_done, total_pages)
+            if pages_done % 10 == 0 or pages_done == total_pages:
+                info(f"تم معالجة {pages_done}/{total_pages} صفحة")
+        
         with open(output_file, 'w', encoding=encoding) as text_file:
-            text_file.write(full_text)
+            if workers == 1:
+                # استخراج متسلسل: كتابة كل صفحة فور استخراجها
+                try:
+                    for page_num in range(total_pages):
+                        text_file.write(_format_page_text(pdf_document[page_num], page_num, output_format))
+                        completed_pages += 1
+                        report(completed_pages)
+                finally:
+                    pdf_document.close()
+            else:
+                pdf_document.close()
+                info(f"استخدام {workers} عملية متوازية")
+                chunks_per_worker = max(4, total_pages // (workers * TEXT_CHUNK_PAGES))
+                tasks = [(input_file, chunk, output_format)
+                         for chunk in split_into_chunks(total_pages, workers, chunks_per_worker)]
+                
+                for _, page_texts, exc in run_ordered(_extract_text_task, tasks, workers,
+                                                             mp_context=WORKER_MP_CONTEXT):
+                    if exc is not None:
+                        raise exc
+                    text_file.writelines(page_texts)
+                    text_file.flush()
+                    completed_pages += len(page_texts)
+                    report(completed_pages)
         
         info(f"تم استخراج النص بنجاح إلى: {output_file}")
         return True
@@ -193,16 +797,214 @@ def pdf_to_text(input_file: str, output_file: str,
         error(f"خطأ في استخراج النص: {str(e)}")
         return False
 
+def _extract_images_task(input_file: str, images: List[tuple], output_folder: str,
+                        min_size: int) -> List[tuple]:
+    """
+    مهمة عامل: كتابة الصور المضمنة بترميزها الأصلي دون إعادة ضغط.
+    Write embedded images in their native encoding; images is [(xref, page_num), ...].
+    
+    Returns:
+        List[tuple]: [(xref, output_path or None, error or None), ...]
+    """
+    base_name = os.path.splitext(os.path.basename(input_file))[0]
+    results = []
+    pdf_document = fitz.open(input_file)
+    try:
+        for xref, page_num in images:
+            try:
+                image = pdf_document.extract_image(xref)
+                if not image or not image.get("image"):
+                    results.append((xref, None, "صورة فارغة أو غير مدعومة"))
+                    continue
+                if min(image.get("width", 0), image.get("height", 0)) < min_size:
+                    results.append((xref, None, None))
+                    continue
+                
+                output_path = os.path.join(
+                    output_folder, f"{base_name}_page_{page_num + 1:03d}_img_{xref}.{image['ext']}"
+                )
+                with open(output_path, "wb") as image_file:
+                    image_file.write(image["image"])
+                results.append((xref, output_path, None))
+            except Exception as e:
+                results.append((xref, None, str(e)))
+        return results
+    finally:
+        pdf_document.close()
+
+def extract_images(input_file: str, output_folder: str, min_size: int = 0,
+                   max_workers: Optional[int] = None,
+                   progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Extract the original embedded images from a PDF without rendering pages.
+    استخراج الصور المضمنة في PDF بجودتها الأصلية دون رسم الصفحات
+    
+    Images are deduplicated by xref (an image reused on many pages is written once,
+    named after the first page it appears on) and written in their stored encoding
+    (JPEG, JPX, PNG...), so nothing is recompressed. Large sets are written by
+    worker processes. Soft masks (alpha) are stored separately in PDF and are not
+    merged into the output.
+    
+    Args:
+        input_file (str): Path to the input PDF file
+        output_folder (str): Folder where images will be saved
+        min_size (int): Skip images whose width or height is below this (icons, rules)
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        progress_callback (Optional[Callable]): Called as (processed_images, total_images)
+        
+    Returns:
+        dict: {'images_found', 'extracted', 'skipped', 'failed', 'files', 'elapsed_time'}
+    """
+    results = {
+        'images_found': 0,
+        'extracted': 0,
+        'skipped': 0,
+        'failed': 0,
+        'files': [],
+        'elapsed_time': 0.0
+    }
+    start_time = time.perf_counter()
+    
+    try:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"الملف غير موجود: {input_file}")
+        
+        os.makedirs(output_folder, exist_ok=True)
+        
+        # جمع الصور الفريدة حسب xref مع أول صفحة تظهر فيها
+        first_page: Dict[int, int] = {}
+        with fitz.open(input_file) as pdf_document:
+            for page_num in range(len(pdf_document)):
+                for image_info in pdf_document.get_page_images(page_num):
+                    first_page.setdefault(image_info[0], page_num)
+        
+        images = sorted(first_page.items(), key=lambda item: (item[1], item[0]))
+        results['images_found'] = len(images)
+        info(f"تم العثور على {len(images)} صورة فريدة في {os.path.basename(input_file)}")
+        
+        workers = get_worker_count(max_workers, len(images))
+        if len(images) < PARALLEL_MIN_PAGES:
+            workers = 1
+        
+        tasks = [(input_file, [images[i] for i in chunk], output_folder, min_size)
+                 for chunk in split_into_chunks(len(images), workers)]
+        
+        processed = 0
+        for _, chunk_results, exc in run_in_pool(_extract_images_task, tasks, workers,
+                                                      mp_context=WORKER_MP_CONTEXT):
+            if exc is not None:
+                raise exc
+            for xref, output_path, failure in chunk_results:
+                if output_path:
+                    results['extracted'] += 1
+                    results['files'].append(output_path)
+                elif failure:
+                    results['failed'] += 1
+                    warning(f"تعذر استخراج الصورة {xref}: {failure}")
+                else:
+                    results['skipped'] += 1
+            processed += len(chunk_results)
+            if progress_callback:
+                progress_callback(processed, len(images))
+        
+        results['files'].sort()
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"تم استخراج {results['extracted']} صورة إلى: {output_folder} خلال {results['elapsed_time']} ثانية")
+        return results
+        
+    except Exception as e:
+        error(f"خطأ في استخراج الصور من PDF: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        return results
+
 def find_system_font(name: str) -> Optional[str]:
-    """Find a font file on the system."""
-    # For Windows
-    if os.name == 'nt':
-        font_dir = os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "Fonts")
-        font_path = os.path.join(font_dir, name)
-        if os.path.exists(font_path):
-            return font_path
-    # Add paths for other OS if needed
-    return None
+    """Find a font file (by file or family name) in the bundled and system font folders."""
+    return font_registry.find(name)
+
+# نطاقات الحروف العربية والعبرية (تحتاج إعادة تشكيل واتجاه من اليمين لليسار)
+_RTL_PATTERN = re.compile("[\u0590-\u08FF\uFB1D-\uFDFF\uFE70-\uFEFF]")
+
+@lru_cache(maxsize=8192)
+def _reshape_text(text: str) -> str:
+    """إعادة تشكيل الحروف العربية (مع ذاكرة مؤقتة للأسطر المتكررة)"""
+    return arabic_reshaper.reshape(text)
+
+@lru_cache(maxsize=8192)
+def _visual_text(text: str) -> str:
+    """تطبيق خوارزمية BiDi على نص تمت إعادة تشكيله"""
+    return get_display(text)
+
+class _TextLayout:
+    """
+    تقسيم الأسطر حسب العرض المقاس فعلياً بالخط المستخدم.
+    Wrap logical lines by measured width and produce visual (shaped, BiDi-ordered) lines.
+    """
+    
+    # الحد الأقصى لعدد الكلمات المحفوظة قياساتها قبل تفريغ الذاكرة
+    MAX_CACHED_WIDTHS = 100000
+    
+    def __init__(self, font, font_size: float, max_width: float):
+        self.font = font
+        self.font_size = font_size
+        self.max_width = max_width
+        self.space_width = font.text_length(" ", fontsize=font_size)
+        self._widths: Dict[str, float] = {}
+    
+    def width(self, text: str) -> float:
+        """عرض النص بالنقاط (مع ذاكرة مؤقتة للكلمات)"""
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= self.MAX_CACHED_WIDTHS:
+                self._widths.clear()
+            width = self._widths[text] = self.font.text_length(text, fontsize=self.font_size)
+        return width
+    
+    def _split_long_word(self, word: str) -> List[str]:
+        """تقسيم كلمة أطول من عرض السطر على مستوى الحروف"""
+        pieces, current = [], ""
+        for char in word:
+            if current and self.width(current + char) > self.max_width:
+                pieces.append(current)
+                current = char
+            else:
+                current += char
+        if current:
+            pieces.append(current)
+        return pieces
+    
+    def wrap(self, line: str) -> List[tuple]:
+        """
+        تقسيم سطر منطقي إلى أسطر مرئية.
+        
+        Returns:
+            List[tuple]: [(visual_text, width, is_rtl), ...]; an empty line yields [("", 0, False)]
+        """
+        line = line.rstrip("\r\n").expandtabs(4)
+        is_rtl = bool(_RTL_PATTERN.search(line))
+        shaped = _reshape_text(line) if is_rtl else line
+        
+        if self.width(shaped) <= self.max_width:
+            return [(_visual_text(shaped) if is_rtl else shaped, self.width(shaped), is_rtl)]
+        
+        # التقسيم على النص بعد إعادة التشكيل لأن أشكال الحروف تغير العرض
+        segments, current, current_width = [], "", 0.0
+        for word in shaped.split(" "):
+            word_width = self.width(word)
+            if current and current_width + self.space_width + word_width <= self.max_width:
+                current += " " + word
+                current_width += self.space_width + word_width
+                continue
+            if current:
+                segments.append((current, current_width))
+            if word_width > self.max_width:
+                pieces = self._split_long_word(word)
+                segments.extend((piece, self.width(piece)) for piece in pieces[:-1])
+                word = pieces[-1] if pieces else ""
+                word_width = self.width(word)
+            current, current_width = word, word_width
+        segments.append((current, current_width))
+        
+        return [(_visual_text(text) if is_rtl else text, width, is_rtl) for text, width in segments]
 
 def text_to_pdf(input_file: str, output_file: str, 
                font_size: int = 12, encoding: str = "utf-8") -> bool:
@@ -210,6 +1012,10 @@ def text_to_pdf(input_file: str, output_file: str,
     Convert text file to PDF with full Arabic support.
     تحويل ملف نصي إلى PDF مع دعم كامل للغة العربية
     
+    The input is read line by line, long lines are wrapped by their measured width,
+    Arabic shaping is cached for repeated lines, and every page is drawn with a
+    single TextWriter. Arabic/Hebrew lines are right-aligned, other lines left-aligned.
+    
     Args:
         input_file (str): Path to the input text file
         output_file (str): Path for the output PDF file
@@ -223,64 +1029,71 @@ def text_to_pdf(input_file: str, output_file: str,
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"الملف غير موجود: {input_file}")
         
-        with open(input_file, 'r', encoding=encoding) as text_file:
-            text_content = text_file.read()
-        
-        if not text_content.strip():
-            raise ValueError("الملف النصي فارغ")
-        
         output_dir = os.path.dirname(output_file)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        pdf_document = fitz.open()
-        
         # Find a suitable Arabic font
-        font_path = find_system_font("arial.ttf")
+        font = None
+        font_path = font_registry.find_arabic_font()
         if not font_path:
-            warning("تحذير: لم يتم العثور على خط Arial. قد لا يتم عرض النص العربي بشكل صحيح.")
-            font_name = "helv" # Fallback
+            warning("تحذير: لم يتم العثور على خط يدعم العربية. قد لا يتم عرض النص العربي بشكل صحيح.")
         else:
-            # Embed the font
             try:
-                font_name = "Arial"
-                pdf_document.insert_font(fontname=font_name, fontfile=font_path)
+                font = fitz.Font(fontfile=font_path)
             except Exception as e:
-                warning(f"خطأ في تضمين الخط: {e}. استخدام الخط الافتراضي.")
-                font_name = "helv"
+                warning(f"خطأ في تحميل الخط: {e}. استخدام الخط الافتراضي.")
+        if font is None:
+            font = fitz.Font("helv")  # Fallback
 
         page_width, page_height = 595, 842  # A4
         margin = 40
         line_height = font_size + 6
+        layout = _TextLayout(font, font_size, page_width - 2 * margin)
         
-        lines = text_content.split('\n')
-        info(f"تحويل النص إلى PDF ({len(lines)} سطر)")
-        
-        y_position = margin
-        page = pdf_document.new_page(width=page_width, height=page_height)
-
-        for line_text in lines:
-            if y_position > page_height - margin:
-                page = pdf_document.new_page(width=page_width, height=page_height)
-                y_position = margin
-
-            # Reshape and apply BiDi for Arabic text
-            reshaped_text = arabic_reshaper.reshape(line_text)
-            bidi_text = get_display(reshaped_text)
+        pdf_document = fitz.open()
+        try:
+            page = writer = None
+            y_position = page_height  # يفرض إنشاء صفحة عند أول سطر
+            line_count = 0
+            has_content = False
             
-            # Calculate text width to handle alignment
-            text_width = fitz.get_text_length(bidi_text, fontname=font_name, fontsize=font_size)
+            with open(input_file, 'r', encoding=encoding) as text_file:
+                for line_text in text_file:
+                    line_count += 1
+                    has_content = has_content or bool(line_text.strip())
+                    
+                    for visual_text, text_width, is_rtl in layout.wrap(line_text):
+                        if y_position > page_height - margin:
+                            if writer is not None:
+                                writer.write_text(page, color=(0, 0, 0))
+                            page = pdf_document.new_page(width=page_width, height=page_height)
+                            writer = fitz.TextWriter(page.rect)
+                            y_position = margin
+                        
+                        if visual_text:
+                            x_position = page_width - margin - text_width if is_rtl else margin
+                            writer.append((x_position, y_position), visual_text,
+                                          font=font, fontsize=font_size)
+                        y_position += line_height
+                    
+                    if line_count % 10000 == 0:
+                        info(f"تمت معالجة {line_count} سطر")
             
-            # Position for RTL text
-            x_position = page_width - margin - text_width
+            if not has_content:
+                raise ValueError("الملف النصي فارغ")
             
-            page.insert_text((x_position, y_position), bidi_text, 
-                           fontsize=font_size, fontname=font_name, color=(0, 0, 0))
+            writer.write_text(page, color=(0, 0, 0))
+            info(f"تحويل النص إلى PDF ({line_count} سطر، {len(pdf_document)} صفحة)")
             
-            y_position += line_height
-        
-        pdf_document.save(output_file)
-        pdf_document.close()
+            # تضمين الحروف المستخدمة فقط من الخط
+            try:
+                pdf_document.subset_fonts()
+            except Exception as e:
+                warning(f"تعذر تقليص الخط المضمّن: {e}")
+            pdf_document.save(output_file, garbage=3, deflate=True)
+        finally:
+            pdf_document.close()
         
         info(f"تم تحويل النص بنجاح إلى: {output_file}")
         return True
@@ -289,6 +1102,86 @@ def text_to_pdf(input_file: str, output_file: str,
         error(f"خطأ في تحويل النص إلى PDF: {str(e)}")
         return False
 
+# ذاكرة مؤقتة لنتائج فحص ملفات PDF: (المسار، وقت التعديل، الحجم، حجم العينة) -> النتيجة
+_PROBE_CACHE_SIZE = 256
+_probe_cache: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_probe_lock = threading.Lock()
+
+def _sample_page_numbers(total_pages: int, sample_size: int, seed: str) -> List[int]:
+    """
+    اختيار صفحات العينة: الأولى والأخيرة ثم صفحات عشوائية ثابتة لنفس الملف.
+    First and last page, then pseudo-random pages (stable for the same file).
+    """
+    if total_pages <= sample_size:
+        return list(range(total_pages))
+    pages = [0, total_pages - 1]
+    rng = random.Random(seed)
+    pages += rng.sample(range(1, total_pages - 1), max(0, sample_size - 2))
+    return pages
+
+def _page_has_text(page) -> bool:
+    """وجود نص في الصفحة (الصفحة بدون خطوط لا يمكن أن تحتوي نصاً)"""
+    if not page.get_fonts():
+        return False
+    return bool(page.get_text("text").strip())
+
+def probe_pdf(input_file: str, sample_size: int = 8) -> Dict[str, Any]:
+    """
+    فحص سريع لمحتوى ملف PDF بالعينات.
+    Quickly probe a PDF for text and images by sampling pages.
+    
+    Sampling stops as soon as both text and images have been found. A positive answer
+    is certain; a negative one is reported with confidence = sampled_pages / page_count.
+    Results are cached per (path, mtime, size).
+    
+    Args:
+        input_file (str): Path to the PDF file
+        sample_size (int): Maximum number of pages to inspect
+        
+    Returns:
+        dict: page_count, encrypted, has_text, has_images, needs_ocr,
+              text_confidence, images_confidence, confidence, pages_sampled
+    """
+    stat = os.stat(input_file)
+    key = (os.path.abspath(input_file), stat.st_mtime, stat.st_size, sample_size)
+    with _probe_lock:
+        cached = _probe_cache.get(key)
+        if cached is not None:
+            _probe_cache.move_to_end(key)
+            return dict(cached)
+    
+    with fitz.open(input_file) as pdf_doc:
+        total_pages = len(pdf_doc)
+        result = {"page_count": total_pages, "encrypted": bool(pdf_doc.needs_pass)}
+        
+        has_text = has_images = False
+        sampled = 0
+        if not pdf_doc.needs_pass:
+            for page_num in _sample_page_numbers(total_pages, sample_size, key[0]):
+                page = pdf_doc[page_num]
+                sampled += 1
+                has_images = has_images or bool(page.get_images())
+                has_text = has_text or _page_has_text(page)
+                if has_text and has_images:
+                    break
+    
+    coverage = round(sampled / total_pages, 2) if total_pages else 1.0
+    result.update({
+        "has_text": has_text,
+        "has_images": has_images,
+        "needs_ocr": has_images and not has_text,
+        "text_confidence": 1.0 if has_text else coverage,
+        "images_confidence": 1.0 if has_images else coverage,
+        "pages_sampled": sampled,
+    })
+    result["confidence"] = min(result["text_confidence"], result["images_confidence"])
+    
+    with _probe_lock:
+        _probe_cache[key] = result
+        while len(_probe_cache) > _PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return dict(result)
+
 def get_conversion_info(input_file: str) -> Dict[str, Any]:
     """
     Get information about a file for conversion.
@@ -323,11 +1216,7 @@ def get_conversion_info(input_file: str) -> Dict[str, Any]:
                 "استخراج الصور من PDF"
             ]
             try:
-                pdf_doc = fitz.open(input_file)
-                info["page_count"] = len(pdf_doc)
-                info["has_text"] = any(page.get_text().strip() for page in pdf_doc)
-                info["has_images"] = any(page.get_images() for page in pdf_doc)
-                pdf_doc.close()
+                info.update(probe_pdf(input_file))
             except: pass
                 
         elif file_ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif']:
@@ -342,10 +1231,13 @@ def get_conversion_info(input_file: str) -> Dict[str, Any]:
         elif file_ext == '.txt':
             info["supported_conversions"] = ["نص إلى PDF"]
             try:
+                line_count = char_count = 0
                 with open(input_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    info["line_count"] = len(content.split('\n'))
-                    info["char_count"] = len(content)
+                    for line in f:
+                        line_count += 1
+                        char_count += len(line)
+                info["line_count"] = max(1, line_count)
+                info["char_count"] = char_count
             except: pass
         
         return info
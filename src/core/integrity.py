@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+فحص سلامة ملفات PDF وإصلاحها
+PDF Integrity - Fast structural checks (no rendering) and fitz-based repair
+"""
+
+import os
+import json
+import time
+from typing import Callable, List, Optional, Union
+
+import fitz  # PyMuPDF
+
+from src.utils.logger import info, warning, error
+from src.utils.parallel import collect_files, run_in_pool, unique_output_path
+
+# عدد البايتات المفحوصة في بداية الملف ونهايته
+_HEADER_PROBE_BYTES = 1024
+_TRAILER_PROBE_BYTES = 2048
+
+# تصنيفات الضرر حسب الخطورة
+SEVERITY_OK = "ok"
+SEVERITY_WARNING = "warning"      # الملف يعمل لكن بنيته غير سليمة تماماً
+SEVERITY_DAMAGED = "damaged"      # كائنات أو صفحات تالفة، الإصلاح مطلوب
+SEVERITY_FATAL = "fatal"          # لا يمكن فتح الملف
+
+_SEVERITY_ORDER = (SEVERITY_OK, SEVERITY_WARNING, SEVERITY_DAMAGED, SEVERITY_FATAL)
+
+# نوع الضرر ودرجة خطورته
+DAMAGE_TYPES = {
+    'invalid_header': SEVERITY_WARNING,
+    'truncated': SEVERITY_WARNING,
+    'xref_rebuilt': SEVERITY_WARNING,
+    'encrypted': SEVERITY_WARNING,
+    'broken_objects': SEVERITY_DAMAGED,
+    'broken_streams': SEVERITY_DAMAGED,
+    'broken_pages': SEVERITY_DAMAGED,
+    'no_pages': SEVERITY_DAMAGED,
+    'unreadable': SEVERITY_FATAL,
+}
+
+
+def _check_file_markers(file_path: str) -> List[str]:
+    """فحص ترويسة %PDF- وعلامة %%EOF في نهاية الملف بدون تحليله"""
+    damage = []
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        if b"%PDF-" not in f.read(_HEADER_PROBE_BYTES):
+            damage.append('invalid_header')
+        f.seek(max(0, size - _TRAILER_PROBE_BYTES))
+        tail = f.read()
+    if b"%%EOF" not in tail or b"startxref" not in tail:
+        damage.append('truncated')
+    return damage
+
+
+def _take_mupdf_warnings() -> List[str]:
+    """قراءة تحذيرات MuPDF المتراكمة وتصفيرها"""
+    text = fitz.TOOLS.mupdf_warnings(reset=True)
+    return [line for line in text.splitlines() if line.strip()] if text else []
+
+
+def _scan_objects(doc, deep: bool, collected: List[str]) -> tuple:
+    """
+    قراءة كل كائنات جدول xref؛ مع deep تُفك ضغط التدفقات أيضاً.
+    Returns (broken_objects, broken_streams) as lists of xref numbers.
+
+    MuPDF does not raise on corrupt compressed data: it warns and returns the bytes
+    decoded so far. Any warning while decoding a stream marks it broken; the warning
+    lines are appended to collected.
+    """
+    broken_objects, broken_streams = [], []
+    for xref in range(1, doc.xref_length()):
+        try:
+            doc.xref_object(xref, compressed=True)
+        except Exception:
+            broken_objects.append(xref)
+            continue
+        finally:
+            collected.extend(_take_mupdf_warnings())
+        if deep and doc.xref_is_stream(xref):
+            try:
+                doc.xref_stream(xref)
+                failed = False
+            except Exception:
+                failed = True
+            stream_warnings = _take_mupdf_warnings()
+            collected.extend(stream_warnings)
+            if failed or stream_warnings:
+                broken_streams.append(xref)
+    return broken_objects, broken_streams
+
+
+def _scan_pages(doc, collected: List[str]) -> List[int]:
+    """
+    تحميل كل صفحة وفك ضغط تدفقات محتواها (بدون رسم) وإرجاع أرقام الصفحات التالفة.
+    A page is broken when loading or decoding it raises or emits a MuPDF warning.
+    """
+    broken = []
+    for page_num in range(doc.page_count):
+        try:
+            page = doc.load_page(page_num)
+            page.read_contents()
+            failed = False
+        except Exception:
+            failed = True
+        page_warnings = _take_mupdf_warnings()
+        collected.extend(page_warnings)
+        if failed or page_warnings:
+            broken.append(page_num + 1)
+    return broken
+
+
+def check_pdf(file_path: str, deep: bool = False) -> dict:
+    """
+    فحص بنية ملف PDF بسرعة بدون رسم الصفحات.
+    Check a PDF's structure: header/trailer markers, xref rebuild, objects and page tree.
+
+    Args:
+        file_path (str): Path to the PDF file
+        deep (bool): Also decompress every stream (slower, catches corrupt images/fonts);
+                     page content streams are always decoded
+
+    Returns:
+        dict: {'path', 'size', 'pages', 'severity', 'damage', 'broken_objects',
+               'broken_streams', 'broken_pages', 'mupdf_warnings'}
+    """
+    report = {
+        'path': file_path,
+        'size': 0,
+        'pages': 0,
+        'severity': SEVERITY_OK,
+        'damage': [],
+        'broken_objects': [],
+        'broken_streams': [],
+        'broken_pages': [],
+        'mupdf_warnings': []
+    }
+
+    fitz.TOOLS.mupdf_display_errors(False)
+    fitz.TOOLS.reset_mupdf_warnings()
+    try:
+        report['size'] = os.path.getsize(file_path)
+        report['damage'].extend(_check_file_markers(file_path))
+
+        with fitz.open(file_path) as doc:
+            if not doc.is_pdf:
+                raise ValueError("الملف ليس PDF")
+            if doc.is_repaired:
+                report['damage'].append('xref_rebuilt')
+
+            if doc.needs_pass:
+                # الكائنات المشفرة لا يمكن فحصها بدون كلمة المرور
+                report['damage'].append('encrypted')
+            else:
+                report['pages'] = doc.page_count
+                if doc.page_count == 0:
+                    report['damage'].append('no_pages')
+                # تحذيرات الفتح (مثل إعادة بناء xref) لا تُنسب لكائن أو صفحة بعينها
+                report['mupdf_warnings'].extend(_take_mupdf_warnings())
+                report['broken_objects'], report['broken_streams'] = _scan_objects(
+                    doc, deep, report['mupdf_warnings'])
+                report['broken_pages'] = _scan_pages(doc, report['mupdf_warnings'])
+                if report['broken_objects']:
+                    report['damage'].append('broken_objects')
+                if report['broken_streams']:
+                    report['damage'].append('broken_streams')
+                if report['broken_pages']:
+                    report['damage'].append('broken_pages')
+    except Exception as e:
+        report['damage'].append('unreadable')
+        report['mupdf_warnings'].append(str(e))
+
+    report['mupdf_warnings'].extend(_take_mupdf_warnings())
+
+    severities = [DAMAGE_TYPES[damage] for damage in report['damage']] or [SEVERITY_OK]
+    report['severity'] = max(severities, key=_SEVERITY_ORDER.index)
+    return report
+
+
+def repair_pdf(input_file: str, output_file: str, deep: bool = False) -> dict:
+    """
+    محاولة إصلاح ملف: MuPDF يعيد بناء جدول xref عند الفتح، ثم يُحفظ الملف مع
+    تنظيف الكائنات (garbage) وإعادة كتابة محتوى الصفحات (clean).
+    Repair a PDF by reopening it through MuPDF and saving with garbage/clean.
+
+    Returns:
+        dict: {'success', 'output_file', 'pages_before', 'pages_after', 'check'} where
+              check is the check_pdf report of the repaired file
+    """
+    result = {'success': False, 'output_file': output_file, 'pages_before': 0,
+              'pages_after': 0, 'check': None}
+    temp_path = output_file + ".tmp"
+    fitz.TOOLS.mupdf_display_errors(False)
+    try:
+        with fitz.open(input_file) as doc:
+            if doc.needs_pass:
+                raise ValueError("الملف مشفر ولا يمكن إصلاحه بدون كلمة المرور")
+            result['pages_before'] = doc.page_count
+
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            try:
+                doc.save(temp_path, garbage=3, clean=True, deflate=True)
+            except Exception as e:
+                # clean يفشل مع تدفقات محتوى تالفة: إعادة المحاولة بدون إعادة كتابتها
+                warning(f"فشل الحفظ مع clean، إعادة المحاولة بدونه: {e}")
+                doc.save(temp_path, garbage=3, deflate=True)
+        os.replace(temp_path, output_file)
+
+        result['check'] = check_pdf(output_file, deep)
+        result['pages_after'] = result['check']['pages']
+        result['success'] = result['check']['severity'] in (SEVERITY_OK, SEVERITY_WARNING)
+        if result['pages_after'] < result['pages_before']:
+            warning(f"الملف المصلح فقد {result['pages_before'] - result['pages_after']} صفحة: {output_file}")
+        info(f"إصلاح {os.path.basename(input_file)}: {result['check']['severity']}")
+    except Exception as e:
+        error(f"فشل إصلاح الملف {input_file}: {str(e)}")
+    finally:
+        fitz.TOOLS.reset_mupdf_warnings()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return result
+
+
+def _integrity_task(input_file: str, output_file: Optional[str], deep: bool) -> dict:
+    """مهمة عامل: فحص ملف واحد وإصلاحه عند الحاجة (إذا حُدد ملف ناتج)."""
+    start_time = time.perf_counter()
+    report = check_pdf(input_file, deep)
+    if output_file and report['severity'] in (SEVERITY_WARNING, SEVERITY_DAMAGED) \
+            and 'encrypted' not in report['damage']:
+        report['repair'] = repair_pdf(input_file, output_file, deep)
+    report['duration'] = round(time.perf_counter() - start_time, 3)
+    return report
+
+
+def check_pdfs(inputs: Union[str, List[str]], repair: bool = False, output_folder: Optional[str] = None,
+               deep: bool = False, max_workers: Optional[int] = None, recursive: bool = False,
+               patterns: Optional[List[str]] = None, report_path: Optional[str] = None,
+               progress_callback: Optional[Callable[[int, int, dict], None]] = None) -> dict:
+    """
+    فحص مجلد أو قائمة ملفات PDF بشكل متوازٍ مع إصلاح اختياري وتقرير JSON.
+    Check (and optionally repair) a folder or list of PDFs in worker processes.
+
+    Args:
+        inputs: Folder path or list of PDF file paths
+        repair (bool): Repair files whose severity is warning or damaged
+        output_folder (Optional[str]): Folder for repaired copies (default: next to each
+                                       file as <name>_repaired.pdf)
+        deep (bool): Decompress every stream while checking
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        recursive (bool): Traverse sub-folders when inputs is a folder
+        patterns (Optional[List[str]]): Glob filters for file names (default: ["*.pdf"])
+        report_path (Optional[str]): JSON file for the machine-readable report
+        progress_callback (Optional[Callable]): Called as (done, total, file_report) after each file
+
+    Returns:
+        dict: {'processed', 'ok', 'warning', 'damaged', 'fatal', 'repaired', 'files', 'elapsed_time'}
+    """
+    results = {
+        'processed': 0,
+        SEVERITY_OK: 0,
+        SEVERITY_WARNING: 0,
+        SEVERITY_DAMAGED: 0,
+        SEVERITY_FATAL: 0,
+        'repaired': 0,
+        'files': [],
+        'elapsed_time': 0.0
+    }
+    start_time = time.perf_counter()
+
+    try:
+        if isinstance(inputs, str):
+            if not os.path.isdir(inputs):
+                raise FileNotFoundError(f"المجلد غير موجود: {inputs}")
+            base_folder = inputs
+            pdf_files = collect_files(inputs, patterns or ["*.pdf"], recursive)
+        else:
+            base_folder = None
+            pdf_files = [f for f in inputs if os.path.exists(f)]
+
+        info(f"فحص سلامة {len(pdf_files)} ملف PDF")
+
+        tasks = []
+        used_outputs = set()
+        for input_file in pdf_files:
+            output_file = None
+            if repair:
+                if output_folder:
+                    relative_path = os.path.relpath(input_file, base_folder) if base_folder else os.path.basename(input_file)
+                    output_file = unique_output_path(os.path.join(output_folder, relative_path), used_outputs)
+                else:
+                    output_file = os.path.splitext(input_file)[0] + "_repaired.pdf"
+            tasks.append((input_file, output_file, deep))
+
+        file_reports = [None] * len(tasks)
+        for index, report, exc in run_in_pool(_integrity_task, tasks, max_workers):
+            if exc is not None:
+                # انهيار العامل نفسه (مثلاً ملف يسبب خطأ في MuPDF)
+                report = {'path': tasks[index][0], 'severity': SEVERITY_FATAL,
+                          'damage': ['unreadable'], 'mupdf_warnings': [str(exc)]}
+            file_reports[index] = report
+
+            results['processed'] += 1
+            results[report['severity']] += 1
+            if report.get('repair', {}).get('success'):
+                results['repaired'] += 1
+            if report['severity'] != SEVERITY_OK:
+                warning(f"{os.path.basename(report['path'])}: {report['severity']} ({', '.join(report['damage'])})")
+            if progress_callback:
+                progress_callback(results['processed'], len(tasks), report)
+
+        results['files'] = [r for r in file_reports if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"الفحص: {results[SEVERITY_OK]} سليم، {results[SEVERITY_WARNING]} تحذير، "
+             f"{results[SEVERITY_DAMAGED]} تالف، {results[SEVERITY_FATAL]} غير قابل للقراءة، "
+             f"{results['repaired']} تم إصلاحه خلال {results['elapsed_time']} ثانية")
+
+    except Exception as e:
+        error(f"خطأ في فحص السلامة: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+
+    if report_path:
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            warning(f"تعذر حفظ التقرير: {e}")
+    return results
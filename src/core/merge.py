@@ -7,6 +7,7 @@ import os
 from typing import List, Optional
 
 from src.utils.logger import error, info, warning
+from src.core.pdf_output import linearize_pdf
 
 # تحميل كسول للمكتبات الثقيلة
 _pdf_reader = None
@@ -31,13 +32,14 @@ def _get_pdf_classes():
             raise ImportError(error_msg) from e
     return _pdf_reader, _pdf_writer
 
-def merge_pdfs(input_files: List[str], output_path: str) -> bool:
+def merge_pdfs(input_files: List[str], output_path: str, linearize: bool = False) -> bool:
     """
     Merge multiple PDF files into a single PDF file.
     
     Args:
         input_files (List[str]): List of paths to PDF files to be merged
         output_path (str): Path where the merged PDF will be saved
+        linearize (bool): Write a linearized ("fast web view") PDF
         
     Returns:
         bool: True if merge was successful, False otherwise
@@ -87,6 +89,8 @@ def merge_pdfs(input_files: List[str], output_path: str) -> bool:
         # Write merged PDF to output file
         with open(output_path, 'wb') as output_file:
             pdf_writer.write(output_file)
+        if linearize and not linearize_pdf(output_path):
+            return False
         
         info(f"تم دمج {len(input_files)} ملف بنجاح في {output_path}")
         return True
@@ -96,7 +100,8 @@ def merge_pdfs(input_files: List[str], output_path: str) -> bool:
         return False
 
 def merge_pdfs_with_bookmarks(input_files: List[str], output_path: str, 
-                             bookmark_names: Optional[List[str]] = None) -> bool:
+                             bookmark_names: Optional[List[str]] = None,
+                             linearize: bool = False) -> bool:
     """
     Merge multiple PDF files with bookmarks for each original file.
     
@@ -105,6 +110,7 @@ def merge_pdfs_with_bookmarks(input_files: List[str], output_path: str,
         output_path (str): Path where the merged PDF will be saved
         bookmark_names (Optional[List[str]]): Custom names for bookmarks. 
                                             If None, uses filenames.
+        linearize (bool): Write a linearized ("fast web view") PDF
         
     Returns:
         bool: True if merge was successful, False otherwise
@@ -153,6 +159,8 @@ def merge_pdfs_with_bookmarks(input_files: List[str], output_path: str,
         # Write merged PDF to output file
         with open(output_path, 'wb') as output_file:
             pdf_writer.write(output_file)
+        if linearize and not linearize_pdf(output_path):
+            return False
         
         info(f"تم دمج {len(input_files)} ملفات مع الإشارات المرجعية بنجاح في {output_path}")
         return True
@@ -161,7 +169,8 @@ def merge_pdfs_with_bookmarks(input_files: List[str], output_path: str,
         error(f"خطأ في دمج ملفات PDF مع الإشارات المرجعية: {str(e)}")
         return False
 
-def merge_specific_pages(file_page_ranges: List[tuple], output_path: str) -> bool:
+def merge_specific_pages(file_page_ranges: List[tuple], output_path: str,
+                         linearize: bool = False) -> bool:
     """
     Merge specific pages from multiple PDF files.
     
@@ -170,6 +179,7 @@ def merge_specific_pages(file_page_ranges: List[tuple], output_path: str) -> boo
                                        (file_path, start_page, end_page)
                                        Page numbers are 0-based
         output_path (str): Path where the merged PDF will be saved
+        linearize (bool): Write a linearized ("fast web view") PDF
         
     Returns:
         bool: True if merge was successful, False otherwise
@@ -209,6 +219,8 @@ def merge_specific_pages(file_page_ranges: List[tuple], output_path: str) -> boo
         # Write merged PDF to output file
         with open(output_path, 'wb') as output_file:
             pdf_writer.write(output_file)
+        if linearize and not linearize_pdf(output_path):
+            return False
         
         info(f"تم دمج صفحات محددة بنجاح في {output_path}")
         return True
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+التعرف الضوئي على الحروف للملفات الممسوحة ضوئياً
+OCR - Adds an invisible, searchable text layer to scanned PDF pages
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Callable, Dict, List, Optional
+
+import fitz  # PyMuPDF
+
+from src.utils.logger import info, warning, error
+from src.utils.parallel import get_worker_count, run_in_pool, WORKER_MP_CONTEXT
+from src.utils.font_registry import font_registry
+
+# العربية والإنجليزية افتراضياً (حزم Tesseract: ara و eng)
+DEFAULT_OCR_LANGUAGE = "ara+eng"
+DEFAULT_OCR_DPI = 300
+
+OCR_FONT_NAME = "ocrfont"
+
+
+def get_ocr_cache_folder() -> str:
+    """
+    مجلد ذاكرة OCR المؤقتة داخل مجلد الإعدادات.
+    Folder holding per-document OCR results inside the settings directory.
+    """
+    from src.utils.settings import get_settings_directory
+    folder = os.path.join(get_settings_directory(), "ocr_cache")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def _cache_path(input_file: str, dpi: int, language: str) -> str:
+    """ملف الذاكرة المؤقتة للمستند: مفتاحه المسار ووقت التعديل والحجم والدقة واللغة"""
+    stat = os.stat(input_file)
+    key = f"{os.path.abspath(input_file)}|{stat.st_mtime}|{stat.st_size}|{dpi}|{language}"
+    return os.path.join(get_ocr_cache_folder(), hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jsonl")
+
+
+def _load_cache(cache_file: str) -> Dict[int, list]:
+    """تحميل نتائج الصفحات المنجزة سابقاً (سطر JSON لكل صفحة)"""
+    pages: Dict[int, list] = {}
+    if not os.path.exists(cache_file):
+        return pages
+    with open(cache_file, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                pages[int(record["page"])] = record["lines"]
+            except (ValueError, KeyError):
+                # سطر غير مكتمل من تشغيل سابق متوقف
+                continue
+    return pages
+
+
+def needs_ocr(page) -> bool:
+    """
+    الصفحة تحتاج OCR إذا لم تحتوِ نصاً وتحتوي صوراً.
+    A page needs OCR when it has no extractable text but does contain images.
+    """
+    return not page.get_text("text").strip() and bool(page.get_images())
+
+
+def _ocr_page_task(input_file: str, page_num: int, dpi: int, language: str,
+                   tessdata: Optional[str]) -> List[list]:
+    """
+    مهمة عامل: رسم الصفحة وتشغيل Tesseract عبر MuPDF.
+    Render one page and OCR it; returns text lines as [x0, y0, x1, y1, text] in the
+    page's visual coordinates.
+    """
+    with fitz.open(input_file) as doc:
+        page = doc[page_num]
+        page_rect = page.rect
+        pix = page.get_pixmap(dpi=dpi)
+
+    ocr_args = {"language": language}
+    if tessdata:
+        ocr_args["tessdata"] = tessdata
+    pdf_bytes = pix.pdfocr_tobytes(**ocr_args)
+
+    lines: Dict[tuple, list] = {}
+    with fitz.open("pdf", pdf_bytes) as ocr_doc:
+        ocr_page = ocr_doc[0]
+        scale_x = page_rect.width / ocr_page.rect.width
+        scale_y = page_rect.height / ocr_page.rect.height
+        for x0, y0, x1, y1, word, block_no, line_no, _ in ocr_page.get_text("words"):
+            key = (block_no, line_no)
+            if key not in lines:
+                lines[key] = [x0, y0, x1, y1, []]
+            line = lines[key]
+            line[0], line[1] = min(line[0], x0), min(line[1], y0)
+            line[2], line[3] = max(line[2], x1), max(line[3], y1)
+            line[4].append(word)
+
+    return [[round(x0 * scale_x, 2), round(y0 * scale_y, 2), round(x1 * scale_x, 2),
+             round(y1 * scale_y, 2), " ".join(words)]
+            for x0, y0, x1, y1, words in lines.values()]
+
+
+def _add_font_resource(page, font_xref: int) -> bool:
+    """
+    ربط خط مضمّن مسبقاً في المستند بموارد الصفحة دون قراءة ملف الخط مجدداً.
+    Returns False when the page inherits its resources from the page tree; the
+    caller then falls back to page.insert_font.
+    """
+    doc = page.parent
+    xref, path = page.xref, ""
+    for key in ("Resources", "Font"):
+        kind, value = doc.xref_get_key(xref, path + key)
+        if kind == "xref":
+            # كائن مستقل (قد تشترك فيه عدة صفحات): التعديل يتم داخله مباشرة
+            xref, path = int(value.split()[0]), ""
+        elif kind == "dict":
+            path += key + "/"
+        elif kind == "null" and key == "Font":
+            path += "Font/"
+        else:
+            return False
+    doc.xref_set_key(xref, path + OCR_FONT_NAME, f"{font_xref} 0 R")
+    return True
+
+
+def _write_text_layer(page, lines: List[list], font) -> None:
+    """
+    كتابة نص غير مرئي (render_mode=3) فوق الصورة لتمكين البحث والتحديد.
+    Each line's font size is chosen so the text spans the recognized box.
+    """
+    for x0, y0, x1, y1, text in lines:
+        if not text.strip():
+            continue
+        height = y1 - y0
+        unit_length = font.text_length(text, fontsize=1)
+        fontsize = height * 0.9
+        if unit_length > 0:
+            fontsize = min(fontsize, (x1 - x0) / unit_length)
+        if fontsize <= 0:
+            continue
+
+        # الإحداثيات مرئية: تحويلها إلى إحداثيات الصفحة غير المدورة
+        baseline = fitz.Point(x0, y1 - height * 0.2) * page.derotation_matrix
+        page.insert_text(baseline, text, fontsize=fontsize, fontname=OCR_FONT_NAME,
+                         render_mode=3, rotate=page.rotation)
+
+
+def ocr_pdf(input_file: str, output_file: str, language: str = DEFAULT_OCR_LANGUAGE,
+            dpi: int = DEFAULT_OCR_DPI, force: bool = False, use_cache: bool = True,
+            tessdata: Optional[str] = None, max_workers: Optional[int] = None,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+    """
+    إضافة طبقة نصية غير مرئية للصفحات الممسوحة ضوئياً.
+    Add an invisible OCR text layer to the image-only pages of a PDF.
+
+    Pages without extractable text are rendered at dpi and recognized with Tesseract
+    (through MuPDF) in worker processes. Results are cached per page, so re-running
+    on the same file only processes pages that were not done yet.
+
+    Args:
+        input_file (str): Path to the input PDF file
+        output_file (str): Path for the searchable output PDF (may equal input_file)
+        language (str): Tesseract languages, e.g. "ara+eng"
+        dpi (int): Render resolution used for recognition
+        force (bool): OCR every page, even pages that already contain text
+        use_cache (bool): Reuse and store page results in the settings directory
+        tessdata (Optional[str]): Tesseract tessdata folder (default: TESSDATA_PREFIX)
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        progress_callback (Optional[Callable]): Called as (processed_pages, pages_to_ocr)
+
+    Returns:
+        dict: {'success', 'pages', 'ocr_pages', 'cached_pages', 'skipped_pages',
+               'failed_pages', 'elapsed_time'}
+    """
+    results = {
+        'success': False,
+        'pages': 0,
+        'ocr_pages': 0,
+        'cached_pages': 0,
+        'skipped_pages': 0,
+        'failed_pages': 0,
+        'elapsed_time': 0.0
+    }
+    start_time = time.perf_counter()
+
+    try:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"الملف غير موجود: {input_file}")
+
+        cache_file = _cache_path(input_file, dpi, language) if use_cache else None
+        cached = _load_cache(cache_file) if cache_file else {}
+
+        doc = fitz.open(input_file)
+        try:
+            results['pages'] = len(doc)
+            targets = [page_num for page_num in range(len(doc)) if force or needs_ocr(doc[page_num])]
+            results['skipped_pages'] = len(doc) - len(targets)
+
+            pending = [page_num for page_num in targets if page_num not in cached]
+            results['cached_pages'] = len(targets) - len(pending)
+            info(f"OCR: {len(targets)} صفحة تحتاج تعرفاً ضوئياً ({results['cached_pages']} من الذاكرة المؤقتة)")
+
+            page_lines = {page_num: cached[page_num] for page_num in targets if page_num in cached}
+            workers = get_worker_count(max_workers, len(pending))
+            tasks = [(input_file, page_num, dpi, language, tessdata) for page_num in pending]
+
+            processed = results['cached_pages']
+            cache_handle = open(cache_file, "a", encoding="utf-8") if cache_file else None
+            try:
+                for index, lines, exc in run_in_pool(_ocr_page_task, tasks, workers,
+                                                     mp_context=WORKER_MP_CONTEXT):
+                    page_num = pending[index]
+                    processed += 1
+                    if exc is not None:
+                        warning(f"فشل OCR للصفحة {page_num + 1}: {exc}")
+                        results['failed_pages'] += 1
+                    else:
+                        page_lines[page_num] = lines
+                        results['ocr_pages'] += 1
+                        if cache_handle:
+                            cache_handle.write(json.dumps({"page": page_num, "lines": lines},
+                                                          ensure_ascii=False) + "\n")
+                            cache_handle.flush()
+                    if progress_callback:
+                        progress_callback(processed, len(targets))
+            finally:
+                if cache_handle:
+                    cache_handle.close()
+
+            if targets and not page_lines:
+                raise RuntimeError("فشل التعرف الضوئي على كل الصفحات (تحقق من تثبيت Tesseract وحزم اللغات)")
+
+            # خط يدعم العربية للطبقة النصية
+            font_path = font_registry.find_arabic_font()
+            if font_path:
+                font = fitz.Font(fontfile=font_path)
+            else:
+                warning("لم يتم العثور على خط يدعم العربية للطبقة النصية")
+                font = fitz.Font("helv")
+
+            # الخط يُضمَّن مرة واحدة ثم تُربط به باقي الصفحات
+            font_xref = 0
+            for page_num, lines in sorted(page_lines.items()):
+                page = doc[page_num]
+                if not font_xref:
+                    font_xref = page.insert_font(fontname=OCR_FONT_NAME, fontbuffer=font.buffer)
+                elif not _add_font_resource(page, font_xref):
+                    page.insert_font(fontname=OCR_FONT_NAME, fontbuffer=font.buffer)
+                _write_text_layer(page, lines, font)
+
+            try:
+                doc.subset_fonts()
+            except Exception as e:
+                warning(f"تعذر تقليص الخط المضمّن: {e}")
+
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            # الحفظ في ملف مؤقت ثم الاستبدال (يسمح بالكتابة فوق الملف الأصلي)
+            temp_path = output_file + ".tmp"
+            doc.save(temp_path, garbage=3, deflate=True)
+        finally:
+            doc.close()
+        os.replace(temp_path, output_file)
+
+        results['success'] = True
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"OCR: {results['ocr_pages']} صفحة جديدة، {results['cached_pages']} من الذاكرة المؤقتة، "
+             f"{results['failed_pages']} فشل خلال {results['elapsed_time']} ثانية")
+        return results
+
+    except Exception as e:
+        error(f"خطأ في التعرف الضوئي: {str(e)}")
+        if os.path.exists(output_file + ".tmp"):
+            os.remove(output_file + ".tmp")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        return results
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""
+خيارات إخراج PDF: الخطية (العرض السريع على الويب) و PDF/A
+PDF Output Options - linearized ("fast web view") output and PDF/A conversion
+"""
+
+import os
+import re
+import shutil
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+from xml.sax.saxutils import escape
+
+from src.utils.logger import info, warning, error
+
+# عدد البايتات التي يُبحث فيها عن قاموس الخطية في بداية الملف
+_LINEARIZATION_PROBE_BYTES = 2048
+
+# أسماء Windows الشائعة للخطوط القياسية
+_STANDARD_FONT_ALIASES = {
+    "arial": "helvetica",
+    "arialmt": "helvetica",
+    "timesnewroman": "times",
+    "timesnewromanps": "times",
+    "timesnewromanpsmt": "times",
+    "couriernew": "courier",
+    "couriernewpsmt": "courier",
+}
+
+# تاريخ قاموس المعلومات: D:YYYYMMDDHHmmSS متبوعاً بالمنطقة الزمنية (كل ما بعد السنة اختياري)
+_PDF_DATE_PATTERN = re.compile(
+    r"^(?:D:)?(\d{4})(\d{2})?(\d{2})?(\d{2})?(\d{2})?(\d{2})?"
+    r"(?:(Z)|([+-])(\d{2})'?(\d{2})?'?)?"
+)
+
+
+def is_linearized(file_path: str) -> bool:
+    """
+    هل الملف خطي؟ (قاموس /Linearized يجب أن يكون أول كائن في الملف)
+    Check whether a PDF is linearized.
+    """
+    try:
+        with open(file_path, "rb") as f:
+            return b"/Linearized" in f.read(_LINEARIZATION_PROBE_BYTES)
+    except OSError:
+        return False
+
+
+def _linearize_with_pikepdf(input_path: str, output_path: str) -> bool:
+    """pikepdf (qpdf) - مكتبة من المتطلبات"""
+    try:
+        import pikepdf
+    except ImportError:
+        return False
+    with pikepdf.open(input_path) as pdf:
+        pdf.save(output_path, linearize=True)
+    return is_linearized(output_path)
+
+
+def _linearize_with_qpdf(input_path: str, output_path: str) -> bool:
+    """أداة qpdf من سطر الأوامر إن كانت متوفرة"""
+    qpdf = shutil.which("qpdf")
+    if not qpdf:
+        return False
+    # رمز الخروج 3 يعني نجاح مع تحذيرات
+    completed = subprocess.run([qpdf, "--linearize", input_path, output_path],
+                               capture_output=True, check=False)
+    return completed.returncode in (0, 3) and is_linearized(output_path)
+
+
+def linearize_pdf(input_path: str, output_path: Optional[str] = None) -> bool:
+    """
+    كتابة نسخة خطية من الملف تسمح بعرض الصفحة الأولى قبل اكتمال التحميل.
+    Write a linearized copy of a PDF (in place when output_path is None).
+
+    Uses pikepdf, with the qpdf command line tool as a fallback (PyMuPDF no
+    longer supports linearization). If neither is available the file is left
+    unchanged, an error is logged and False is returned so the caller can
+    report the failure.
+
+    Returns:
+        bool: True if the output is linearized
+    """
+    output_path = output_path or input_path
+    temp_path = output_path + ".linear.tmp"
+    try:
+        for method in (_linearize_with_pikepdf, _linearize_with_qpdf):
+            try:
+                if method(input_path, temp_path):
+                    os.replace(temp_path, output_path)
+                    info(f"تم حفظ ملف خطي (عرض سريع على الويب): {output_path}")
+                    return True
+            except Exception as e:
+                warning(f"تعذرت الخطية عبر {method.__name__}: {e}")
+
+        error(f"لا تتوفر أداة لإنشاء ملف خطي (ثبّت pikepdf)، تم حفظ الملف بدون خطية: {output_path}")
+        if output_path != input_path:
+            shutil.copyfile(input_path, output_path)
+        return False
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _pdf_date(moment: datetime) -> str:
+    """تاريخ بصيغة قاموس المعلومات في PDF"""
+    return moment.strftime("D:%Y%m%d%H%M%S+00'00'")
+
+
+def _xmp_date(moment: datetime) -> str:
+    """تاريخ بصيغة XMP (ISO 8601)"""
+    return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _pdf_date_to_xmp(value: str) -> Optional[str]:
+    """
+    تحويل تاريخ قاموس المعلومات إلى نفس اللحظة بصيغة XMP، أو None إذا كان غير صالح.
+    Keeps the original timezone offset so both dates describe the same instant.
+    """
+    match = _PDF_DATE_PATTERN.match((value or "").strip())
+    if not match:
+        return None
+    year, month, day, hour, minute, second, utc, sign, tz_hour, tz_minute = match.groups()
+    try:
+        datetime(int(year), int(month or 1), int(day or 1),
+                 int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        return None
+    result = f"{year}-{month or '01'}-{day or '01'}T{hour or '00'}:{minute or '00'}:{second or '00'}"
+    if utc:
+        result += "Z"
+    elif sign:
+        result += f"{sign}{tz_hour}:{tz_minute or '00'}"
+    return result
+
+
+def _build_pdfa_xmp(metadata: dict, part: int, conformance: str,
+                    create_date: str, modify_date: str) -> str:
+    """إنشاء بيانات XMP مع معرف PDF/A ومطابقتها لقاموس المعلومات"""
+    title = escape(metadata.get("title") or "")
+    author = escape(metadata.get("author") or "")
+    subject = escape(metadata.get("subject") or "")
+    keywords = escape(metadata.get("keywords") or "")
+    producer = escape(metadata.get("producer") or "")
+    creator = escape(metadata.get("creator") or "ApexFlow")
+    return f"""<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>
+<x:xmpmeta xmlns:x="adobe:ns:meta/">
+ <rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <rdf:Description rdf:about=""
+    xmlns:pdfaid="http://www.aiim.org/pdfa/ns/id/"
+    xmlns:dc="http://purl.org/dc/elements/1.1/"
+    xmlns:xmp="http://ns.adobe.com/xap/1.0/"
+    xmlns:pdf="http://ns.adobe.com/pdf/1.3/">
+   <pdfaid:part>{part}</pdfaid:part>
+   <pdfaid:conformance>{conformance}</pdfaid:conformance>
+   <dc:format>application/pdf</dc:format>
+   <dc:title><rdf:Alt><rdf:li xml:lang="x-default">{title}</rdf:li></rdf:Alt></dc:title>
+   <dc:creator><rdf:Seq><rdf:li>{author}</rdf:li></rdf:Seq></dc:creator>
+   <dc:description><rdf:Alt><rdf:li xml:lang="x-default">{subject}</rdf:li></rdf:Alt></dc:description>
+   <pdf:Keywords>{keywords}</pdf:Keywords>
+   <pdf:Producer>{producer}</pdf:Producer>
+   <xmp:CreatorTool>{creator}</xmp:CreatorTool>
+   <xmp:CreateDate>{create_date}</xmp:CreateDate>
+   <xmp:ModifyDate>{modify_date}</xmp:ModifyDate>
+  </rdf:Description>
+ </rdf:RDF>
+</x:xmpmeta>
+<?xpacket end="w"?>"""
+
+
+def _add_srgb_output_intent(doc) -> bool:
+    """إضافة OutputIntent بملف ألوان sRGB (يتطلب Pillow مع ImageCms)"""
+    try:
+        from PIL import ImageCms
+        icc_profile = ImageCms.ImageCmsProfile(ImageCms.createProfile("sRGB")).tobytes()
+    except Exception as e:
+        warning(f"تعذر إنشاء ملف ألوان sRGB: {e}")
+        return False
+
+    icc_xref = doc.get_new_xref()
+    doc.update_object(icc_xref, "<< /N 3 >>")
+    doc.update_stream(icc_xref, icc_profile)
+
+    intent_xref = doc.get_new_xref()
+    doc.update_object(
+        intent_xref,
+        "<< /Type /OutputIntent /S /GTS_PDFA1 "
+        "/OutputConditionIdentifier (sRGB IEC61966-2.1) /Info (sRGB IEC61966-2.1) "
+        f"/DestOutputProfile {icc_xref} 0 R >>"
+    )
+    doc.xref_set_key(doc.pdf_catalog(), "OutputIntents", f"[{intent_xref} 0 R]")
+    return True
+
+
+def _standard_font_name(basefont: str) -> Optional[str]:
+    """
+    اسم الخط القياسي (من الخطوط الأربعة عشر) المقابل لاسم الخط، أو None.
+    Maps standard 14 names and their common Windows aliases (Arial,BoldItalic ...).
+    """
+    name = basefont.split("+", 1)[-1].replace(",", "-")
+    family, _, style = name.partition("-")
+    family = _STANDARD_FONT_ALIASES.get(family.lower(), family.lower())
+    if family in ("symbol", "zapfdingbats"):
+        return family
+    bold = "bold" in style.lower()
+    italic = "italic" in style.lower() or "oblique" in style.lower()
+    if family == "times":
+        suffix = ("bold" if bold else "") + ("italic" if italic else "")
+        return f"times-{suffix or 'roman'}"
+    if family in ("helvetica", "courier"):
+        suffix = ("bold" if bold else "") + ("oblique" if italic else "")
+        return f"{family}-{suffix}" if suffix else family
+    return None
+
+
+def _embed_standard_font(doc, font_xref: int, basefont: str) -> bool:
+    """
+    تضمين نسخة MuPDF المدمجة من خط قياسي غير مضمن (FontFile3/Type1C).
+    Embed MuPDF's built-in replacement for a non-embedded standard 14 font.
+    """
+    import fitz  # PyMuPDF
+
+    name = _standard_font_name(basefont)
+    if name is None:
+        return False
+    font = fitz.Font(fontname=fitz.Base14_fontdict[name])
+    symbolic = name in ("symbol", "zapfdingbats")
+    italic = name.endswith(("italic", "oblique"))
+
+    file_xref = doc.get_new_xref()
+    doc.update_object(file_xref, "<< /Subtype /Type1C >>")
+    doc.update_stream(file_xref, font.buffer)
+
+    flags = 4 if symbolic else 32
+    if name.startswith("courier"):
+        flags |= 1
+    if name.startswith("times"):
+        flags |= 2
+    if italic:
+        flags |= 64
+    bbox = " ".join(str(round(value * 1000)) for value in tuple(fitz.Rect(font.bbox)))
+    ascent = round(font.ascender * 1000)
+    font_name = doc.xref_get_key(font_xref, "BaseFont")[1]
+    descriptor_xref = doc.get_new_xref()
+    doc.update_object(
+        descriptor_xref,
+        f"<< /Type /FontDescriptor /FontName {font_name} /Flags {flags} /FontBBox [{bbox}] "
+        f"/ItalicAngle {-12 if italic else 0} /Ascent {ascent} "
+        f"/Descent {round(font.descender * 1000)} /CapHeight {ascent} /StemV 80 "
+        f"/FontFile3 {file_xref} 0 R >>"
+    )
+
+    # خط Type1C لا يصلح مع نوع TrueType في قاموس الخط
+    doc.xref_set_key(font_xref, "Subtype", "/Type1")
+    doc.xref_set_key(font_xref, "FontDescriptor", f"{descriptor_xref} 0 R")
+    if not symbolic and doc.xref_get_key(font_xref, "Widths")[0] == "null":
+        widths = []
+        for code in range(32, 256):
+            try:
+                char = bytes([code]).decode("cp1252")
+            except UnicodeDecodeError:
+                widths.append("0")
+                continue
+            widths.append(str(round(font.glyph_advance(ord(char)) * 1000)))
+        doc.xref_set_key(font_xref, "FirstChar", "32")
+        doc.xref_set_key(font_xref, "LastChar", "255")
+        doc.xref_set_key(font_xref, "Widths", f"[{' '.join(widths)}]")
+    return True
+
+
+def _embed_missing_fonts(doc) -> list:
+    """
+    تضمين الخطوط القياسية غير المضمنة وإرجاع أسماء الخطوط التي بقيت غير مضمنة
+    (PDF/A يتطلب تضمين كل الخطوط).
+    """
+    seen = set()
+    missing = []
+    for page_num in range(len(doc)):
+        for font in doc.get_page_fonts(page_num):
+            xref, ext, font_type, basefont = font[0], font[1], font[2], font[3]
+            if xref in seen:
+                continue
+            seen.add(xref)
+            # خطوط Type3 معرّفة داخل الملف ولا تحتاج تضمين
+            if ext != "n/a" or font_type == "Type3":
+                continue
+            # الخطوط المركبة (Type0) وغير القياسية لا يمكن استبدالها تلقائياً
+            if font_type in ("Type1", "MMType1", "TrueType") and _embed_standard_font(doc, xref, basefont):
+                continue
+            missing.append(basefont)
+    return sorted(set(missing))
+
+
+def convert_to_pdfa(input_file: str, output_file: str, password: Optional[str] = None,
+                    part: int = 2, conformance: str = "B") -> dict:
+    """
+    تحويل ملف إلى مخرجات متوافقة مع PDF/A (أفضل جهد).
+    Best-effort PDF/A-compatible conversion.
+
+    Removes encryption, writes XMP metadata with the pdfaid identification (kept in
+    sync with the document info dictionary, including the original creation date)
+    and adds an sRGB output intent. Non-embedded standard fonts (Helvetica, Times,
+    Courier and their Arial/Times New Roman/Courier New aliases) are embedded from
+    MuPDF's built-in copies; any other non-embedded font cannot be fixed
+    automatically: the file is still written but 'compliant' is False and the fonts
+    are listed. Even a compliant result should be checked with a validator such as
+    veraPDF before archiving.
+
+    Args:
+        input_file (str): Path to the input PDF file
+        output_file (str): Path for the PDF/A output
+        password (Optional[str]): Password for encrypted input files
+        part (int): PDF/A part (1, 2 or 3)
+        conformance (str): Conformance level ("A", "B" or "U")
+
+    Returns:
+        dict: {'success', 'compliant', 'output_file', 'encryption_removed',
+               'output_intent', 'non_embedded_fonts', 'warnings'}
+               ('success' means the file was written, 'compliant' that no known
+               PDF/A violation remains)
+    """
+    report = {
+        'success': False,
+        'compliant': False,
+        'output_file': output_file,
+        'encryption_removed': False,
+        'output_intent': False,
+        'non_embedded_fonts': [],
+        'warnings': []
+    }
+
+    try:
+        import fitz  # PyMuPDF
+
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"الملف غير موجود: {input_file}")
+
+        doc = fitz.open(input_file)
+        try:
+            if doc.needs_pass:
+                if not password or not doc.authenticate(password):
+                    raise ValueError("الملف مشفر ويتطلب كلمة مرور صحيحة")
+            report['encryption_removed'] = bool((doc.metadata or {}).get("encryption"))
+
+            moment = datetime.now(timezone.utc)
+            metadata = dict(doc.metadata or {})
+            metadata["creator"] = metadata.get("creator") or "ApexFlow"
+            metadata["producer"] = metadata.get("producer") or "ApexFlow"
+            metadata["modDate"] = _pdf_date(moment)
+            # تاريخ الإنشاء الأصلي يُحفظ في الموضعين؛ إذا كان مفقوداً أو تالفاً يُستبدل بالحالي
+            create_date = _pdf_date_to_xmp(metadata.get("creationDate"))
+            if create_date is None:
+                metadata["creationDate"] = _pdf_date(moment)
+                create_date = _xmp_date(moment)
+            doc.set_metadata({key: value for key, value in metadata.items()
+                              if key in ("title", "author", "subject", "keywords", "creator",
+                                         "producer", "creationDate", "modDate")})
+            doc.set_xml_metadata(_build_pdfa_xmp(metadata, part, conformance.upper(),
+                                                 create_date, _xmp_date(moment)))
+
+            report['output_intent'] = _add_srgb_output_intent(doc)
+            if not report['output_intent']:
+                report['warnings'].append("لم تتم إضافة OutputIntent (ملف ألوان sRGB)")
+
+            report['non_embedded_fonts'] = _embed_missing_fonts(doc)
+            if report['non_embedded_fonts']:
+                report['warnings'].append(
+                    f"خطوط غير مضمنة: {', '.join(report['non_embedded_fonts'])}"
+                )
+
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            temp_path = output_file + ".tmp"
+            doc.save(temp_path, garbage=3, deflate=True, encryption=fitz.PDF_ENCRYPT_NONE)
+        finally:
+            doc.close()
+        os.replace(temp_path, output_file)
+
+        report['success'] = True
+        report['compliant'] = report['output_intent'] and not report['non_embedded_fonts']
+        for message in report['warnings']:
+            warning(f"PDF/A: {message}")
+        if report['compliant']:
+            info(f"تم إنشاء ملف متوافق مع PDF/A-{part}{conformance.lower()}: {output_file}")
+        else:
+            warning(f"تم إنشاء الملف لكنه غير متوافق مع PDF/A-{part}{conformance.lower()}: {output_file}")
+        return report
+
+    except Exception as e:
+        error(f"خطأ في التحويل إلى PDF/A: {str(e)}")
+        report['warnings'].append(str(e))
+        return report
@@ -5,9 +5,11 @@ This module provides functionality to rotate PDF pages.
 """
 
 import os
+import time
 from pypdf import PdfReader, PdfWriter
-from typing import List, Optional, Union
+from typing import Callable, List, Optional, Tuple, Union
 from src.utils.logger import info, warning, error
+from src.utils.parallel import collect_files, run_in_pool
 
 def rotate_pdf(input_file: str, output_file: str, rotation_angle: int = 90) -> bool:
     """
@@ -285,25 +287,43 @@ def get_page_orientations(input_file: str) -> List[dict]:
         error(f"خطأ في قراءة اتجاهات الصفحات: {str(e)}")
         return []
 
-def batch_rotate(input_folder: str, output_folder: str, rotation_angle: int = 90) -> dict:
+def _rotate_file_task(input_path: str, output_path: str, rotation_angle: int) -> Tuple[bool, float]:
     """
-    Rotate multiple PDF files in a folder.
-    تدوير عدة ملفات PDF في مجلد
+    مهمة تدوير ملف واحد داخل عامل منفصل.
+    Rotate a single file inside a pool worker and report the elapsed time.
+    """
+    start_time = time.perf_counter()
+    success = rotate_pdf(input_path, output_path, rotation_angle)
+    return success, time.perf_counter() - start_time
+
+def batch_rotate(input_folder: str, output_folder: str, rotation_angle: int = 90,
+                 max_workers: Optional[int] = None, recursive: bool = False,
+                 patterns: Optional[List[str]] = None,
+                 progress_callback: Optional[Callable[[int, int, dict], None]] = None) -> dict:
+    """
+    Rotate multiple PDF files in a folder using a pool of worker processes.
+    تدوير عدة ملفات PDF في مجلد باستخدام مجموعة عمليات متوازية
     
     Args:
         input_folder (str): Path to folder containing PDF files
         output_folder (str): Path to folder for rotated files
         rotation_angle (int): Rotation angle in degrees
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        recursive (bool): Traverse sub-folders, mirroring them in the output folder
+        patterns (Optional[List[str]]): Glob filters for file names (default: ["*.pdf"])
+        progress_callback (Optional[Callable]): Called as (done, total, file_result) after each file
         
     Returns:
-        Dictionary containing rotation results
+        Dictionary containing rotation results and timing
     """
     results = {
         'processed': 0,
         'successful': 0,
         'failed': 0,
-        'files': []
+        'files': [],
+        'elapsed_time': 0.0
     }
+    start_time = time.perf_counter()
     
     try:
         if not os.path.exists(input_folder):
@@ -313,38 +333,51 @@ def batch_rotate(input_folder: str, output_folder: str, rotation_angle: int = 90
             os.makedirs(output_folder)
         
         # البحث عن ملفات PDF
-        pdf_files = [f for f in os.listdir(input_folder) 
-                    if f.lower().endswith('.pdf')]
-        
-        info(f"تدوير {len(pdf_files)} ملف PDF بزاوية {rotation_angle} درجة")
-        
-        for filename in pdf_files:
-            input_path = os.path.join(input_folder, filename)
-            output_path = os.path.join(output_folder, f"rotated_{filename}")
+        pdf_files = collect_files(input_folder, patterns or ["*.pdf"], recursive)
+        total_files = len(pdf_files)
+        
+        info(f"تدوير {total_files} ملف PDF بزاوية {rotation_angle} درجة")
+        
+        tasks = []
+        for input_path in pdf_files:
+            relative_path = os.path.relpath(input_path, input_folder)
+            relative_dir, filename = os.path.split(relative_path)
+            target_dir = os.path.join(output_folder, relative_dir)
+            os.makedirs(target_dir, exist_ok=True)
+            tasks.append((input_path, os.path.join(target_dir, f"rotated_{filename}"), rotation_angle))
+        
+        file_results = [None] * total_files
+        for index, outcome, exc in run_in_pool(_rotate_file_task, tasks, max_workers):
+            success, duration = outcome if exc is None else (False, 0.0)
+            if exc is not None:
+                error(f"خطأ في تدوير {tasks[index][0]}: {exc}")
             
-            results['processed'] += 1
-            info(f"معالجة: {filename}")
+            file_result = {
+                'filename': os.path.relpath(tasks[index][0], input_folder),
+                'status': 'نجح' if success else 'فشل',
+                'rotation_angle': rotation_angle,
+                'duration': round(duration, 3)
+            }
+            file_results[index] = file_result
             
-            if rotate_pdf(input_path, output_path, rotation_angle):
+            results['processed'] += 1
+            if success:
                 results['successful'] += 1
-                results['files'].append({
-                    'filename': filename,
-                    'status': 'نجح',
-                    'rotation_angle': rotation_angle
-                })
             else:
                 results['failed'] += 1
-                results['files'].append({
-                    'filename': filename,
-                    'status': 'فشل',
-                    'rotation_angle': rotation_angle
-                })
+            
+            info(f"معالجة: {file_result['filename']} ({results['processed']}/{total_files})")
+            if progress_callback:
+                progress_callback(results['processed'], total_files, file_result)
         
-        info(f"\nالنتائج: {results['successful']} نجح، {results['failed']} فشل")
+        results['files'] = [r for r in file_results if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"\nالنتائج: {results['successful']} نجح، {results['failed']} فشل خلال {results['elapsed_time']} ثانية")
         return results
         
     except Exception as e:
         error(f"خطأ في التدوير المجمع: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
         return results
 
 # مثال على الاستخدام
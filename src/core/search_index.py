@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+فهرس البحث النصي الكامل لملفات PDF
+Full-Text Search Index - SQLite FTS5 index over PDF text, updated incrementally
+"""
+
+import os
+import time
+import sqlite3
+import unicodedata
+from typing import Callable, Dict, List, Optional, Sequence, Union
+
+import fitz  # PyMuPDF
+
+from src.utils.logger import info, warning, error
+from src.utils.parallel import collect_files, run_in_pool
+
+INDEX_FILENAME = "search_index.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    page_count INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    first_rowid INTEGER,
+    last_rowid INTEGER
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    content,
+    doc_id UNINDEXED,
+    page UNINDEXED,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+def get_default_index_path() -> str:
+    """
+    مسار قاعدة بيانات الفهرس داخل مجلد الإعدادات.
+    Path of the index database inside the settings directory.
+    """
+    from src.utils.settings import get_settings_directory
+    return os.path.join(get_settings_directory(), INDEX_FILENAME)
+
+
+def _file_signature(path: str) -> tuple:
+    """توقيع الملف المستخدم لاكتشاف التغييرات: (وقت التعديل، الحجم)"""
+    stat = os.stat(path)
+    return stat.st_mtime, stat.st_size
+
+
+def _extract_document_text(path: str) -> tuple:
+    """
+    مهمة عامل: استخراج نص كل صفحات الملف.
+    Extract the text of every page; returns (mtime, size, [page_text, ...]).
+    """
+    mtime, size = _file_signature(path)
+    with fitz.open(path) as doc:
+        if doc.needs_pass:
+            raise ValueError("الملف محمي بكلمة مرور")
+        texts = [page.get_text("text") for page in doc]
+    return mtime, size, texts
+
+
+def _normalize_text(text: str) -> str:
+    """
+    توحيد النص قبل الفهرسة والبحث (NFKC).
+    Arabic text usually extracts from PDFs as presentation forms (U+FExx, e.g. "ﻣﺮﺣﺒﺎ");
+    NFKC maps them back to the base letters typed in a query ("مرحبا").
+    """
+    return unicodedata.normalize("NFKC", text)
+
+
+def _build_match_expression(query: str) -> str:
+    """
+    تحويل نص البحث إلى تعبير FTS5 آمن: كل كلمة تُعامل كعبارة حرفية ويجب وجود كل الكلمات.
+    Quote every term so user input can never be parsed as FTS5 syntax.
+    """
+    terms = [term.replace('"', '""') for term in _normalize_text(query).split()]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+
+class SearchIndex:
+    """
+    فهرس بحث نصي كامل لملفات PDF مبني على SQLite FTS5.
+
+    Every document is keyed by its absolute path and (mtime, size); re-indexing only
+    extracts files that are new or changed since the last run.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or get_default_index_path()
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.connection = sqlite3.connect(self.db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self.connection.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            self.connection.close()
+            raise RuntimeError(f"مكتبة SQLite لا تدعم FTS5: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """إغلاق الاتصال بقاعدة البيانات"""
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def _indexed_signatures(self) -> Dict[str, tuple]:
+        """توقيعات الملفات المفهرسة حالياً {path: (mtime, size)}"""
+        rows = self.connection.execute("SELECT path, mtime, size FROM documents")
+        return {path: (mtime, size) for path, mtime, size in rows}
+
+    def _delete_document(self, path: str) -> None:
+        """
+        حذف ملف وصفحاته من الفهرس (داخل المعاملة الحالية).
+
+        doc_id is UNINDEXED in the FTS table, so filtering on it scans every page of
+        every document; pages are deleted by their stored rowid range instead.
+        """
+        row = self.connection.execute(
+            "SELECT id, first_rowid, last_rowid FROM documents WHERE path = ?", (path,)
+        ).fetchone()
+        if not row:
+            return
+        doc_id, first_rowid, last_rowid = row
+        if first_rowid is not None:
+            self.connection.execute("DELETE FROM pages WHERE rowid BETWEEN ? AND ?",
+                                    (first_rowid, last_rowid))
+        self.connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+    def _store_document(self, path: str, mtime: float, size: int, texts: List[str]) -> None:
+        """استبدال بيانات ملف في الفهرس بمعاملة واحدة"""
+        pages = [(page_num + 1, _normalize_text(text)) for page_num, text in enumerate(texts) if text.strip()]
+        with self.connection:
+            self._delete_document(path)
+            # صفحات الملف تأخذ نطاق rowid متصلاً بعد آخر صف ليُحذف لاحقاً بنطاق
+            last = self.connection.execute("SELECT MAX(rowid) FROM pages").fetchone()[0] or 0
+            # ملف بلا نص لا يملك صفوفاً: النطاق NULL
+            first_rowid = last + 1 if pages else None
+            last_rowid = last + len(pages) if pages else None
+            cursor = self.connection.execute(
+                "INSERT INTO documents (path, mtime, size, page_count, indexed_at, first_rowid, last_rowid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, mtime, size, len(texts), time.time(), first_rowid, last_rowid)
+            )
+            doc_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO pages (rowid, content, doc_id, page) VALUES (?, ?, ?, ?)",
+                ((last + offset, text, doc_id, page) for offset, (page, text) in enumerate(pages, 1))
+            )
+
+    def index_files(self, inputs: Union[str, Sequence[str]], recursive: bool = True,
+                    patterns: Optional[List[str]] = None, max_workers: Optional[int] = None,
+                    progress_callback: Optional[Callable[[int, int, str], None]] = None) -> dict:
+        """
+        فهرسة مجلد أو قائمة ملفات بشكل تزايدي.
+        Index a folder or list of PDFs, extracting only new or changed files.
+
+        When inputs is a folder, documents previously indexed under it that no longer
+        exist are removed from the index.
+
+        Args:
+            inputs: Folder path or list of PDF file paths
+            recursive (bool): Traverse sub-folders when inputs is a folder
+            patterns (Optional[List[str]]): Glob filters for file names (default: ["*.pdf"])
+            max_workers (Optional[int]): Concurrency limit for text extraction
+            progress_callback (Optional[Callable]): Called as (done, total, path) after each file
+
+        Returns:
+            dict: {'indexed', 'skipped', 'removed', 'failed', 'elapsed_time'}
+        """
+        results = {'indexed': 0, 'skipped': 0, 'removed': 0, 'failed': 0, 'elapsed_time': 0.0}
+        start_time = time.perf_counter()
+
+        if isinstance(inputs, str):
+            if not os.path.isdir(inputs):
+                raise FileNotFoundError(f"المجلد غير موجود: {inputs}")
+            folder = os.path.abspath(inputs)
+            files = [os.path.abspath(f) for f in collect_files(folder, patterns or ["*.pdf"], recursive)]
+        else:
+            folder = None
+            files = [os.path.abspath(f) for f in inputs if os.path.isfile(f)]
+
+        indexed = self._indexed_signatures()
+
+        # حذف الملفات التي لم تعد موجودة داخل المجلد المفهرس
+        if folder:
+            prefix = os.path.join(folder, "")
+            current = set(files)
+            stale = [path for path in indexed
+                     if path.startswith(prefix) and path not in current and not os.path.exists(path)]
+            with self.connection:
+                for path in stale:
+                    self._delete_document(path)
+            results['removed'] = len(stale)
+
+        changed = []
+        for path in files:
+            try:
+                if indexed.get(path) == _file_signature(path):
+                    results['skipped'] += 1
+                else:
+                    changed.append(path)
+            except OSError:
+                results['failed'] += 1
+
+        info(f"فهرسة {len(changed)} ملف (تم تخطي {results['skipped']} ملف بدون تغيير)")
+
+        done = 0
+        for index, outcome, exc in run_in_pool(_extract_document_text, [(p,) for p in changed], max_workers):
+            path = changed[index]
+            done += 1
+            if exc is not None:
+                warning(f"تعذرت فهرسة {path}: {exc}")
+                results['failed'] += 1
+            else:
+                try:
+                    mtime, size, texts = outcome
+                    self._store_document(path, mtime, size, texts)
+                    results['indexed'] += 1
+                except sqlite3.Error as e:
+                    error(f"خطأ في حفظ فهرس {path}: {e}")
+                    results['failed'] += 1
+
+            if progress_callback:
+                progress_callback(done, len(changed), path)
+
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"الفهرسة: {results['indexed']} مفهرس، {results['skipped']} بدون تغيير، "
+             f"{results['removed']} محذوف، {results['failed']} فشل خلال {results['elapsed_time']} ثانية")
+        return results
+
+    def remove(self, path: str) -> None:
+        """حذف ملف من الفهرس"""
+        with self.connection:
+            self._delete_document(os.path.abspath(path))
+
+    def prune(self) -> int:
+        """
+        حذف كل الملفات المفهرسة التي لم تعد موجودة على القرص.
+        Remove every indexed document whose file no longer exists.
+        """
+        missing = [path for path in self._indexed_signatures() if not os.path.exists(path)]
+        with self.connection:
+            for path in missing:
+                self._delete_document(path)
+        return len(missing)
+
+    def search(self, query: str, limit: int = 50, path_prefix: Optional[str] = None,
+               raw: bool = False) -> List[dict]:
+        """
+        البحث في الفهرس.
+        Search the index and return page hits ranked by relevance.
+
+        Args:
+            query (str): Words to search for (all must appear on the page)
+            limit (int): Maximum number of hits
+            path_prefix (Optional[str]): Only return files under this folder
+            raw (bool): Pass query to FTS5 without quoting (allows OR, NEAR, prefix* ...)
+
+        Returns:
+            List[dict]: [{'path', 'page', 'snippet', 'rank'}, ...]
+        """
+        expression = _normalize_text(query) if raw else _build_match_expression(query)
+        if not expression.strip():
+            return []
+
+        sql = (
+            "SELECT d.path, p.page, snippet(pages, 0, '[', ']', '…', 12), bm25(pages) "
+            "FROM pages p JOIN documents d ON d.id = p.doc_id "
+            "WHERE pages MATCH ?"
+        )
+        params: list = [expression]
+        if path_prefix:
+            sql += " AND d.path LIKE ? ESCAPE '\\'"
+            prefix = os.path.join(os.path.abspath(path_prefix), "")
+            params.append(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        sql += " ORDER BY bm25(pages) LIMIT ?"
+        params.append(int(limit))
+
+        try:
+            rows = self.connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            warning(f"تعبير بحث غير صالح '{query}': {e}")
+            return []
+
+        return [{'path': path, 'page': int(page), 'snippet': snippet, 'rank': round(rank, 4)}
+                for path, page, snippet, rank in rows]
+
+    def get_stats(self) -> dict:
+        """إحصائيات الفهرس: عدد الملفات والصفحات وحجم قاعدة البيانات"""
+        documents, pages = self.connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(page_count), 0) FROM documents"
+        ).fetchone()
+        return {
+            'documents': documents,
+            'pages': pages,
+            'size_bytes': os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        }
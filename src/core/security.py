@@ -4,8 +4,42 @@
 وحدة حماية وخصائص ملفات PDF
 """
 
-from pypdf import PdfReader, PdfWriter
-from src.utils.logger import info, error
+import os
+import re
+import csv
+import json
+import time
+import shutil
+import secrets
+import threading
+import multiprocessing
+from xml.sax.saxutils import escape
+
+import fitz  # PyMuPDF
+from pypdf import PdfReader
+from src.utils.logger import info, warning, error
+from src.utils.parallel import collect_files, get_worker_count, run_in_pool, unique_output_path
+
+# أذونات PDF المدعومة وأعلام PyMuPDF المقابلة لها (المفاتيح غير المحددة تعتبر مسموحة)
+PERMISSION_FLAGS = {
+    'print': fitz.PDF_PERM_PRINT | fitz.PDF_PERM_PRINT_HQ,
+    'print_high_quality': fitz.PDF_PERM_PRINT_HQ,
+    'copy': fitz.PDF_PERM_COPY,
+    'modify': fitz.PDF_PERM_MODIFY,
+    'annotate': fitz.PDF_PERM_ANNOTATE,
+    'fill_forms': fitz.PDF_PERM_FORM,
+    'assemble': fitz.PDF_PERM_ASSEMBLE,
+}
+
+# عدد الكلمات المجربة بين كل فحص لعلم التوقف المشترك بين العمليات
+_STOP_CHECK_INTERVAL = 8
+
+ALL_PERMISSIONS = (
+    fitz.PDF_PERM_PRINT | fitz.PDF_PERM_PRINT_HQ | fitz.PDF_PERM_COPY | fitz.PDF_PERM_MODIFY
+    | fitz.PDF_PERM_ANNOTATE | fitz.PDF_PERM_FORM | fitz.PDF_PERM_ASSEMBLE
+    | fitz.PDF_PERM_ACCESSIBILITY
+)
+
 
 def get_pdf_metadata(file_path, password=None):
     """
@@ -51,52 +85,290 @@ def get_pdf_metadata(file_path, password=None):
         error(f"فشل في قراءة بيانات التعريف من {file_path}: {e}")
         return None
 
-def update_pdf_metadata(input_path, output_path, metadata):
+# مفاتيح قاموس المعلومات بصيغة pypdf ومقابلها في PyMuPDF
+METADATA_KEYS = {
+    '/Title': 'title',
+    '/Author': 'author',
+    '/Subject': 'subject',
+    '/Keywords': 'keywords',
+    '/Creator': 'creator',
+    '/Producer': 'producer',
+    '/CreationDate': 'creationDate',
+    '/ModDate': 'modDate',
+}
+
+# عناصر XMP المقابلة لحقول قاموس المعلومات: (الحقل، اسم العنصر)
+_XMP_FIELDS = (
+    ('title', 'dc:title'),
+    ('author', 'dc:creator'),
+    ('subject', 'dc:description'),
+    ('keywords', 'pdf:Keywords'),
+    ('creator', 'xmp:CreatorTool'),
+    ('producer', 'pdf:Producer'),
+)
+
+
+def _normalize_metadata(metadata):
+    """قبول المفاتيح بصيغة pypdf ('/Title') أو PyMuPDF ('title')"""
+    normalized = {}
+    for key, value in (metadata or {}).items():
+        key = METADATA_KEYS.get(key, key)
+        if key in METADATA_KEYS.values():
+            normalized[key] = "" if value is None else str(value)
+    return normalized
+
+
+def _update_xmp(xml, values):
+    """
+    تحديث قيم العناصر الموجودة في XMP حتى لا تتعارض مع قاموس المعلومات.
+    العناصر غير الموجودة تُترك (قاموس المعلومات يكفي).
+    """
+    for field, element in _XMP_FIELDS:
+        if field not in values:
+            continue
+        text = escape(values[field])
+        # العناصر ذات القوائم (rdf:Alt / rdf:Seq): تحديث أول rdf:li
+        container = re.compile(
+            rf"(<{element}\b[^>]*>\s*<rdf:(?:Alt|Seq|Bag)>\s*<rdf:li\b[^>/]*>).*?(</rdf:li>)", re.S)
+        xml, count = container.subn(lambda m: m.group(1) + text + m.group(2), xml, count=1)
+        if count:
+            continue
+        simple = re.compile(rf"(<{element}\b[^>/]*>)[^<]*(</{element}>)")
+        xml, count = simple.subn(lambda m: m.group(1) + text + m.group(2), xml, count=1)
+        if count:
+            continue
+        attribute = re.compile(rf'(\b{element}=")[^"]*(")')
+        xml = attribute.sub(lambda m: m.group(1) + escape(values[field], {'"': "&quot;"}) + m.group(2), xml, count=1)
+    return xml
+
+
+def _apply_metadata(doc, values):
+    """دمج القيم الجديدة مع البيانات الحالية وتحديث XMP إن وجد"""
+    current = {key: value for key, value in (doc.metadata or {}).items()
+               if key in METADATA_KEYS.values() and value}
+    current.update(values)
+    doc.set_metadata(current)
+
+    xml = doc.get_xml_metadata()
+    if xml:
+        doc.set_xml_metadata(_update_xmp(xml, values))
+
+
+def update_pdf_metadata(input_path, output_path, metadata, password=None, atomic=True):
     """
     تحديث بيانات التعريف (metadata) لملف PDF.
+    يُكتب قاموس المعلومات و XMP فقط كتحديث تزايدي في نهاية الملف بدون إعادة كتابة الصفحات.
+    عند الكتابة فوق الملف الأصلي مع atomic=False يُحدّث الملف مباشرة (فوري حتى للملفات الكبيرة)؛
+    وإلا يُنسخ الملف ثم يُحدّث ويستبدل الناتج بشكل ذري.
     """
+    output_path = output_path or input_path
+    values = _normalize_metadata(metadata)
+    temp_path = None
     try:
-        with open(input_path, 'rb') as f:
-            reader = PdfReader(f)
-            writer = PdfWriter()
+        in_place = os.path.abspath(input_path) == os.path.abspath(output_path)
 
-            for page in reader.pages:
-                writer.add_page(page)
-            
-            writer.add_metadata(metadata)
+        if in_place and not atomic:
+            target = input_path
+        else:
+            output_dir = os.path.dirname(output_path)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            temp_path = output_path + ".tmp"
+            shutil.copyfile(input_path, temp_path)
+            target = temp_path
+
+        doc = fitz.open(target)
+        try:
+            if doc.needs_pass and not (password and doc.authenticate(password)):
+                error("الملف مشفر ولا يمكن تحديث بياناته الوصفية بدون كلمة مرور صحيحة.")
+                return False
 
-            with open(output_path, 'wb') as out:
-                writer.write(out)
+            _apply_metadata(doc, values)
+
+            if doc.can_save_incrementally():
+                doc.saveIncr()
+                doc.close()
+            else:
+                # ملف أُصلح عند فتحه: حفظ كامل بدلاً من التحديث التزايدي
+                warning("لا يمكن الحفظ التزايدي لهذا الملف، سيتم حفظه بالكامل")
+                full_path = target + ".full"
+                doc.save(full_path, garbage=1, encryption=fitz.PDF_ENCRYPT_KEEP)
+                doc.close()
+                os.replace(full_path, target)
+        finally:
+            if not doc.is_closed:
+                doc.close()
+
+        if temp_path:
+            os.replace(temp_path, output_path)
+            temp_path = None
         info(f"تم تحديث بيانات التعريف بنجاح في: {output_path}")
         return True
     except Exception as e:
         error(f"فشل في تحديث بيانات التعريف: {e}")
         return False
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def _metadata_task(input_path, output_path, metadata, password):
+    """مهمة عامل: تحديث بيانات ملف واحد مع قياس الوقت."""
+    start_time = time.perf_counter()
+    success = update_pdf_metadata(input_path, output_path, metadata, password)
+    return success, time.perf_counter() - start_time
+
+
+def batch_update_metadata(inputs, metadata, output_folder=None, password=None,
+                          max_workers=None, recursive=False, patterns=None,
+                          progress_callback=None):
+    """
+    تطبيق نفس بيانات التعريف على مجلد أو قائمة ملفات PDF بشكل متوازٍ.
+    Apply the same metadata to a folder or list of PDFs in worker processes.
+
+    Args:
+        inputs: Folder path or list of PDF file paths
+        metadata (dict): Fields to set ('/Title' or 'title' style keys)
+        output_folder (str): Folder for updated copies; None updates the files in place
+        password (str): Password for encrypted files
+        max_workers (int): Concurrency limit (defaults to the performance settings)
+        recursive (bool): Traverse sub-folders when inputs is a folder
+        patterns (list): Glob filters for file names (default: ["*.pdf"])
+        progress_callback (callable): Called as (done, total, file_result) after each file
+
+    Returns:
+        Dictionary containing per-file results and timing
+    """
+    results = {
+        'processed': 0,
+        'successful': 0,
+        'failed': 0,
+        'files': [],
+        'elapsed_time': 0.0
+    }
+    start_time = time.perf_counter()
+
+    try:
+        if isinstance(inputs, str):
+            if not os.path.isdir(inputs):
+                raise FileNotFoundError(f"المجلد غير موجود: {inputs}")
+            base_folder = inputs
+            pdf_files = collect_files(inputs, patterns or ["*.pdf"], recursive)
+        else:
+            base_folder = None
+            pdf_files = [f for f in inputs if os.path.exists(f)]
+
+        info(f"تحديث بيانات التعريف لـ {len(pdf_files)} ملف PDF")
+
+        tasks = []
+        used_outputs = set()
+        for input_path in pdf_files:
+            if output_folder:
+                relative_path = os.path.relpath(input_path, base_folder) if base_folder else os.path.basename(input_path)
+                output_path = unique_output_path(os.path.join(output_folder, relative_path), used_outputs)
+            else:
+                output_path = input_path
+            tasks.append((input_path, output_path, metadata, password))
+
+        file_results = [None] * len(tasks)
+        for index, outcome, exc in run_in_pool(_metadata_task, tasks, max_workers):
+            success, duration = outcome if exc is None else (False, 0.0)
+            if exc is not None:
+                error(f"خطأ في تحديث بيانات {tasks[index][0]}: {exc}")
+
+            file_result = {
+                'filename': os.path.basename(tasks[index][0]),
+                'output_path': tasks[index][1],
+                'status': 'نجح' if success else 'فشل',
+                'duration': round(duration, 3)
+            }
+            file_results[index] = file_result
+
+            results['processed'] += 1
+            results['successful' if success else 'failed'] += 1
+            if progress_callback:
+                progress_callback(results['processed'], len(tasks), file_result)
+
+        results['files'] = [r for r in file_results if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"النتائج: {results['successful']} نجح، {results['failed']} فشل خلال {results['elapsed_time']} ثانية")
+        return results
+
+    except Exception as e:
+        error(f"خطأ في تحديث بيانات التعريف المجمع: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        return results
+
+def get_permission_flags(permissions=None):
+    """
+    تحويل قاموس الأذونات {'print': True, 'copy': False, ...} إلى أعلام PDF.
+    إذن الوصول لبرامج قراءة الشاشة يبقى مسموحاً دائماً.
+    """
+    flags = ALL_PERMISSIONS
+    for key, allowed in (permissions or {}).items():
+        if key in PERMISSION_FLAGS and not allowed:
+            flags &= ~PERMISSION_FLAGS[key]
+    return flags | fitz.PDF_PERM_ACCESSIBILITY
+
+
+def generates_owner_password(owner_password, permissions=None):
+    """
+    هل سيولد encrypt_pdf كلمة مالك عشوائية؟ (أذونات مقيدة بدون كلمة مالك)
+    الكلمة المولدة لا تُحفظ ولا تُرجع، فلا يمكن رفع القيود لاحقاً إلا من الملف الأصلي.
+    """
+    return not owner_password and get_permission_flags(permissions) != ALL_PERMISSIONS
+
+
+def _save_atomic(doc, output_path, **save_options):
+    """الحفظ في ملف مؤقت ثم الاستبدال (يسمح بأن يكون الناتج هو الملف الأصلي)"""
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+    temp_path = output_path + ".tmp"
+    try:
+        doc.save(temp_path, **save_options)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        doc.close()
+    os.replace(temp_path, output_path)
+
 
 def encrypt_pdf(input_path, output_path, user_password, owner_password=None, permissions=None):
     """
-    تشفير ملف PDF بكلمة مرور وأذونات.
+    تشفير ملف PDF بكلمة مرور وأذونات (AES-256).
+    يتم التشفير أثناء حفظ واحد عبر PyMuPDF بدون نسخ الصفحات.
+    إذا قُيدت الأذونات بدون كلمة مرور مالك، تُولد كلمة مالك عشوائية حتى تُطبق القيود
+    (كلمة مالك مساوية لكلمة المستخدم تمنح كامل الصلاحيات). هذه الكلمة غير قابلة
+    للاسترجاع؛ يمكن للمستدعي معرفة ذلك مسبقاً عبر generates_owner_password.
     """
     try:
-        with open(input_path, 'rb') as f:
-            reader = PdfReader(f)
-            writer = PdfWriter()
+        doc = fitz.open(input_path)
+        if doc.needs_pass:
+            doc.close()
+            error("الملف مشفر بالفعل. يرجى فك تشفيره أولاً.")
+            return False
 
-            for page in reader.pages:
-                writer.add_page(page)
+        flags = get_permission_flags(permissions)
+        generated = generates_owner_password(owner_password, permissions)
+        if generated:
+            # 24 بايت = 32 حرفاً، ضمن حد PyMuPDF لطول كلمة المرور (40 حرفاً)
+            owner_password = secrets.token_urlsafe(24)
+        elif not owner_password:
+            owner_password = user_password
 
-            # تعيين كلمة المرور
-            writer.encrypt(user_password, owner_password)
-            
-            # تعيين الأذونات (إذا تم توفيرها)
-            if permissions:
-                # pypdf لا يدعم تعيين الأذونات بشكل مباشر بعد الإنشاء
-                # هذه الميزة قد تحتاج إلى مكتبة أخرى أو إصدار أحدث
-                pass
-
-            with open(output_path, 'wb') as out:
-                writer.write(out)
+        _save_atomic(
+            doc, output_path,
+            encryption=fitz.PDF_ENCRYPT_AES_256,
+            user_pw=user_password,
+            owner_pw=owner_password,
+            permissions=flags,
+        )
         info(f"تم تشفير الملف بنجاح: {output_path}")
+        if generated:
+            warning("تم توليد كلمة مالك عشوائية غير قابلة للاسترجاع لتطبيق الأذونات المقيدة")
         return True
     except Exception as e:
         error(f"فشل في تشفير الملف: {e}")
@@ -107,29 +379,304 @@ def decrypt_pdf(input_path, output_path, password):
     فك تشفير ملف PDF.
     """
     try:
-        with open(input_path, 'rb') as f:
-            reader = PdfReader(f)
-            
-            if reader.is_encrypted:
-                if reader.decrypt(password):
-                    writer = PdfWriter()
-                    for page in reader.pages:
-                        writer.add_page(page)
-                    
-                    with open(output_path, 'wb') as out:
-                        writer.write(out)
-                    
-                    info(f"تم فك تشفير الملف بنجاح: {output_path}")
-                    return True
-                else:
-                    error("كلمة مرور غير صحيحة.")
-                    return False
+        doc = fitz.open(input_path)
+
+        if doc.needs_pass or doc.is_encrypted:
+            if doc.authenticate(password):
+                _save_atomic(doc, output_path, encryption=fitz.PDF_ENCRYPT_NONE)
+                info(f"تم فك تشفير الملف بنجاح: {output_path}")
+                return True
             else:
-                info("الملف غير مشفر أصلاً.")
-                # يمكن نسخ الملف كما هو إذا أردنا
-                import shutil
+                doc.close()
+                error("كلمة مرور غير صحيحة.")
+                return False
+        else:
+            doc.close()
+            info("الملف غير مشفر أصلاً.")
+            # يمكن نسخ الملف كما هو إذا أردنا
+            if os.path.abspath(input_path) != os.path.abspath(output_path):
                 shutil.copy2(input_path, output_path)
-                return True
+            return True
     except Exception as e:
         error(f"فشل في فك تشفير الملف: {e}")
         return False
+
+
+def load_password_candidates(file_path):
+    """
+    تحميل قائمة كلمات مرور مرشحة يوفرها المستخدم (كلمة في كل سطر).
+    الأسطر الفارغة والمكررة تُتجاهل مع الحفاظ على الترتيب.
+    """
+    candidates = []
+    seen = set()
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            candidate = line.rstrip('\r\n')
+            if candidate and candidate not in seen:
+                seen.add(candidate)
+                candidates.append(candidate)
+    return candidates
+
+
+def _try_candidates(input_path, indexed_candidates, found_event):
+    """
+    مهمة عامل: تجربة مجموعة من الكلمات [(رقمها، الكلمة)، ...] على قاموس التشفير فقط.
+    لكل عملية نسخة مستقلة من المستند، ويتوقف الجميع عند أول تطابق.
+    """
+    with fitz.open(input_path) as doc:
+        for count, (index, candidate) in enumerate(indexed_candidates):
+            # فحص العلم المشترك كل عدة كلمات لأنه يتطلب اتصالاً بعملية المدير
+            if count % _STOP_CHECK_INTERVAL == 0 and found_event.is_set():
+                return None
+            if doc.authenticate(candidate):
+                found_event.set()
+                return index
+    return None
+
+
+def find_matching_password(input_path, candidates, max_workers=None):
+    """
+    البحث عن كلمة المرور الصحيحة ضمن قائمة مرشحة يوفرها المستخدم.
+    Try a user-supplied list of candidate passwords across worker processes, stopping at
+    the first match. Document.authenticate holds the GIL, so threads would not run the
+    key derivation in parallel; the stop flag is shared through a multiprocessing Manager.
+
+    Returns:
+        int or None: Index of the matching candidate, None if no candidate matches
+    """
+    with fitz.open(input_path) as doc:
+        if not doc.needs_pass:
+            raise ValueError("الملف لا يتطلب كلمة مرور")
+
+    if not candidates:
+        return None
+
+    workers = get_worker_count(max_workers, len(candidates))
+    # توزيع متداخل: كل عامل يجرب الكلمات من بداية القائمة أولاً
+    groups = [[(index, candidates[index]) for index in range(start, len(candidates), workers)]
+              for start in range(workers)]
+
+    if workers == 1:
+        return _try_candidates(input_path, groups[0], threading.Event())
+
+    with multiprocessing.Manager() as manager:
+        found_event = manager.Event()
+        matches = [result for _, result, exc in
+                   run_in_pool(_try_candidates, [(input_path, g, found_event) for g in groups], workers)
+                   if exc is None and result is not None]
+    return min(matches) if matches else None
+
+
+def decrypt_pdf_with_candidates(input_path, output_path, candidates, max_workers=None):
+    """
+    فك تشفير ملف باستخدام قائمة كلمات مرور مرشحة (قائمة أو مسار ملف نصي).
+    لا تُسجل الكلمات في السجل؛ يُرجع رقم الكلمة المطابقة فقط.
+
+    Returns:
+        dict: {'success', 'matched_index' (0-based or None), 'candidates', 'elapsed_time'}
+    """
+    result = {'success': False, 'matched_index': None, 'candidates': 0, 'elapsed_time': 0.0}
+    start_time = time.perf_counter()
+    try:
+        if isinstance(candidates, str):
+            candidates = load_password_candidates(candidates)
+        result['candidates'] = len(candidates)
+
+        index = find_matching_password(input_path, candidates, max_workers)
+        if index is None:
+            error(f"لم تطابق أي من الكلمات المرشحة ({len(candidates)}) الملف: {input_path}")
+        else:
+            info(f"تطابقت الكلمة المرشحة رقم {index + 1} من {len(candidates)}")
+            result['matched_index'] = index
+            result['success'] = decrypt_pdf(input_path, output_path, candidates[index])
+    except Exception as e:
+        error(f"فشل في فك تشفير الملف بالكلمات المرشحة: {e}")
+
+    result['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+    return result
+
+
+def load_password_mapping(csv_path):
+    """
+    تحميل ملف CSV يربط كل ملف بكلمة مروره: عمودان (اسم الملف، كلمة المرور).
+    السطر الأول يُتجاهل إذا كان عناوين أعمدة. المفاتيح تُطابق باسم الملف أو مساره النسبي أو اسمه بدون امتداد.
+    """
+    mapping = {}
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        for row_number, row in enumerate(csv.reader(f)):
+            if len(row) < 2 or not row[0].strip():
+                continue
+            key, password = row[0].strip(), row[1]
+            if row_number == 0 and key.lower() in ('file', 'filename', 'name', 'path', 'الملف', 'اسم الملف'):
+                continue
+            mapping[os.path.normcase(key.replace('\\', '/'))] = password
+    return mapping
+
+
+def resolve_password(file_path, base_folder=None, password=None, mapping=None, pattern=None):
+    """
+    تحديد كلمة مرور ملف من المصدر المحدد (الأولوية: الجدول ثم النمط ثم كلمة المرور الموحدة).
+    النمط يقبل الحقول {name} و {stem} و {folder}، مثال: "{stem}-2024".
+    ترجع None إذا لم توجد كلمة مرور للملف.
+    """
+    name = os.path.basename(file_path)
+    stem = os.path.splitext(name)[0]
+
+    if mapping:
+        keys = [name, stem]
+        if base_folder:
+            keys.insert(0, os.path.relpath(file_path, base_folder))
+        for key in keys:
+            value = mapping.get(os.path.normcase(key.replace('\\', '/')))
+            if value is not None:
+                return value
+
+    if pattern:
+        folder = os.path.basename(os.path.dirname(os.path.abspath(file_path)))
+        return pattern.format(name=name, stem=stem, folder=folder)
+
+    return password
+
+
+def _security_task(operation, input_path, output_path, password, owner_password, permissions):
+    """مهمة عامل: تشفير أو فك تشفير ملف واحد مع قياس الوقت."""
+    start_time = time.perf_counter()
+    if operation == 'encrypt':
+        success = encrypt_pdf(input_path, output_path, password, owner_password, permissions)
+    else:
+        success = decrypt_pdf(input_path, output_path, password)
+    return success, time.perf_counter() - start_time
+
+
+def batch_security(inputs, output_folder, operation='encrypt', password=None, password_csv=None,
+                   password_pattern=None, owner_password=None, permissions=None,
+                   max_workers=None, recursive=False, patterns=None, report_path=None,
+                   progress_callback=None):
+    """
+    تشفير أو فك تشفير مجلد أو قائمة ملفات PDF بشكل متوازٍ مع كلمة مرور لكل ملف.
+    Encrypt or decrypt a folder or list of PDFs in worker processes.
+
+    Passwords come from a single password, a CSV mapping file (file name -> password)
+    or a pattern built from the file name. Passwords are never logged or written to
+    the report.
+
+    Args:
+        inputs: Folder path or list of PDF file paths
+        output_folder (str): Folder for the output files (sub-folders are mirrored)
+        operation (str): 'encrypt' or 'decrypt'
+        password (str): Password used for every file
+        password_csv (str): CSV file mapping file names to passwords
+        password_pattern (str): Pattern such as "{stem}-2024" ({name}, {stem}, {folder})
+        owner_password (str): Owner password when encrypting; when omitted with restricted
+            permissions a random, unrecoverable owner password is generated per file
+            and results['owner_password_generated'] is True
+        permissions (dict): Permissions when encrypting, see encrypt_pdf
+        max_workers (int): Concurrency limit (defaults to the performance settings)
+        recursive (bool): Traverse sub-folders when inputs is a folder
+        patterns (list): Glob filters for file names (default: ["*.pdf"])
+        report_path (str): Optional JSON file for the result report
+        progress_callback (callable): Called as (done, total, file_result) after each file
+
+    Returns:
+        Dictionary containing per-file results and timing
+    """
+    results = {
+        'operation': operation,
+        'processed': 0,
+        'successful': 0,
+        'failed': 0,
+        'files': [],
+        'elapsed_time': 0.0
+    }
+    if operation == 'encrypt':
+        results['owner_password_generated'] = generates_owner_password(owner_password, permissions)
+    start_time = time.perf_counter()
+
+    try:
+        if operation not in ('encrypt', 'decrypt'):
+            raise ValueError(f"عملية غير معروفة: {operation}")
+        if password is None and not password_csv and not password_pattern:
+            raise ValueError("يجب تحديد مصدر لكلمات المرور")
+
+        mapping = load_password_mapping(password_csv) if password_csv else None
+
+        if isinstance(inputs, str):
+            if not os.path.isdir(inputs):
+                raise FileNotFoundError(f"المجلد غير موجود: {inputs}")
+            base_folder = inputs
+            pdf_files = collect_files(inputs, patterns or ["*.pdf"], recursive)
+        else:
+            base_folder = None
+            pdf_files = [f for f in inputs if os.path.exists(f)]
+
+        os.makedirs(output_folder, exist_ok=True)
+        action = "تشفير" if operation == 'encrypt' else "فك تشفير"
+        info(f"{action} {len(pdf_files)} ملف PDF")
+        success_message = ""
+        if results.get('owner_password_generated'):
+            success_message = "كلمة مالك عشوائية غير قابلة للاسترجاع"
+            warning("لم تُحدد كلمة مالك: ستُولد كلمة مالك عشوائية غير قابلة للاسترجاع لكل ملف")
+
+        file_results = [None] * len(pdf_files)
+        tasks, task_indices = [], []
+        used_outputs = set()
+        for index, input_path in enumerate(pdf_files):
+            relative_path = os.path.relpath(input_path, base_folder) if base_folder else os.path.basename(input_path)
+            output_path = unique_output_path(os.path.join(output_folder, relative_path), used_outputs)
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+            file_password = resolve_password(input_path, base_folder, password, mapping, password_pattern)
+            if not file_password:
+                file_results[index] = {
+                    'filename': relative_path,
+                    'output_path': output_path,
+                    'status': 'فشل',
+                    'message': "لا توجد كلمة مرور لهذا الملف",
+                    'duration': 0.0
+                }
+                continue
+            tasks.append((operation, input_path, output_path, file_password, owner_password, permissions))
+            task_indices.append(index)
+
+        skipped = sum(1 for r in file_results if r is not None)
+        results['processed'] = results['failed'] = skipped
+        if skipped:
+            warning(f"{skipped} ملف بدون كلمة مرور في المصدر المحدد")
+
+        for task_index, outcome, exc in run_in_pool(_security_task, tasks, max_workers):
+            index = task_indices[task_index]
+            success, duration = outcome if exc is None else (False, 0.0)
+            if exc is not None:
+                # رسالة الاستثناء فقط، بدون معاملات المهمة التي تحتوي كلمات المرور
+                error(f"خطأ في {action} {pdf_files[index]}: {exc}")
+
+            relative_path = os.path.relpath(pdf_files[index], base_folder) if base_folder else os.path.basename(pdf_files[index])
+            file_result = {
+                'filename': relative_path,
+                'output_path': tasks[task_index][2],
+                'status': 'نجح' if success else 'فشل',
+                'message': success_message if success else (str(exc) if exc is not None else "كلمة مرور غير صحيحة أو ملف تالف"),
+                'duration': round(duration, 3)
+            }
+            file_results[index] = file_result
+
+            results['processed'] += 1
+            results['successful' if success else 'failed'] += 1
+            if progress_callback:
+                progress_callback(results['processed'], len(pdf_files), file_result)
+
+        results['files'] = [r for r in file_results if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"النتائج: {results['successful']} نجح، {results['failed']} فشل خلال {results['elapsed_time']} ثانية")
+
+    except Exception as e:
+        error(f"خطأ في {operation} المجمع: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+
+    if report_path:
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            warning(f"تعذر حفظ التقرير: {e}")
+    return results
@@ -8,8 +8,10 @@ import os
 from pypdf import PdfReader, PdfWriter
 from typing import List, Optional, Tuple
 from src.utils.logger import info, warning, error
+from src.core.pdf_output import linearize_pdf
 
-def split_pdf(input_file: str, output_folder: str, prefix: str = "page") -> bool:
+def split_pdf(input_file: str, output_folder: str, prefix: str = "page",
+              linearize: bool = False) -> bool:
     """
     Split a PDF file into individual pages.
     تقسيم ملف PDF إلى صفحات منفردة
@@ -18,6 +20,7 @@ def split_pdf(input_file: str, output_folder: str, prefix: str = "page") -> bool
         input_file (str): Path to the input PDF file
         output_folder (str): Folder where split pages will be saved
         prefix (str): Prefix for output filenames (default: "page")
+        linearize (bool): Write linearized ("fast web view") PDFs
         
     Returns:
         bool: True if split was successful, False otherwise
@@ -52,6 +55,8 @@ def split_pdf(input_file: str, output_folder: str, prefix: str = "page") -> bool
             # كتابة الصفحة إلى ملف منفصل
             with open(output_path, 'wb') as output_file:
                 pdf_writer.write(output_file)
+            if linearize and not linearize_pdf(output_path):
+                return False
         
         info(f"تم تقسيم الملف بنجاح إلى {total_pages} صفحة في المجلد: {output_folder}")
         return True
@@ -62,7 +67,8 @@ def split_pdf(input_file: str, output_folder: str, prefix: str = "page") -> bool
 
 def split_pdf_by_ranges(input_file: str, output_folder: str, 
                        page_ranges: List[Tuple[int, int]], 
-                       filenames: Optional[List[str]] = None) -> bool:
+                       filenames: Optional[List[str]] = None,
+                       linearize: bool = False) -> bool:
     """
     Split a PDF file into multiple files based on page ranges.
     تقسيم ملف PDF إلى ملفات متعددة حسب نطاقات الصفحات
@@ -72,6 +78,7 @@ def split_pdf_by_ranges(input_file: str, output_folder: str,
         output_folder (str): Folder where split files will be saved
         page_ranges (List[Tuple[int, int]]): List of (start_page, end_page) tuples (1-based)
         filenames (Optional[List[str]]): Custom filenames for each range
+        linearize (bool): Write linearized ("fast web view") PDFs
         
     Returns:
         bool: True if split was successful, False otherwise
@@ -116,6 +123,8 @@ def split_pdf_by_ranges(input_file: str, output_folder: str,
             # كتابة النطاق إلى ملف
             with open(output_path, 'wb') as output_file:
                 pdf_writer.write(output_file)
+            if linearize and not linearize_pdf(output_path):
+                return False
             
             info(f"تم إنشاء: {output_filename} (صفحات {start_page}-{end_page})")
         
@@ -127,7 +136,8 @@ def split_pdf_by_ranges(input_file: str, output_folder: str,
         return False
 
 def split_pdf_by_size(input_file: str, output_folder: str, 
-                     pages_per_file: int, prefix: str = "part") -> bool:
+                     pages_per_file: int, prefix: str = "part",
+                     linearize: bool = False) -> bool:
     """
     Split a PDF file into multiple files with specified number of pages each.
     تقسيم ملف PDF إلى ملفات متعددة بعدد صفحات محدد لكل ملف
@@ -137,6 +147,7 @@ def split_pdf_by_size(input_file: str, output_folder: str,
         output_folder (str): Folder where split files will be saved
         pages_per_file (int): Number of pages per output file
         prefix (str): Prefix for output filenames
+        linearize (bool): Write linearized ("fast web view") PDFs
         
     Returns:
         bool: True if split was successful, False otherwise
@@ -174,6 +185,8 @@ def split_pdf_by_size(input_file: str, output_folder: str,
             
             with open(output_path, 'wb') as output_file:
                 pdf_writer.write(output_file)
+            if linearize and not linearize_pdf(output_path):
+                return False
             
             info(f"تم إنشاء: {output_filename} ({pages_added} صفحة)")
         
@@ -184,7 +197,8 @@ def split_pdf_by_size(input_file: str, output_folder: str,
         error(f"خطأ في تقسيم PDF بالحجم: {str(e)}")
         return False
 
-def extract_pages(input_file: str, output_file: str, page_numbers: List[int]) -> bool:
+def extract_pages(input_file: str, output_file: str, page_numbers: List[int],
+                  linearize: bool = False) -> bool:
     """
     Extract specific pages from a PDF file.
     استخراج صفحات محددة من ملف PDF
@@ -193,6 +207,7 @@ def extract_pages(input_file: str, output_file: str, page_numbers: List[int]) ->
         input_file (str): Path to the input PDF file
         output_file (str): Path for the output PDF file
         page_numbers (List[int]): List of page numbers to extract (1-based)
+        linearize (bool): Write a linearized ("fast web view") PDF
         
     Returns:
         bool: True if extraction was successful, False otherwise
@@ -226,6 +241,8 @@ def extract_pages(input_file: str, output_file: str, page_numbers: List[int]) ->
         # حفظ الصفحات المستخرجة
         with open(output_file, 'wb') as output:
             pdf_writer.write(output)
+        if linearize and not linearize_pdf(output_file):
+            return False
         
         info(f"تم استخراج {extracted_count} صفحة إلى: {output_file}")
         return True
@@ -278,7 +295,8 @@ if __name__ == "__main__":
     info("وحدة التقسيم تم تحميلها بنجاح")
 
 def split_pdf_advanced(input_file: str, output_folder: str, prefix: str = "page",
-                      pages_per_file: int = 1, create_subfolders: bool = False) -> bool:
+                      pages_per_file: int = 1, create_subfolders: bool = False,
+                      linearize: bool = False) -> bool:
     """
     تقسيم ملف PDF بخيارات متقدمة
 
@@ -288,6 +306,7 @@ def split_pdf_advanced(input_file: str, output_folder: str, prefix: str = "page"
         prefix (str): بادئة أسماء الملفات
         pages_per_file (int): عدد الصفحات في كل ملف
         create_subfolders (bool): إنشاء مجلدات فرعية
+        linearize (bool): حفظ ملفات خطية (عرض سريع على الويب)
 
     Returns:
         bool: True إذا نجح التقسيم، False في حالة الفشل
@@ -338,6 +357,8 @@ def split_pdf_advanced(input_file: str, output_folder: str, prefix: str = "page"
             # حفظ الملف
             with open(output_path, 'wb') as output_file:
                 pdf_writer.write(output_file)
+            if linearize and not linearize_pdf(output_path):
+                return False
 
             file_count += 1
             info(f"تم إنشاء: {filename}")
@@ -5,11 +5,18 @@ Stamp Processor - Merge stamps with PDF files
 """
 
 import fitz  # PyMuPDF
-from PySide6.QtGui import QPixmap, QPainter, QImage, QTransform
+from PySide6.QtGui import QPainter, QTransform
 from PySide6.QtCore import Qt, QRectF, QObject, Signal
-import tempfile
 import os
 from src.utils.coordinate_calibrator import CoordinateCalibrator, validate_coordinates
+from src.utils.parallel import get_worker_count, run_in_pool, split_into_chunks, WORKER_MP_CONTEXT
+from src.utils.smart_cache import stamp_cache
+# دوال الرسم في وحدة خالية من Qt حتى تستوردها العمليات المتوازية دون تحميل Qt
+from src.core.stamp_render import (collect_stamp_data, get_scene_size, stamp_page_vector,
+                                   render_stamped_page, _render_page_chunk)
+
+# أقل عدد صفحات يستحق تشغيل عمليات متوازية في الوضع النقطي (تكلفة بدء العمليات)
+PARALLEL_RASTER_MIN_PAGES = 8
 
 class StampWorker(QObject):
     """
@@ -19,7 +26,8 @@ class StampWorker(QObject):
     finished = Signal(bool, str, dict)  # (success, output_path, summary)
     error = Signal(str)
 
-    def __init__(self, input_path, output_path, page_rotations, page_stamps, view_rect, scene_rect):
+    def __init__(self, input_path, output_path, page_rotations, page_stamps, view_rect, scene_rect,
+                 mode="vector", dpi=216, image_format="PNG", jpeg_quality=90, max_workers=None):
         super().__init__()
         self.input_path = input_path
         self.output_path = output_path
@@ -27,6 +35,14 @@ class StampWorker(QObject):
         self.page_stamps = page_stamps
         self.view_rect = view_rect
         self.scene_rect = scene_rect
+        self.mode = mode
+        # إعدادات الوضع النقطي (raster)
+        self.dpi = dpi
+        self.image_format = image_format
+        self.jpeg_quality = jpeg_quality
+        self.max_workers = max_workers
+        # أخذ لقطة من بيانات الأختام في الخيط الرئيسي قبل نقل العامل إلى خيط آخر
+        self.stamp_data = collect_stamp_data(page_stamps)
         self.is_cancelled = False
 
     def cancel(self):
@@ -38,64 +54,24 @@ class StampWorker(QObject):
         تشغيل عملية حفظ PDF مع الأختام.
         """
         try:
-            print(f"بدء الحفظ في خيط منفصل: {self.input_path} -> {self.output_path}")
-            
-            input_doc = fitz.open(self.input_path)
-            output_doc = fitz.open()
-            temp_files = []
-            total_pages = len(input_doc)
-
-            for page_num in range(total_pages):
-                if self.is_cancelled:
-                    print(f"تم إلغاء العملية عند الصفحة {page_num + 1}")
-                    self.finished.emit(False, "", {})
-                    return
-
-                print(f"\n--- معالجة الصفحة {page_num + 1}/{total_pages} ---")
-                self.progress.emit(page_num, total_pages)
-
-                page = input_doc[page_num]
-                rotation = self.page_rotations.get(page_num, 0)
-                stamps = self.page_stamps.get(page_num, [])
-
-                zoom_matrix = fitz.Matrix(3, 3)
-                page_pixmap_fitz = page.get_pixmap(matrix=zoom_matrix)
-                
-                image_format = QImage.Format_RGBA8888 if page_pixmap_fitz.alpha else QImage.Format_RGB888
-                qimage = QImage(page_pixmap_fitz.samples, page_pixmap_fitz.width, page_pixmap_fitz.height, page_pixmap_fitz.stride, image_format)
-                page_pixmap = QPixmap.fromImage(qimage)
-
-                if rotation != 0:
-                    transform = QTransform().rotate(rotation)
-                    page_pixmap = page_pixmap.transformed(transform, Qt.SmoothTransformation)
-
-                if stamps:
-                    final_pixmap = create_stamped_image(page_pixmap, stamps, self.scene_rect)
-                else:
-                    final_pixmap = page_pixmap
-
-                temp_image_path = os.path.join(tempfile.gettempdir(), f"stamped_page_{page_num}.png")
-                if not final_pixmap.save(temp_image_path, "PNG"):
-                    raise Exception(f"فشل حفظ الصورة المؤقتة: {temp_image_path}")
-                temp_files.append(temp_image_path)
-
-                img_doc = fitz.open(temp_image_path)
-                pdf_bytes = img_doc.convert_to_pdf()
-                img_pdf_doc = fitz.open("pdf", pdf_bytes)
-                output_doc.insert_pdf(img_pdf_doc)
-                img_doc.close()
-                img_pdf_doc.close()
-
-            if self.is_cancelled:
-                self.finished.emit(False, "", {})
-                return
-
-            self.progress.emit(total_pages, total_pages)
-
-            if len(output_doc) > 0:
-                output_doc.save(self.output_path, garbage=4, deflate=True, clean=True)
-                summary = get_stamp_summary(self.page_stamps)
-                self.finished.emit(True, self.output_path, summary)
+            print(f"بدء الحفظ في خيط منفصل ({self.mode}): {self.input_path} -> {self.output_path}")
+
+            options = {
+                'progress_callback': self.progress.emit,
+                'cancel_check': lambda: self.is_cancelled
+            }
+            if self.mode == "vector":
+                success = stamp_pdf_vector(self.input_path, self.output_path, self.page_rotations,
+                                           self.stamp_data, self.scene_rect, **options)
+            else:
+                success = stamp_pdf_raster(self.input_path, self.output_path, self.page_rotations,
+                                           self.stamp_data, self.scene_rect, dpi=self.dpi,
+                                           image_format=self.image_format,
+                                           jpeg_quality=self.jpeg_quality,
+                                           max_workers=self.max_workers, **options)
+
+            if success and not self.is_cancelled:
+                self.finished.emit(True, self.output_path, get_stamp_summary(self.page_stamps))
             else:
                 self.finished.emit(False, "", {})
 
@@ -105,22 +81,13 @@ class StampWorker(QObject):
             import traceback
             print(f"تفاصيل الخطأ: {traceback.format_exc()}")
             self.error.emit(error_msg)
-        finally:
-            if 'output_doc' in locals() and output_doc:
-                output_doc.close()
-            if 'input_doc' in locals() and input_doc:
-                input_doc.close()
-            
-            for f in temp_files:
-                try:
-                    os.remove(f)
-                except OSError:
-                    pass
 
-def save_pdf_with_stamps(input_path, output_path, page_rotations, page_stamps, view_rect=None, scene_rect=None):
+def save_pdf_with_stamps(input_path, output_path, page_rotations, page_stamps, view_rect=None, scene_rect=None,
+                         mode="vector", dpi=216, image_format="PNG", jpeg_quality=90):
     """
-    حفظ ملف PDF مع الأختام عن طريق تحويل الصفحات إلى صور ودمجها.
-    هذه الطريقة تضمن تطابق "ما تراه هو ما تحصل عليه" على حساب قابلية تحرير النص.
+    حفظ ملف PDF مع الأختام.
+    الوضع "vector" (الافتراضي) ينسخ الصفحات الأصلية ويضيف صور الأختام فوقها مع الحفاظ على النص.
+    الوضع "raster" يحول الصفحات إلى صور ويدمج الأختام فيها ("ما تراه هو ما تحصل عليه").
 
     Args:
         input_path (str): مسار الملف الأصلي
@@ -129,106 +96,227 @@ def save_pdf_with_stamps(input_path, output_path, page_rotations, page_stamps, v
         page_stamps (dict): قاموس الأختام {page_num: [stamp_objects]}
         view_rect (QRect): أبعاد منطقة العرض (viewport) - غير مستخدم حالياً
         scene_rect (QRectF): أبعاد المشهد (scene) - مهم لحساب مواضع الأختام
+        mode (str): "vector" أو "raster"
+        dpi (int): دقة الصفحات في الوضع النقطي (216 = تكبير 3x)
+        image_format (str): ترميز الصفحات في الوضع النقطي ("PNG" أو "JPEG")
+        jpeg_quality (int): جودة JPEG (1-100)
 
     Returns:
         bool: True إذا نجحت العملية
     """
     try:
-        print(f"بدء الحفظ بطريقة الصورة: {input_path} -> {output_path}")
-        
-        input_doc = fitz.open(input_path)
-        output_doc = fitz.open()  # إنشاء مستند PDF جديد فارغ
-        
-        temp_files = []
+        stamp_data = collect_stamp_data(page_stamps)
+        if mode == "vector":
+            return stamp_pdf_vector(input_path, output_path, page_rotations, stamp_data, scene_rect)
+        return stamp_pdf_raster(input_path, output_path, page_rotations, stamp_data, scene_rect,
+                                dpi=dpi, image_format=image_format, jpeg_quality=jpeg_quality)
+    except Exception as e:
+        print(f"❌ خطأ فادح في حفظ PDF مع الأختام: {e}")
+        import traceback
+        print(f"تفاصيل الخطأ: {traceback.format_exc()}")
+        return False
 
-        # معالجة كل صفحة
-        for page_num in range(len(input_doc)):
-            print(f"\n--- معالجة الصفحة {page_num + 1}/{len(input_doc)} ---")
-            
-            # 1. الحصول على بيانات الصفحة
-            page = input_doc[page_num]
-            rotation = page_rotations.get(page_num, 0)
-            stamps = page_stamps.get(page_num, [])
-            
-            # 2. تحويل صفحة PDF إلى صورة عالية الجودة (QPixmap)
-            #    - نستخدم مصفوفة تكبير (zoom matrix) للحصول على دقة أعلى (e.g., 3x for better quality)
-            zoom_matrix = fitz.Matrix(3, 3)
-            page_pixmap_fitz = page.get_pixmap(matrix=zoom_matrix)
-            
-            # تحويل من fitz.Pixmap إلى QPixmap
-            image_format = QImage.Format_RGB888
-            if page_pixmap_fitz.alpha:
-                image_format = QImage.Format_RGBA8888
-            
-            qimage = QImage(page_pixmap_fitz.samples, page_pixmap_fitz.width, page_pixmap_fitz.height, page_pixmap_fitz.stride, image_format)
-            page_pixmap = QPixmap.fromImage(qimage)
+def get_stamp_image_bytes(image_path, opacity=1.0):
+    """
+    تجهيز صورة الختم كـ PNG مع دمج الشفافية في قناة ألفا.
+    تستخدم الذاكرة المؤقتة المشتركة حتى يتم فك ترميز كل ختم مرة واحدة فقط.
+    """
+    return stamp_cache.get_png_bytes(image_path, opacity)
 
-            # تطبيق التدوير يدويًا إذا لزم الأمر
-            if rotation != 0:
-                transform = QTransform().rotate(rotation)
-                page_pixmap = page_pixmap.transformed(transform, Qt.SmoothTransformation)
+def stamp_pdf_vector(input_path, output_path, page_rotations, stamp_data, scene_rect,
+                     progress_callback=None, cancel_check=None):
+    """
+    محرك الختم المتجهي: ينسخ الصفحات الأصلية ويضيف الأختام فوقها.
+    التدوير يطبق عبر /Rotate بدلاً من إعادة رسم الصفحة، فيبقى النص قابلاً للتحديد والبحث.
 
-            print(f"  - تم تحويل الصفحة إلى صورة بحجم: {page_pixmap.width()}x{page_pixmap.height()}")
+    Args:
+        input_path (str): مسار الملف الأصلي
+        output_path (str): مسار الملف الناتج
+        page_rotations (dict): {page_num: angle}
+        stamp_data (dict): {page_num: [stamp_data]} (انظر collect_stamp_data)
+        scene_rect (QRectF | tuple): أبعاد المشهد الذي وضعت فيه الأختام
+        progress_callback (callable): يستدعى بـ (current_page, total_pages)
+        cancel_check (callable): يعيد True لإلغاء العملية
 
-            # 3. رسم الأختام على الصورة
-            image_format = QImage.Format_RGB888
-            if page_pixmap_fitz.alpha:
-                image_format = QImage.Format_RGBA8888
-            
-            # 3. رسم الأختام على الصورة
-            if stamps:
-                print(f"  - سيتم إضافة {len(stamps)} ختم")
-                # نستخدم أبعاد الصورة كمشهد مرجعي جديد للختم
-                final_pixmap = create_stamped_image(page_pixmap, stamps, scene_rect)
-            else:
-                final_pixmap = page_pixmap
-                print("  - لا توجد أختام لهذه الصفحة.")
-
-            # 4. حفظ الصورة النهائية مؤقتاً
-            temp_image_path = os.path.join(tempfile.gettempdir(), f"stamped_page_{page_num}.png")
-            if not final_pixmap.save(temp_image_path, "PNG"):
-                 raise Exception(f"فشل حفظ الصورة المؤقتة: {temp_image_path}")
-            temp_files.append(temp_image_path)
-            print(f"  - تم حفظ الصورة المختومة مؤقتاً في: {temp_image_path}")
-
-            # 5. إضافة الصورة كصفحة جديدة في ملف PDF الناتج
-            img_doc = fitz.open(temp_image_path)
-            pdf_bytes = img_doc.convert_to_pdf()
-            img_pdf_doc = fitz.open("pdf", pdf_bytes)
-            output_doc.insert_pdf(img_pdf_doc)
-            img_doc.close()
-            img_pdf_doc.close()
-            print(f"  - تم إضافة الصورة كصفحة جديدة في الملف الناتج.")
-
-        # 6. حفظ المستند النهائي
-        if len(output_doc) > 0:
-            print("\nحفظ المستند النهائي...")
-            output_doc.save(output_path, garbage=4, deflate=True, clean=True)
-            print(f"✓ تم حفظ الملف بنجاح: {output_path}")
-        else:
+    Returns:
+        bool: True إذا نجحت العملية
+    """
+    scene_size = get_scene_size(scene_rect)
+    if stamp_data and scene_size is None:
+        print("تحذير: أبعاد المشهد المصدر غير صالحة. لا يمكن رسم الأختام بدقة.")
+
+    doc = fitz.open(input_path)
+    try:
+        total_pages = len(doc)
+        xref_cache = {}
+
+        for page_num in range(total_pages):
+            if cancel_check and cancel_check():
+                print(f"تم إلغاء العملية عند الصفحة {page_num + 1}")
+                return False
+            if progress_callback:
+                progress_callback(page_num, total_pages)
+
+            rotation = page_rotations.get(page_num, 0) % 360
+            stamps = stamp_data.get(page_num, [])
+            if not rotation and not stamps:
+                continue
+
+            page = doc[page_num]
+            if rotation:
+                page.set_rotation((page.rotation + rotation) % 360)
+            if stamps and scene_size:
+                stamp_page_vector(page, stamps, scene_size, xref_cache, get_stamp_image_bytes)
+
+        if progress_callback:
+            progress_callback(total_pages, total_pages)
+
+        target_path = _save_target_path(input_path, output_path)
+        doc.save(target_path, garbage=3, deflate=True)
+    finally:
+        doc.close()
+
+    _finish_save(target_path, output_path)
+    return True
+
+def _save_target_path(input_path, output_path):
+    """الحفظ فوق الملف الأصلي يتطلب ملفاً وسيطاً لأن المستند المصدر ما زال مفتوحاً."""
+    if os.path.abspath(input_path) == os.path.abspath(output_path):
+        return output_path + ".tmp"
+    return output_path
+
+def _finish_save(target_path, output_path):
+    """نقل الملف الوسيط (إن وجد) إلى المسار النهائي."""
+    if target_path != output_path:
+        os.replace(target_path, output_path)
+    print(f"✓ تم حفظ الملف بنجاح: {output_path}")
+
+def stamp_pdf_raster(input_path, output_path, page_rotations, stamp_data, scene_rect, dpi=216,
+                     image_format="PNG", jpeg_quality=90, progress_callback=None, cancel_check=None,
+                     max_workers=None):
+    """
+    الوضع النقطي: كل صفحة تتحول إلى صورة مع الأختام وتضاف كصفحة جديدة.
+    جميع المراحل تتم في الذاكرة دون كتابة ملفات مؤقتة على القرص.
+    المستندات الكبيرة تُحوَّل بالتوازي في عمليات منفصلة (كل عملية تفتح نسختها من المستند)
+    ثم يعاد تجميع الصفحات بترتيبها الأصلي.
+
+    Args:
+        input_path (str): مسار الملف الأصلي
+        output_path (str): مسار الملف الناتج
+        page_rotations (dict): {page_num: angle}
+        stamp_data (dict): {page_num: [stamp_data]} (انظر collect_stamp_data)
+        scene_rect (QRectF | tuple): أبعاد المشهد الذي وضعت فيه الأختام
+        dpi (int): دقة التحويل
+        image_format (str): "PNG" أو "JPEG"
+        jpeg_quality (int): جودة JPEG
+        progress_callback (callable): يستدعى بـ (completed_pages, total_pages)
+        cancel_check (callable): يعيد True لإلغاء العملية
+        max_workers (int): الحد الأقصى للعمليات المتوازية (افتراضياً من إعدادات الأداء)
+
+    Returns:
+        bool: True إذا نجحت العملية
+    """
+    scene_size = get_scene_size(scene_rect)
+    if stamp_data and scene_size is None:
+        print("تحذير: أبعاد المشهد المصدر غير صالحة. لا يمكن رسم الأختام بدقة.")
+
+    input_doc = fitz.open(input_path)
+    output_doc = fitz.open()
+    try:
+        total_pages = len(input_doc)
+        xref_cache = {}
+
+        workers = get_worker_count(max_workers, total_pages)
+        if workers > 1 and total_pages >= PARALLEL_RASTER_MIN_PAGES:
+            completed = _render_pages_parallel(
+                input_path, output_doc, total_pages, page_rotations, stamp_data, scene_size,
+                dpi, image_format, jpeg_quality, workers, progress_callback, cancel_check
+            )
+            if not completed:
+                return False
+
+        # المعالجة المتسلسلة لما تبقى من صفحات (كل الصفحات إذا لم يُستخدم التوازي)
+        for page_num in range(len(output_doc), total_pages):
+            if cancel_check and cancel_check():
+                print(f"تم إلغاء العملية عند الصفحة {page_num + 1}")
+                return False
+            if progress_callback:
+                progress_callback(page_num, total_pages)
+
+            width, height, image_bytes = render_stamped_page(
+                input_doc[page_num],
+                page_rotations.get(page_num, 0) % 360,
+                stamp_data.get(page_num, []),
+                scene_size,
+                xref_cache,
+                dpi=dpi,
+                image_format=image_format,
+                jpeg_quality=jpeg_quality,
+                image_loader=get_stamp_image_bytes
+            )
+            new_page = output_doc.new_page(width=width, height=height)
+            new_page.insert_image(new_page.rect, stream=image_bytes)
+
+        if progress_callback:
+            progress_callback(total_pages, total_pages)
+
+        if len(output_doc) == 0:
             print("⚠ تحذير: لم يتم إنشاء أي صفحات في الملف الناتج.")
+            return False
 
-        return True
+        target_path = _save_target_path(input_path, output_path)
+        output_doc.save(target_path, garbage=4, deflate=True, clean=True)
+    finally:
+        output_doc.close()
+        input_doc.close()
 
-    except Exception as e:
-        print(f"❌ خطأ فادح في حفظ PDF بطريقة الصورة: {e}")
-        import traceback
-        print(f"تفاصيل الخطأ: {traceback.format_exc()}")
-        return False
+    _finish_save(target_path, output_path)
+    return True
+
+def _render_pages_parallel(input_path, output_doc, total_pages, page_rotations, stamp_data, scene_size,
+                           dpi, image_format, jpeg_quality, workers, progress_callback, cancel_check):
+    """
+    تحويل الصفحات بالتوازي وإدراجها في المستند الناتج بترتيبها الأصلي فور توفرها.
+
+    Returns:
+        bool: False إذا تم الإلغاء
+    """
+    tasks = []
+    for chunk in split_into_chunks(total_pages, workers):
+        chunk_rotations = {p: page_rotations.get(p, 0) for p in chunk}
+        chunk_stamps = {p: stamp_data[p] for p in chunk if p in stamp_data}
+        tasks.append((input_path, chunk, chunk_rotations, chunk_stamps, scene_size,
+                      dpi, image_format, jpeg_quality))
+
+    print(f"تحويل {total_pages} صفحة باستخدام {workers} عملية متوازية")
+    pending = {}
+    next_page = 0
+    completed_pages = 0
+    # spawn: العمليات لا ترث حالة Qt متعددة الخيوط من خيط الحفظ كما يحدث مع fork
+    results = run_in_pool(_render_page_chunk, tasks, workers, mp_context=WORKER_MP_CONTEXT)
+    try:
+        for _, rendered, exc in results:
+            if exc is not None:
+                raise exc
+            for page_num, width, height, image_bytes in rendered:
+                pending[page_num] = (width, height, image_bytes)
+            completed_pages += len(rendered)
+
+            # إدراج الصفحات المتتالية الجاهزة فقط للحفاظ على الترتيب
+            while next_page in pending:
+                width, height, image_bytes = pending.pop(next_page)
+                new_page = output_doc.new_page(width=width, height=height)
+                new_page.insert_image(new_page.rect, stream=image_bytes)
+                next_page += 1
+
+            if progress_callback:
+                progress_callback(completed_pages, total_pages)
+            if cancel_check and cancel_check():
+                print(f"تم إلغاء العملية بعد {completed_pages} صفحة")
+                return False
     finally:
-        # 7. تنظيف الملفات المؤقتة
-        if 'output_doc' in locals() and output_doc:
-            output_doc.close()
-        if 'input_doc' in locals() and input_doc:
-            input_doc.close()
-            
-        print("\nتنظيف الملفات المؤقتة...")
-        for f in temp_files:
-            try:
-                os.remove(f)
-                print(f"  - تم حذف: {f}")
-            except OSError as e:
-                print(f"  - فشل حذف {f}: {e}")
+        results.close()
+    return True
 
 def create_stamped_image(base_pixmap, stamps, scene_rect):
     """
@@ -255,11 +343,7 @@ def create_stamped_image(base_pixmap, stamps, scene_rect):
             return base_pixmap
 
         for stamp in stamps:
-            stamp_data = stamp.get_stamp_data()
-            stamp_pixmap = QPixmap(stamp_data['image_path'])
-            if stamp_pixmap.isNull():
-                print(f"تحذير: لا يمكن تحميل صورة الختم: {stamp_data['image_path']}")
-                continue
+            stamp_data = stamp if isinstance(stamp, dict) else stamp.get_stamp_data()
 
             original_pos = stamp_data['position']
             original_width = stamp_data['current_width']
@@ -275,9 +359,18 @@ def create_stamped_image(base_pixmap, stamps, scene_rect):
             target_width = width_ratio * target_rect.width()
             target_height = height_ratio * target_rect.height()
             
+            # صورة مصغرة مسبقاً بالحجم المطلوب من الذاكرة المشتركة
+            stamp_image = stamp_cache.get_image(
+                stamp_data['image_path'],
+                (max(1, round(target_width)), max(1, round(target_height)))
+            )
+            if stamp_image.isNull():
+                print(f"تحذير: لا يمكن تحميل صورة الختم: {stamp_data['image_path']}")
+                continue
+
             painter.setOpacity(stamp_data['opacity'])
             target_draw_rect = QRectF(target_x, target_y, target_width, target_height)
-            painter.drawPixmap(target_draw_rect, stamp_pixmap, stamp_pixmap.rect())
+            painter.drawImage(target_draw_rect, stamp_image, QRectF(stamp_image.rect()))
             painter.setOpacity(1.0)
 
         painter.end()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+رسم الأختام بدون Qt - تستخدمه العمليات المتوازية والمعالجة بدون واجهة
+Stamp Rendering - Qt-free stamping helpers safe to import in worker processes
+"""
+
+import io
+import os
+from functools import lru_cache
+
+import fitz  # PyMuPDF
+
+from src.utils.logger import warning
+
+
+def normalize_opacity(opacity):
+    """تقييد الشفافية بين 0 و 1 وتقريبها (تستخدم أيضاً كجزء من مفاتيح الذاكرة المؤقتة)"""
+    return round(max(0.0, min(1.0, float(opacity))), 3)
+
+
+def encode_stamp_png(image_path, opacity=1.0):
+    """
+    ترميز صورة الختم كـ PNG مع دمج الشفافية في قناة ألفا (للإدراج في ملفات PDF).
+    المرمز الوحيد للأختام: تستخدمه stamp_cache في الواجهة والعمليات المتوازية هنا.
+    """
+    from PIL import Image
+
+    opacity = normalize_opacity(opacity)
+    with Image.open(image_path) as img:
+        img = img.convert("RGBA")
+        if opacity < 1.0:
+            alpha = img.getchannel("A").point(lambda a: int(a * opacity))
+            img.putalpha(alpha)
+        buffer = io.BytesIO()
+        img.save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=32)
+def _cached_stamp_png(image_path, mtime, opacity):
+    """نسخة مخزنة من encode_stamp_png (مفتاح الذاكرة يشمل وقت التعديل)"""
+    return encode_stamp_png(image_path, opacity)
+
+
+def load_stamp_png(image_path, opacity=1.0):
+    """
+    صورة الختم كـ PNG بذاكرة مؤقتة خاصة بالعملية الحالية.
+    العملية الرئيسية تستخدم stamp_cache المشتركة بدلاً منها (انظر stamp_processor).
+    """
+    return _cached_stamp_png(os.path.abspath(image_path), os.path.getmtime(image_path),
+                             normalize_opacity(opacity))
+
+
+def collect_stamp_data(page_stamps):
+    """
+    تحويل كائنات الأختام إلى قواميس بيانات بسيطة قابلة للنقل بين الخيوط والعمليات.
+
+    Args:
+        page_stamps (dict): {page_num: [InteractiveStamp أو dict]}
+
+    Returns:
+        dict: {page_num: [stamp_data]}
+    """
+    stamp_data = {}
+    for page_num, stamps in (page_stamps or {}).items():
+        page_data = []
+        for stamp in stamps:
+            try:
+                page_data.append(stamp if isinstance(stamp, dict) else stamp.get_stamp_data())
+            except RuntimeError:
+                # الختم حُذف من المشهد
+                continue
+        if page_data:
+            stamp_data[page_num] = page_data
+    return stamp_data
+
+
+def get_scene_size(scene_rect):
+    """إرجاع (العرض، الارتفاع) للمشهد من QRectF أو tuple."""
+    if scene_rect is None:
+        return None
+    if isinstance(scene_rect, (tuple, list)):
+        width, height = scene_rect[-2], scene_rect[-1]
+    else:
+        width, height = scene_rect.width(), scene_rect.height()
+    if not width or not height:
+        return None
+    return float(width), float(height)
+
+
+def map_stamp_rect(page, stamp_data, scene_size):
+    """
+    تحويل مستطيل الختم من إحداثيات المشهد إلى إحداثيات الصفحة غير المدورة.
+    المشهد يمثل الصفحة كما تظهر (بعد التدوير)، لذلك نحسب النسب على page.rect
+    ثم نطبق derotation_matrix للوصول إلى نظام إحداثيات المحتوى.
+    """
+    scene_width, scene_height = scene_size
+    page_rect = page.rect
+
+    x0 = stamp_data['position'][0] / scene_width * page_rect.width
+    y0 = stamp_data['position'][1] / scene_height * page_rect.height
+    width = stamp_data['current_width'] / scene_width * page_rect.width
+    height = stamp_data['current_height'] / scene_height * page_rect.height
+
+    visual_rect = fitz.Rect(x0, y0, x0 + width, y0 + height)
+    return visual_rect * page.derotation_matrix
+
+
+def stamp_page_vector(page, stamps, scene_size, xref_cache, image_loader=None):
+    """
+    إضافة الأختام إلى صفحة PDF كصور دون المساس بمحتواها الأصلي.
+    كل صورة ختم تُضمَّن مرة واحدة في المستند ويعاد استخدام xref الخاص بها.
+
+    Args:
+        page (fitz.Page): الصفحة (بعد تطبيق التدوير)
+        stamps (list): قائمة بيانات الأختام (من get_stamp_data)
+        scene_size (tuple): (عرض، ارتفاع) المشهد الذي وضعت فيه الأختام
+        xref_cache (dict): {(image_path, opacity): xref} خاص بالمستند الحالي
+        image_loader (callable): (image_path, opacity) -> PNG bytes (افتراضياً load_stamp_png)
+
+    Returns:
+        int: عدد الأختام المضافة
+    """
+    image_loader = image_loader or load_stamp_png
+    added = 0
+    for stamp_data in stamps:
+        image_path = stamp_data['image_path']
+        if not os.path.exists(image_path):
+            warning(f"لا يمكن تحميل صورة الختم: {image_path}")
+            continue
+
+        rect = map_stamp_rect(page, stamp_data, scene_size)
+        if rect.is_empty:
+            continue
+
+        key = (image_path, normalize_opacity(stamp_data.get('opacity', 1.0)))
+        xref = xref_cache.get(key, 0)
+        if xref:
+            page.insert_image(rect, xref=xref, rotate=page.rotation, keep_proportion=False)
+        else:
+            xref_cache[key] = page.insert_image(
+                rect,
+                stream=image_loader(image_path, key[1]),
+                rotate=page.rotation,
+                keep_proportion=False
+            )
+        added += 1
+    return added
+
+
+def render_stamped_page(page, rotation, stamps, scene_size, xref_cache, dpi=216,
+                        image_format="PNG", jpeg_quality=90, image_loader=None):
+    """
+    تحويل صفحة واحدة مع أختامها إلى صورة مرمزة في الذاكرة.
+    الأختام تضاف أولاً كصور متجهية ثم يرسم MuPDF الصفحة كاملة، فلا حاجة لـ QPainter أو ملفات مؤقتة.
+
+    Args:
+        page (fitz.Page): الصفحة (من مستند مفتوح للقراءة فقط؛ التعديلات لا تحفظ)
+        rotation (int): زاوية التدوير الإضافية
+        stamps (list): بيانات الأختام لهذه الصفحة
+        scene_size (tuple): أبعاد المشهد أو None
+        xref_cache (dict): ذاكرة xref الخاصة بالمستند المصدر
+        dpi (int): دقة التحويل
+        image_format (str): "PNG" أو "JPEG"
+        jpeg_quality (int): جودة JPEG
+        image_loader (callable): محمل صور الأختام (انظر stamp_page_vector)
+
+    Returns:
+        tuple: (page_width, page_height, image_bytes) بالنقاط
+    """
+    if rotation:
+        page.set_rotation((page.rotation + rotation) % 360)
+    if stamps and scene_size:
+        stamp_page_vector(page, stamps, scene_size, xref_cache, image_loader)
+
+    zoom = dpi / 72.0
+    pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+    if image_format.upper() in ("JPEG", "JPG"):
+        image_bytes = pixmap.tobytes("jpeg", jpg_quality=jpeg_quality)
+    else:
+        image_bytes = pixmap.tobytes("png")
+
+    return page.rect.width, page.rect.height, image_bytes
+
+
+def _render_page_chunk(input_path, page_numbers, page_rotations, stamp_data, scene_size,
+                       dpi, image_format, jpeg_quality):
+    """
+    مهمة عامل: فتح نسخة مستقلة من المستند وتحويل مجموعة صفحات إلى صور.
+
+    Returns:
+        list: [(page_num, page_width, page_height, image_bytes)]
+    """
+    doc = fitz.open(input_path)
+    try:
+        xref_cache = {}
+        rendered = []
+        for page_num in page_numbers:
+            width, height, image_bytes = render_stamped_page(
+                doc[page_num],
+                page_rotations.get(page_num, 0) % 360,
+                stamp_data.get(page_num, []),
+                scene_size,
+                xref_cache,
+                dpi=dpi,
+                image_format=image_format,
+                jpeg_quality=jpeg_quality
+            )
+            rendered.append((page_num, width, height, image_bytes))
+        return rendered
+    finally:
+        doc.close()
@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+قوالب الأختام - تطبيق نفس الأختام على عدة ملفات PDF دون واجهة
+Stamp Templates - Headless batch stamping from saved placements
+"""
+
+import os
+import json
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import fitz  # PyMuPDF
+
+from src.utils.logger import info, error
+from src.utils.parallel import collect_files, run_in_pool, unique_output_path
+from src.core.stamp_render import collect_stamp_data, stamp_page_vector, get_scene_size
+
+TEMPLATE_VERSION = 1
+
+# محددات الصفحات المدعومة إضافة إلى النطاقات مثل "1-3,5"
+PAGE_SELECTORS = ("all", "first", "last", "odd", "even")
+
+
+def get_templates_folder() -> str:
+    """
+    الحصول على مجلد قوالب الأختام داخل مجلد الإعدادات.
+    Get the stamp templates folder inside the settings directory.
+    """
+    from src.utils.settings import get_settings_directory
+    folder = os.path.join(get_settings_directory(), "stamp_templates")
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def resolve_page_selector(selector: Union[str, List[int]], total_pages: int) -> List[int]:
+    """
+    تحويل محدد الصفحات إلى قائمة أرقام صفحات (تبدأ من 0).
+    Resolve a page selector to 0-based page indices.
+
+    Args:
+        selector: "all", "first", "last", "odd", "even", a range string such as "1-3,5"
+                  (1-based) or a list of 1-based page numbers
+        total_pages (int): Number of pages in the document
+
+    Returns:
+        List[int]: Sorted 0-based page indices
+    """
+    if total_pages <= 0:
+        return []
+
+    if isinstance(selector, (list, tuple)):
+        return sorted({p - 1 for p in selector if 1 <= p <= total_pages})
+
+    selector = (selector or "all").strip().lower()
+    if selector == "all":
+        return list(range(total_pages))
+    if selector == "first":
+        return [0]
+    if selector == "last":
+        return [total_pages - 1]
+    if selector == "odd":
+        return list(range(0, total_pages, 2))
+    if selector == "even":
+        return list(range(1, total_pages, 2))
+
+    pages = set()
+    for part in selector.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start = int(start) if start.strip() else 1
+            end = int(end) if end.strip() else total_pages
+            pages.update(range(max(1, start), min(end, total_pages) + 1))
+        else:
+            page = int(part)
+            if 1 <= page <= total_pages:
+                pages.add(page)
+    return sorted(p - 1 for p in pages)
+
+
+def create_stamp_template(page_stamps: dict, scene_rect, page_selector: Optional[str] = None,
+                          name: str = "") -> dict:
+    """
+    إنشاء قالب من الأختام الموضوعة تفاعلياً.
+    Build a template from interactively placed stamps.
+
+    Positions and sizes are normalized to the scene (0..1) so the template can be
+    applied to pages of any size. Without a selector, each placement's 'pages' holds
+    only the (1-based) page it was placed on.
+
+    Args:
+        page_stamps (dict): {page_num: [InteractiveStamp or stamp_data]}
+        scene_rect (QRectF | tuple): Scene the stamps were placed in
+        page_selector (Optional[str]): Pages every placement applies to (see
+                                       resolve_page_selector); None keeps each stamp on its own page
+        name (str): Template name
+
+    Returns:
+        dict: Template data
+    """
+    scene_size = get_scene_size(scene_rect)
+    if scene_size is None:
+        raise ValueError("أبعاد المشهد غير صالحة لإنشاء قالب الأختام")
+
+    scene_width, scene_height = scene_size
+    placements = []
+    for page_num, stamps in sorted(collect_stamp_data(page_stamps).items()):
+        for stamp_data in stamps:
+            placements.append({
+                'image_path': stamp_data['image_path'],
+                'x': stamp_data['position'][0] / scene_width,
+                'y': stamp_data['position'][1] / scene_height,
+                'width': stamp_data['current_width'] / scene_width,
+                'height': stamp_data['current_height'] / scene_height,
+                'opacity': stamp_data.get('opacity', 1.0),
+                'pages': page_selector if page_selector else [page_num + 1]
+            })
+
+    return {
+        'version': TEMPLATE_VERSION,
+        'name': name,
+        'stamps': placements
+    }
+
+
+def save_stamp_template(template: dict, file_path: str) -> bool:
+    """
+    حفظ قالب الأختام في ملف JSON.
+    Save a stamp template as JSON.
+    """
+    try:
+        output_dir = os.path.dirname(file_path)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(template, f, ensure_ascii=False, indent=2)
+        info(f"تم حفظ قالب الأختام: {file_path}")
+        return True
+    except Exception as e:
+        error(f"فشل في حفظ قالب الأختام: {e}")
+        return False
+
+
+def load_stamp_template(file_path: str) -> dict:
+    """
+    تحميل قالب أختام من ملف JSON والتحقق من بنيته.
+    Load and validate a stamp template.
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        template = json.load(f)
+
+    if not isinstance(template, dict) or not isinstance(template.get('stamps'), list):
+        raise ValueError(f"ملف قالب غير صالح: {file_path}")
+    for placement in template['stamps']:
+        for key in ('image_path', 'x', 'y', 'width', 'height'):
+            if key not in placement:
+                raise ValueError(f"بيانات ختم ناقصة في القالب ({key}): {file_path}")
+    return template
+
+
+def apply_stamp_template(input_file: str, output_file: str, template: dict) -> bool:
+    """
+    تطبيق قالب الأختام على ملف PDF واحد باستخدام الإدراج المتجهي.
+    Apply a stamp template to one PDF using vector image insertion.
+
+    Args:
+        input_file (str): Path to the input PDF file
+        output_file (str): Path for the stamped output PDF file
+        template (dict): Template data (see create_stamp_template)
+
+    Returns:
+        bool: True if stamping was successful, False otherwise
+    """
+    try:
+        if not os.path.exists(input_file):
+            raise FileNotFoundError(f"الملف غير موجود: {input_file}")
+
+        doc = fitz.open(input_file)
+        try:
+            total_pages = len(doc)
+
+            # تجميع الأختام لكل صفحة بإحداثيات المشهد الموحد (1×1)
+            page_stamps: Dict[int, list] = {}
+            for placement in template['stamps']:
+                stamp_data = {
+                    'image_path': placement['image_path'],
+                    'position': (placement['x'], placement['y']),
+                    'current_width': placement['width'],
+                    'current_height': placement['height'],
+                    'opacity': placement.get('opacity', 1.0)
+                }
+                for page_num in resolve_page_selector(placement.get('pages', 'all'), total_pages):
+                    page_stamps.setdefault(page_num, []).append(stamp_data)
+
+            xref_cache = {}
+            stamp_count = 0
+            for page_num, stamps in sorted(page_stamps.items()):
+                stamp_count += stamp_page_vector(doc[page_num], stamps, (1.0, 1.0), xref_cache)
+
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+
+            doc.save(output_file, garbage=3, deflate=True)
+        finally:
+            doc.close()
+
+        info(f"تم ختم {os.path.basename(input_file)}: {stamp_count} ختم في {len(page_stamps)} صفحة")
+        return True
+
+    except Exception as e:
+        error(f"خطأ في تطبيق قالب الأختام على {input_file}: {str(e)}")
+        return False
+
+
+def _apply_template_task(input_file: str, output_file: str, template: dict) -> tuple:
+    """مهمة عامل: تطبيق القالب على ملف واحد مع قياس الوقت."""
+    start_time = time.perf_counter()
+    success = apply_stamp_template(input_file, output_file, template)
+    return success, time.perf_counter() - start_time
+
+
+def batch_apply_stamp_template(inputs: Union[str, List[str]], output_folder: str, template: Union[dict, str],
+                               max_workers: Optional[int] = None, recursive: bool = False,
+                               patterns: Optional[List[str]] = None,
+                               progress_callback: Optional[Callable[[int, int, dict], None]] = None) -> dict:
+    """
+    تطبيق قالب أختام على مجلد أو قائمة ملفات PDF بشكل متوازٍ.
+    Apply a stamp template to a folder or list of PDFs in parallel worker processes.
+
+    Args:
+        inputs: Folder path or list of PDF file paths
+        output_folder (str): Folder for stamped files
+        template: Template data or path to a template JSON file
+        max_workers (Optional[int]): Concurrency limit (defaults to the performance settings)
+        recursive (bool): Traverse sub-folders when inputs is a folder
+        patterns (Optional[List[str]]): Glob filters for file names (default: ["*.pdf"])
+        progress_callback (Optional[Callable]): Called as (done, total, file_result) after each file
+
+    Returns:
+        Dictionary containing stamping results and timing
+    """
+    results = {
+        'processed': 0,
+        'successful': 0,
+        'failed': 0,
+        'files': [],
+        'elapsed_time': 0.0
+    }
+    start_time = time.perf_counter()
+
+    try:
+        if isinstance(template, str):
+            template = load_stamp_template(template)
+
+        if isinstance(inputs, str):
+            if not os.path.isdir(inputs):
+                raise FileNotFoundError(f"المجلد غير موجود: {inputs}")
+            base_folder = inputs
+            pdf_files = collect_files(inputs, patterns or ["*.pdf"], recursive)
+        else:
+            base_folder = None
+            pdf_files = [f for f in inputs if os.path.exists(f)]
+
+        os.makedirs(output_folder, exist_ok=True)
+        info(f"تطبيق قالب الأختام على {len(pdf_files)} ملف PDF")
+
+        tasks = []
+        used_outputs = set()
+        for input_path in pdf_files:
+            relative_path = os.path.relpath(input_path, base_folder) if base_folder else os.path.basename(input_path)
+            relative_dir, filename = os.path.split(relative_path)
+            target_dir = os.path.join(output_folder, relative_dir)
+            os.makedirs(target_dir, exist_ok=True)
+            output_path = unique_output_path(os.path.join(target_dir, f"stamped_{filename}"), used_outputs)
+            tasks.append((input_path, output_path, template))
+
+        file_results = [None] * len(tasks)
+        for index, outcome, exc in run_in_pool(_apply_template_task, tasks, max_workers):
+            success, duration = outcome if exc is None else (False, 0.0)
+            if exc is not None:
+                error(f"خطأ في ختم {tasks[index][0]}: {exc}")
+
+            file_result = {
+                'filename': os.path.basename(tasks[index][0]),
+                'output_path': tasks[index][1],
+                'status': 'نجح' if success else 'فشل',
+                'duration': round(duration, 3)
+            }
+            file_results[index] = file_result
+
+            results['processed'] += 1
+            results['successful' if success else 'failed'] += 1
+            if progress_callback:
+                progress_callback(results['processed'], len(tasks), file_result)
+
+        results['files'] = [r for r in file_results if r is not None]
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        info(f"النتائج: {results['successful']} نجح، {results['failed']} فشل خلال {results['elapsed_time']} ثانية")
+        return results
+
+    except Exception as e:
+        error(f"خطأ في الختم المجمع: {str(e)}")
+        results['elapsed_time'] = round(time.perf_counter() - start_time, 3)
+        return results
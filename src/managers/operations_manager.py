@@ -734,15 +734,15 @@ class OperationsManager:
             return False
 
     def pdf_to_images(self, files, output_dir):
-        """تحويل PDF إلى صور"""
+        """تحويل PDF إلى صور (ملف أو عدة ملفات)"""
         try:
-            # يفترض أن files تحتوي على ملف واحد فقط لهذه العملية
-            if not files or len(files) != 1:
-                self.message_manager.show_error("يجب تحديد ملف PDF واحد فقط.")
+            if not files:
+                self.message_manager.show_error("يجب تحديد ملف PDF واحد على الأقل.")
                 return False
-            
-            success = self.convert_module.pdf_to_images(files[0], output_dir)
-            if success:
+
+            failed = [job['input'] for job in self.create_conversion_jobs("pdf_to_images", files, output_dir)
+                      if not job['function'](**job['kwargs'])]
+            if not failed:
                 return True
             else:
                 self.message_manager.show_error("فشل في تحويل PDF إلى صور.")
@@ -751,14 +751,14 @@ class OperationsManager:
             self.message_manager.show_error(f"حدث خطأ غير متوقع: {str(e)}")
             return False
 
-    def images_to_pdf(self, files, output_path):
-        """تحويل صور إلى PDF"""
+    def images_to_pdf(self, files, output_path, preprocess=None):
+        """تحويل صور إلى PDF (مع معالجة مسبقة اختيارية للصور)"""
         try:
             if not files:
                 self.message_manager.show_error("يجب تحديد صورة واحدة على الأقل.")
                 return False
 
-            success = self.convert_module.images_to_pdf(files, output_path)
+            success = self.convert_module.images_to_pdf(files, output_path, preprocess=preprocess)
             if success:
                 return True
             else:
@@ -769,14 +769,15 @@ class OperationsManager:
             return False
 
     def pdf_to_text(self, files, output_path):
-        """استخراج النص من PDF"""
+        """استخراج النص من PDF (ملف أو عدة ملفات)"""
         try:
-            if not files or len(files) != 1:
-                self.message_manager.show_error("يجب تحديد ملف PDF واحد فقط.")
+            if not files:
+                self.message_manager.show_error("يجب تحديد ملف PDF واحد على الأقل.")
                 return False
 
-            success = self.convert_module.pdf_to_text(files[0], output_path)
-            if success:
+            failed = [job['input'] for job in self.create_conversion_jobs("pdf_to_text", files, output_path)
+                      if not job['function'](**job['kwargs'])]
+            if not failed:
                 return True
             else:
                 self.message_manager.show_error("فشل في استخراج النص من PDF.")
@@ -786,14 +787,15 @@ class OperationsManager:
             return False
 
     def text_to_pdf(self, files, output_path):
-        """تحويل نص إلى PDF"""
+        """تحويل نص إلى PDF (ملف أو عدة ملفات)"""
         try:
-            if not files or len(files) != 1:
-                self.message_manager.show_error("يجب تحديد ملف نصي واحد فقط.")
+            if not files:
+                self.message_manager.show_error("يجب تحديد ملف نصي واحد على الأقل.")
                 return False
 
-            success = self.convert_module.text_to_pdf(files[0], output_path, 12)
-            if success:
+            failed = [job['input'] for job in self.create_conversion_jobs("text_to_pdf", files, output_path)
+                      if not job['function'](**job['kwargs'])]
+            if not failed:
                 return True
             else:
                 self.message_manager.show_error("فشل في تحويل النص إلى PDF.")
@@ -802,6 +804,75 @@ class OperationsManager:
             self.message_manager.show_error(f"حدث خطأ غير متوقع: {str(e)}")
             return False
 
+    def create_conversion_jobs(self, operation, files, save_path, max_concurrent=1):
+        """
+        تجهيز مهام التحويل لكل ملف (تستخدمها الطوابير الخلفية والتنفيذ المباشر).
+
+        With several input files, outputs are derived from save_path: pdf_to_images
+        writes each file into its own sub-folder, while pdf_to_text/text_to_pdf write
+        <name>_نص.txt / <name>_محول.pdf next to save_path. Inputs sharing a name get a
+        numeric suffix (<name>_2 ...) so no job overwrites another. images_to_pdf
+        always produces a single job.
+
+        Returns:
+            list: [{'input', 'output', 'function', 'kwargs', 'reports_progress'}, ...]
+        """
+        from src.utils.parallel import get_worker_count, unique_output_path
+
+        # توزيع عمال الصفحات على الملفات المتزامنة حتى لا يتضاعف عدد العمليات
+        page_workers = max(1, get_worker_count() // max(1, max_concurrent))
+        multiple = len(files) > 1
+        jobs = []
+        used_outputs = set()
+
+        if operation == "images_to_pdf":
+            return [{
+                'input': files[0],
+                'output': save_path,
+                'function': self.convert_module.images_to_pdf,
+                'kwargs': {'image_files': list(files), 'output_file': save_path,
+                           'max_workers': page_workers},
+                'reports_progress': True
+            }]
+
+        for file_path in files:
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            if operation == "pdf_to_images":
+                output = unique_output_path(os.path.join(save_path, name), used_outputs) if multiple else save_path
+                jobs.append({
+                    'input': file_path,
+                    'output': output,
+                    'function': self.convert_module.pdf_to_images,
+                    'kwargs': {'input_file': file_path, 'output_folder': output,
+                               'max_workers': page_workers},
+                    'reports_progress': True
+                })
+            elif operation == "pdf_to_text":
+                output = (unique_output_path(os.path.join(os.path.dirname(save_path), f"{name}_نص.txt"), used_outputs)
+                          if multiple else save_path)
+                jobs.append({
+                    'input': file_path,
+                    'output': output,
+                    'function': self.convert_module.pdf_to_text,
+                    'kwargs': {'input_file': file_path, 'output_file': output,
+                               'max_workers': page_workers},
+                    'reports_progress': True
+                })
+            elif operation == "text_to_pdf":
+                output = (unique_output_path(os.path.join(os.path.dirname(save_path), f"{name}_محول.pdf"), used_outputs)
+                          if multiple else save_path)
+                jobs.append({
+                    'input': file_path,
+                    'output': output,
+                    'function': self.convert_module.text_to_pdf,
+                    'kwargs': {'input_file': file_path, 'output_file': output, 'font_size': 12},
+                    'reports_progress': False
+                })
+            else:
+                raise ValueError(f"عملية تحويل غير معروفة: {operation}")
+
+        return jobs
+
     def _check_pywin32_available(self):
         """فحص توفر pywin32 بهدوء"""
         try:
@@ -929,7 +1000,11 @@ class OperationsManager:
         try:
             success = self.security_module.encrypt_pdf(file_path, output_path, password, owner_password, permissions)
             if success:
-                self.message_manager.show_success(f"تم تشفير الملف بنجاح!\nحُفظ في: {output_path}")
+                message = f"تم تشفير الملف بنجاح!\nحُفظ في: {output_path}"
+                if self.security_module.generates_owner_password(owner_password, permissions):
+                    message += ("\nتم توليد كلمة مالك عشوائية لتطبيق الأذونات ولا يمكن استرجاعها؛"
+                                " احتفظ بالملف الأصلي إذا احتجت لتغيير الأذونات لاحقاً.")
+                self.message_manager.show_success(message)
             else:
                 self.message_manager.show_error("فشل تشفير الملف.")
         except Exception as e:
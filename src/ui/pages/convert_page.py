@@ -31,6 +31,12 @@ class ConvertPage(BasePageWidget):
         self.active_operation = ""  # قيمة فارغة تعني عدم اختيار أي تبويب
         self.has_unsaved_changes = False
 
+        # طابور التحويل في الخلفية
+        self.conversion_thread = None
+        self.conversion_worker = None
+        self.conversion_jobs = []
+        self.file_fractions = {}
+
         # إزالة التخطيطات الافتراضية من BasePageWidget
         if hasattr(self, 'title_layout'):
             self.main_layout.removeItem(self.title_layout)
@@ -241,7 +247,7 @@ class ConvertPage(BasePageWidget):
 
         self.add_files_btn = create_button(tr("add_files_convert"), on_click=self.select_files)
         make_theme_aware(self.add_files_btn, "special_button")
-        self.cancel_btn = create_button(tr("cancel_operation"), on_click=self.full_reset)
+        self.cancel_btn = create_button(tr("cancel_operation"), on_click=self.on_cancel_clicked)
         make_theme_aware(self.cancel_btn, "danger_button")
 
         # إخفاء الأزرار افتراضياً
@@ -322,6 +328,14 @@ class ConvertPage(BasePageWidget):
         self.execute_btn.clicked.connect(self.execute_conversion)
         self.execute_btn.setMinimumHeight(40)
         execute_layout.addWidget(self.execute_btn)
+
+        # شريط تقدم طابور التحويل (يظهر أثناء التنفيذ فقط)
+        from PySide6.QtWidgets import QProgressBar
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setTextVisible(True)
+        self.progress_bar.hide()
+        execute_layout.addWidget(self.progress_bar)
         execute_layout.addStretch()
 
         # إضافة الفريمين للتخطيط
@@ -421,7 +435,7 @@ class ConvertPage(BasePageWidget):
             "pdf_to_text": tr("pdf_files_filter"),
             "text_to_pdf": tr("text_files_filter"),
         }
-        multiple = self.active_operation == "images_to_pdf"
+        multiple = True
         title = self.convert_options.get(self.active_operation, "")
         files = self.file_manager.select_file(title, file_filters.get(self.active_operation, tr("all_files_filter")), multiple=multiple)
         if not files: 
@@ -501,9 +515,24 @@ class ConvertPage(BasePageWidget):
         """إعادة تعيين كاملة للواجهة بما في ذلك التبويبات."""
         self.reset_ui(reset_tabs=True)
 
+    def on_cancel_clicked(self):
+        """إلغاء التحويل الجاري إن وُجد، وإلا إعادة تعيين الواجهة"""
+        if self.is_converting():
+            self.conversion_worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            return
+        self.full_reset()
+
+    def is_converting(self):
+        """هل يوجد طابور تحويل قيد التنفيذ؟"""
+        return self.conversion_worker is not None
+
     def execute_conversion(self):
-        """تنفيذ عملية التحويل"""
+        """تنفيذ عملية التحويل لكل الملفات في طابور خلفي"""
         try:
+            if self.is_converting():
+                return
+
             files = self.file_list_frame.get_valid_files()
             if not files:
                 self.notification_manager.show_notification(tr("no_files_for_conversion"), "warning")
@@ -519,35 +548,105 @@ class ConvertPage(BasePageWidget):
                 return
             save_path = self.current_save_path
 
-            self.notification_manager.show_notification(tr('converting_files_notification_count', count=len(files)), "info", 2000)
+            from src.core.conversion_queue import ConversionQueueWorker, DEFAULT_MAX_CONCURRENT
+            try:
+                self.conversion_jobs = self.operations_manager.create_conversion_jobs(
+                    self.active_operation, files, save_path, DEFAULT_MAX_CONCURRENT
+                )
+            except ValueError:
+                self.notification_manager.show_notification(tr("invalid_operation_error"), "error")
+                return
 
-            # تحديد الدالة المناسبة بناءً على العملية النشطة
-            conversion_functions = {
-                "pdf_to_images": self.operations_manager.pdf_to_images,
-                "images_to_pdf": self.operations_manager.images_to_pdf,
-                "pdf_to_text": self.operations_manager.pdf_to_text,
-                "text_to_pdf": self.operations_manager.text_to_pdf,
-            }
+            self.conversion_file_count = len(files)
+            self.notification_manager.show_notification(tr('converting_files_notification_count', count=len(files)), "info", 2000)
 
-            # استدعاء دالة التحويل الفعلية
-            convert_function = conversion_functions.get(self.active_operation)
-            if convert_function:
-                success = convert_function(files, save_path)
-                if success:
-                    self.notification_manager.show_notification(tr('conversion_completed_notification_count', count=len(files)), "success", 3000)
-                    # عند النجاح، قم بإعادة تعيين الواجهة
-                    self.reset_ui()
-                else:
-                    self.notification_manager.show_notification(tr('conversion_error_occurred'), "error")
-            else:
-                self.notification_manager.show_notification(tr("invalid_operation_error"), "error")
+            # إعداد شريط التقدم
+            self.file_fractions = {}
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("%p%")
+            self.progress_bar.show()
+            self.set_conversion_controls_enabled(False)
+
+            # إنشاء وتشغيل العامل
+            from PySide6.QtCore import QThread
+            self.conversion_thread = QThread()
+            self.conversion_worker = ConversionQueueWorker(self.conversion_jobs, DEFAULT_MAX_CONCURRENT)
+            self.conversion_worker.moveToThread(self.conversion_thread)
+
+            # ربط الإشارات
+            self.conversion_thread.started.connect(self.conversion_worker.run)
+            self.conversion_worker.file_started.connect(self.on_conversion_file_started)
+            self.conversion_worker.file_progress.connect(self.on_conversion_file_progress)
+            self.conversion_worker.file_finished.connect(self.on_conversion_file_finished)
+            self.conversion_worker.finished.connect(self.on_conversion_finished)
+
+            # تنظيف عند الانتهاء
+            self.conversion_worker.finished.connect(self.conversion_thread.quit)
+            self.conversion_worker.finished.connect(self.conversion_worker.deleteLater)
+            self.conversion_thread.finished.connect(self.conversion_thread.deleteLater)
+
+            self.conversion_thread.start()
 
         except Exception as e:
+            self.set_conversion_controls_enabled(True)
             self.notification_manager.show_notification(f"{tr('conversion_error_occurred')}: {str(e)}", "error")
 
+    def set_conversion_controls_enabled(self, enabled):
+        """تفعيل أو تعطيل عناصر التحكم أثناء التحويل"""
+        self.execute_btn.setEnabled(enabled)
+        self.add_files_btn.setEnabled(enabled)
+        self.change_path_btn.setEnabled(enabled)
+        self.file_list_frame.setEnabled(enabled)
+        self.cancel_btn.setEnabled(True)
+        for button in self.top_buttons.values():
+            button.setEnabled(enabled)
 
-
-
+    def _update_overall_progress(self, name=None):
+        """حساب التقدم الكلي من تقدم كل ملف"""
+        total = len(self.conversion_jobs)
+        if not total:
+            return
+        percent = int(sum(self.file_fractions.values()) / total * 100)
+        self.progress_bar.setValue(percent)
+        if name:
+            done = sum(1 for fraction in self.file_fractions.values() if fraction >= 1.0)
+            self.progress_bar.setFormat(tr("conversion_progress_file", current=min(done + 1, total),
+                                           total=total, name=name, percent=percent))
+
+    def on_conversion_file_started(self, index, name):
+        self.file_fractions[index] = 0.0
+        self._current_file_name = name
+        self._update_overall_progress(name)
+
+    def on_conversion_file_progress(self, index, done, total):
+        if total > 0:
+            self.file_fractions[index] = min(done / total, 0.99)
+            self._update_overall_progress(getattr(self, '_current_file_name', None))
+
+    def on_conversion_file_finished(self, index, success, output_path):
+        self.file_fractions[index] = 1.0
+        self._update_overall_progress(getattr(self, '_current_file_name', None))
+
+    def on_conversion_finished(self, results):
+        """معالجة انتهاء طابور التحويل"""
+        self.conversion_worker = None
+        self.conversion_thread = None
+        self.progress_bar.hide()
+        self.set_conversion_controls_enabled(True)
+
+        total = len(self.conversion_jobs)
+        if results['cancelled']:
+            self.notification_manager.show_notification(
+                tr("conversion_cancelled_notification", done=results['successful'], total=total), "warning", 4000)
+        elif results['failed']:
+            self.notification_manager.show_notification(
+                tr("conversion_partial_notification", success=results['successful'], failed=results['failed']),
+                "error" if not results['successful'] else "warning", 5000)
+        else:
+            self.notification_manager.show_notification(
+                tr('conversion_completed_notification_count', count=self.conversion_file_count), "success", 3000)
+            # عند النجاح، قم بإعادة تعيين الواجهة
+            self.reset_ui()
 
     def reset_ui(self, reset_tabs=True):
         """إعادة تعيين واجهة المستخدم إلى حالتها الأولية."""
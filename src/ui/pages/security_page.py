@@ -218,9 +218,19 @@ class SecurityPage(BasePage):
         copying_layout.addStretch()
         copying_layout.addWidget(self.allow_copying_cb)
 
+        modifying_layout = QHBoxLayout()
+        modifying_label = QLabel(tr("allow_modifying"))
+        make_theme_aware(modifying_label, "label")
+        self.allow_modifying_cb = ToggleSwitch()
+        self.allow_modifying_cb.setChecked(True)
+        modifying_layout.addWidget(modifying_label)
+        modifying_layout.addStretch()
+        modifying_layout.addWidget(self.allow_modifying_cb)
+
         password_layout.addWidget(permissions_label, 3, 0)
         password_layout.addLayout(printing_layout, 3, 1)
         password_layout.addLayout(copying_layout, 4, 1)
+        password_layout.addLayout(modifying_layout, 5, 1)
         
         content_layout.addWidget(password_container)
 
@@ -319,6 +329,7 @@ class SecurityPage(BasePage):
         self.owner_password_input.textChanged.connect(self.mark_as_changed)
         self.allow_printing_cb.stateChanged.connect(self.mark_as_changed)
         self.allow_copying_cb.stateChanged.connect(self.mark_as_changed)
+        self.allow_modifying_cb.stateChanged.connect(self.mark_as_changed)
         self.title_input.textChanged.connect(self.mark_as_changed)
         self.author_input.textChanged.connect(self.mark_as_changed)
         self.subject_input.textChanged.connect(self.mark_as_changed)
@@ -366,6 +377,7 @@ class SecurityPage(BasePage):
             permissions = {
                 'print': self.allow_printing_cb.isChecked(),
                 'copy': self.allow_copying_cb.isChecked(),
+                'modify': self.allow_modifying_cb.isChecked(),
             }
 
             info(f"بدء عملية التشفير للملف: {self.source_file}")
@@ -482,6 +494,7 @@ class SecurityPage(BasePage):
         permissions = {
             'print': self.allow_printing_cb.isChecked(),
             'copy': self.allow_copying_cb.isChecked(),
+            'modify': self.allow_modifying_cb.isChecked(),
         }
         
         info(f"بدء عملية التشفير للملف: {self.source_file}")
@@ -590,6 +603,7 @@ class SecurityPage(BasePage):
         self.owner_password_input.clear()
         self.allow_printing_cb.setChecked(True)
         self.allow_copying_cb.setChecked(True)
+        self.allow_modifying_cb.setChecked(True)
         self.update_ui_state()
         main_window = self._get_main_window()
         if main_window:
@@ -7,6 +7,7 @@ Interactive Stamp System
 from PySide6.QtWidgets import QGraphicsPixmapItem, QGraphicsItem
 from PySide6.QtGui import QPixmap, QPainter
 from PySide6.QtCore import Qt, QRectF, Signal, QObject
+from src.utils.smart_cache import stamp_cache
 
 class InteractiveStamp(QGraphicsPixmapItem):
     """ختم تفاعلي قابل للتحريك وتغيير الحجم"""
@@ -37,7 +38,7 @@ class InteractiveStamp(QGraphicsPixmapItem):
     def load_stamp_image(self):
         """تحميل صورة الختم مع حفظ المعلومات الأصلية"""
         try:
-            self.original_pixmap = QPixmap(self.image_path)
+            self.original_pixmap = stamp_cache.get_pixmap(self.image_path)
             if not self.original_pixmap.isNull():
                 # حفظ الأبعاد الأصلية
                 self.original_width = self.original_pixmap.width()
@@ -53,11 +54,10 @@ class InteractiveStamp(QGraphicsPixmapItem):
                     scale_h = 100.0 / self.original_height
                     self.initial_scale_factor = min(scale_w, scale_h)
 
-                    display_pixmap = self.original_pixmap.scaled(
-                        int(self.original_width * self.initial_scale_factor),
-                        int(self.original_height * self.initial_scale_factor),
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation
+                    display_pixmap = stamp_cache.get_pixmap(
+                        self.image_path,
+                        (int(self.original_width * self.initial_scale_factor),
+                         int(self.original_height * self.initial_scale_factor))
                     )
 
                 self.setPixmap(display_pixmap)
@@ -139,12 +139,8 @@ class InteractiveStamp(QGraphicsPixmapItem):
         new_width = int(self.original_width * final_scale)
         new_height = int(self.original_height * final_scale)
 
-        # تطبيق التحجيم من الصورة الأصلية للحصول على أفضل جودة
-        scaled_pixmap = self.original_pixmap.scaled(
-            new_width, new_height,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
-        )
+        # تطبيق التحجيم من الصورة الأصلية للحصول على أفضل جودة (مع إعادة استخدام الأحجام المحسوبة سابقاً)
+        scaled_pixmap = stamp_cache.get_pixmap(self.image_path, (new_width, new_height))
 
         self.setPixmap(scaled_pixmap)
 
@@ -207,18 +203,13 @@ class StampPreview(QGraphicsPixmapItem):
     def load_preview_image(self):
         """تحميل صورة المعاينة"""
         try:
-            pixmap = QPixmap(self.image_path)
-            if not pixmap.isNull():
+            image = stamp_cache.get_image(self.image_path)
+            if not image.isNull():
                 # تحديد حجم مناسب للمعاينة
-                if pixmap.width() > 80 or pixmap.height() > 80:
-                    scaled_pixmap = pixmap.scaled(
-                        80, 80, 
-                        Qt.AspectRatioMode.KeepAspectRatio, 
-                        Qt.TransformationMode.SmoothTransformation
-                    )
-                    self.setPixmap(scaled_pixmap)
+                if image.width() > 80 or image.height() > 80:
+                    self.setPixmap(stamp_cache.get_pixmap(self.image_path, (80, 80)))
                 else:
-                    self.setPixmap(pixmap)
+                    self.setPixmap(QPixmap.fromImage(image))
         except Exception as e:
             print(f"خطأ في تحميل معاينة الختم: {e}")
     
@@ -10,7 +10,7 @@ from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QScrollArea, QWidget,
     QLabel, QPushButton, QFileDialog, QMessageBox, QFrame
 )
-from PySide6.QtGui import QPixmap, QPainter
+from PySide6.QtGui import QPainter
 from PySide6.QtCore import Qt, QSize, Signal
 from src.ui.widgets.svg_icon_button import create_action_button
 from src.managers.theme_manager import make_theme_aware
@@ -19,7 +19,7 @@ from src.utils.translator import tr
 
 # استيراد النظام الجديد للتحميل السريع
 from utils.lazy_loader import global_image_loader
-from utils.smart_cache import image_cache
+from src.utils.smart_cache import stamp_cache
 
 def get_stamps_folder():
     """الحصول على مسار مجلد الأختام الصحيح"""
@@ -55,28 +55,12 @@ class StampItem(QLabel):
     def load_image(self):
         """تحميل وعرض الصورة مع تحسين الأداء"""
         try:
-            # محاولة الحصول على الصورة من التخزين المؤقت أولاً
-            cache_key = f"{self.image_path}_90x90"
-            cached_pixmap = image_cache.get(cache_key)
-
-            if cached_pixmap:
-                self.setPixmap(cached_pixmap)
-                return
-
-            # تحميل مباشر مع تحسين (أسرع من النظام الكسول للأختام الصغيرة)
+            # الذاكرة المشتركة للأختام: الصورة الأصلية تُفك مرة واحدة وتستخدمها المعاينة والحفظ أيضاً
             if os.path.exists(self.image_path):
-                pixmap = QPixmap(self.image_path)
-                if not pixmap.isNull():
-                    # تغيير حجم مع تحسين الأداء
-                    scaled_pixmap = pixmap.scaled(
-                        90, 90,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.FastTransformation  # أسرع من SmoothTransformation
-                    )
-
+                # FastTransformation أسرع من SmoothTransformation للصور المصغرة
+                scaled_pixmap = stamp_cache.get_pixmap(self.image_path, (90, 90), smooth=False)
+                if not scaled_pixmap.isNull():
                     self.setPixmap(scaled_pixmap)
-                    # إضافة للتخزين المؤقت
-                    image_cache.put(cache_key, scaled_pixmap)
                     return
 
             # إذا فشل التحميل
@@ -312,6 +296,7 @@ class StampManager(QDialog):
             try:
                 # حذف الملف
                 os.remove(self.selected_stamp.image_path)
+                stamp_cache.invalidate(self.selected_stamp.image_path)
                 
                 # إزالة من الواجهة
                 self.selected_stamp.setParent(None)
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+سجل الخطوط - اكتشاف خطوط النظام والخطوط المرفقة مع ذاكرة دائمة
+Font Registry - Cross-platform font discovery with an on-disk index
+"""
+
+import os
+import sys
+import json
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from .logger import info, warning
+
+INDEX_VERSION = 1
+INDEX_FILENAME = "font_index.json"
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+
+# حرف الألف: وجوده في الخط يعني أنه يدعم العربية
+ARABIC_TEST_CODEPOINT = 0x0627
+LATIN_TEST_CODEPOINT = 0x0041
+
+# الخطوط المفضلة للنصوص العربية حسب الأولوية (أسماء الملفات)
+PREFERRED_ARABIC_FONTS = (
+    "arial.ttf", "tahoma.ttf", "segoeui.ttf",
+    "NotoNaskhArabic-Regular.ttf", "NotoSansArabic-Regular.ttf", "NotoSansArabicUI-Regular.ttf",
+    "Amiri-Regular.ttf", "DejaVuSans.ttf", "FreeSerif.ttf", "FreeSans.ttf",
+)
+
+
+def get_font_directories() -> List[str]:
+    """
+    مجلدات الخطوط الموجودة: المرفقة مع التطبيق ثم خطوط النظام.
+    Existing font directories: bundled fonts first, then the platform's system folders.
+    """
+    from .resource_path import get_resource_path
+
+    home = os.path.expanduser("~")
+    directories = [get_resource_path(os.path.join("assets", "fonts"))]
+
+    if sys.platform == "win32":
+        directories.append(os.path.join(os.environ.get("SystemRoot", "C:\\Windows"), "Fonts"))
+        local_appdata = os.environ.get("LOCALAPPDATA")
+        if local_appdata:
+            directories.append(os.path.join(local_appdata, "Microsoft", "Windows", "Fonts"))
+    elif sys.platform == "darwin":
+        directories += ["/System/Library/Fonts", "/Library/Fonts",
+                        os.path.join(home, "Library", "Fonts")]
+    else:
+        # نفس المسارات التي يفحصها fontconfig افتراضياً
+        data_dirs = os.environ.get("XDG_DATA_DIRS", "/usr/local/share:/usr/share").split(":")
+        directories += [os.path.join(d, "fonts") for d in data_dirs if d]
+        data_home = os.environ.get("XDG_DATA_HOME", os.path.join(home, ".local", "share"))
+        directories += [os.path.join(data_home, "fonts"), os.path.join(home, ".fonts")]
+
+    unique = []
+    for directory in directories:
+        directory = os.path.abspath(directory)
+        if os.path.isdir(directory) and directory not in unique:
+            unique.append(directory)
+    return unique
+
+
+def _directory_signature(directory: str) -> float:
+    """
+    أحدث وقت تعديل للمجلد ومجلداته الفرعية.
+    Latest mtime of the directory tree; changes whenever a font is added or removed.
+    """
+    latest = 0.0
+    for root, _, _ in os.walk(directory):
+        try:
+            latest = max(latest, os.stat(root).st_mtime)
+        except OSError:
+            continue
+    return latest
+
+
+def _scan_directory(directory: str) -> List[dict]:
+    """فحص ملفات الخطوط في مجلد وقراءة اسم العائلة والتغطية لكل خط"""
+    import fitz  # PyMuPDF
+
+    fonts = []
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if not filename.lower().endswith(FONT_EXTENSIONS):
+                continue
+            path = os.path.join(root, filename)
+            try:
+                font = fitz.Font(fontfile=path)
+                fonts.append({
+                    'path': path,
+                    'file': filename,
+                    'family': font.name,
+                    'bold': bool(font.is_bold),
+                    'italic': bool(font.is_italic),
+                    'arabic': bool(font.has_glyph(ARABIC_TEST_CODEPOINT)),
+                    'latin': bool(font.has_glyph(LATIN_TEST_CODEPOINT)),
+                })
+            except Exception:
+                # ملفات تالفة أو صيغ لا يدعمها MuPDF
+                continue
+    return fonts
+
+
+class FontRegistry:
+    """
+    فهرس الخطوط المتاحة مع حفظه على القرص.
+
+    The index maps every font file to its family and glyph coverage. Each font
+    directory is rescanned only when its modification time changes.
+    """
+
+    def __init__(self, index_path: Optional[str] = None):
+        self._index_path = index_path
+        self._lock = threading.Lock()
+        self._directories: Dict[str, dict] = {}
+        self._loaded = False
+
+    @property
+    def index_path(self) -> str:
+        if self._index_path is None:
+            from .settings import get_settings_directory
+            self._index_path = os.path.join(get_settings_directory(), INDEX_FILENAME)
+        return self._index_path
+
+    def _load_index(self) -> None:
+        """تحميل الفهرس المحفوظ (يُتجاهل إذا كان تالفاً أو من إصدار مختلف)"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self._directories = data.get('directories', {})
+        except (OSError, ValueError):
+            self._directories = {}
+
+    def _save_index(self) -> None:
+        """حفظ الفهرس بشكل ذري"""
+        temp_path = self.index_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'directories': self._directories},
+                          f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            warning(f"تعذر حفظ فهرس الخطوط: {e}")
+
+    def refresh(self, force: bool = False) -> None:
+        """
+        تحديث الفهرس: إعادة فحص المجلدات التي تغيرت فقط.
+        Rescan directories whose mtime changed (all of them when force is True).
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load_index()
+
+            directories = get_font_directories()
+            changed = False
+            for directory in directories:
+                signature = _directory_signature(directory)
+                cached = self._directories.get(directory)
+                if force or cached is None or cached.get('mtime') != signature:
+                    fonts = _scan_directory(directory)
+                    self._directories[directory] = {'mtime': signature, 'fonts': fonts}
+                    info(f"فهرسة الخطوط: {len(fonts)} خط في {directory}")
+                    changed = True
+
+            for directory in list(self._directories):
+                if directory not in directories:
+                    del self._directories[directory]
+                    changed = True
+
+            if changed:
+                self._save_index()
+            self._loaded = True
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.refresh()
+
+    def fonts(self) -> List[dict]:
+        """كل الخطوط المفهرسة بترتيب أولوية المجلدات (المرفقة أولاً)"""
+        self._ensure_loaded()
+        result = []
+        for directory in get_font_directories():
+            result.extend(self._directories.get(directory, {}).get('fonts', []))
+        return result
+
+    def find(self, name: str) -> Optional[str]:
+        """
+        البحث عن خط باسم الملف (arial.ttf) أو باسم العائلة (Arial).
+        Find a font by file name or family name (case-insensitive).
+        """
+        name = name.lower()
+        fonts = self.fonts()
+        for font in fonts:
+            if font['file'].lower() == name:
+                return font['path']
+        for font in fonts:
+            if font['family'].lower() == name:
+                return font['path']
+        return None
+
+    def find_arabic_font(self, preferred: Sequence[str] = PREFERRED_ARABIC_FONTS) -> Optional[str]:
+        """
+        اختيار خط يدعم العربية: الخطوط المفضلة أولاً ثم أي خط عادي يدعمها.
+        Pick a font with Arabic coverage, trying the preferred files first.
+        """
+        fonts = [font for font in self.fonts() if font['arabic']]
+        by_file = {font['file'].lower(): font['path'] for font in reversed(fonts)}
+        for filename in preferred:
+            path = by_file.get(filename.lower())
+            if path:
+                return path
+
+        regular = [font for font in fonts if not font['bold'] and not font['italic'] and font['latin']]
+        candidates = regular or fonts
+        return candidates[0]['path'] if candidates else None
+
+
+# السجل العام المشترك
+font_registry = FontRegistry()
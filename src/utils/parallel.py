@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+أدوات المعالجة المتوازية للعمليات المجمعة
+Parallel Processing Helpers for Batch Operations
+"""
+
+import os
+import fnmatch
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# طريقة بدء عمليات العمال داخل التطبيق: fork من عملية Qt فيها خيوط نشطة قد يعلق العامل
+# (أقفال منسوخة في حالة مقفلة)، لذلك تبدأ العمليات بـ spawn وتستورد وحدات خالية من Qt
+WORKER_MP_CONTEXT = "spawn"
+
+
+def get_worker_count(max_workers: Optional[int] = None, task_count: Optional[int] = None) -> int:
+    """
+    تحديد عدد العمال المناسب.
+    Resolve the worker count from the argument, the performance settings and the CPU count.
+
+    Args:
+        max_workers (Optional[int]): Explicit limit; None reads performance_settings
+        task_count (Optional[int]): Number of tasks, used to avoid idle workers
+
+    Returns:
+        int: Number of workers (at least 1)
+    """
+    if max_workers is None:
+        try:
+            from .settings import load_settings
+            performance = load_settings().get("performance_settings", {})
+            if not performance.get("enable_multithreading", True):
+                max_workers = 1
+            else:
+                max_workers = int(performance.get("thread_count", 0)) or None
+        except Exception:
+            max_workers = None
+
+    if not max_workers:
+        max_workers = os.cpu_count() or 1
+
+    max_workers = max(1, int(max_workers))
+    if task_count is not None:
+        max_workers = max(1, min(max_workers, task_count))
+    return max_workers
+
+
+def collect_files(folder: str, patterns: Optional[Sequence[str]] = None,
+                  recursive: bool = False) -> List[str]:
+    """
+    جمع الملفات المطابقة لأنماط glob من مجلد.
+    Collect files matching glob patterns (case-insensitive) from a folder.
+
+    Args:
+        folder (str): Folder to scan
+        patterns (Optional[Sequence[str]]): Glob patterns such as ["*.pdf"]
+        recursive (bool): Descend into sub-folders
+
+    Returns:
+        List[str]: Sorted list of matching file paths
+    """
+    patterns = [p.lower() for p in (patterns or ["*.pdf"])]
+    matches = []
+
+    if recursive:
+        walker = os.walk(folder)
+    else:
+        walker = [(folder, [], os.listdir(folder))]
+
+    for root, _, files in walker:
+        for filename in files:
+            full_path = os.path.join(root, filename)
+            if not os.path.isfile(full_path):
+                continue
+            if any(fnmatch.fnmatch(filename.lower(), pattern) for pattern in patterns):
+                matches.append(full_path)
+
+    return sorted(matches)
+
+
+def unique_output_path(path: str, used: set) -> str:
+    """
+    مسار ناتج غير مكرر داخل نفس الدفعة: يضاف رقم إذا تكرر الاسم (name_2.pdf ...).
+    Return a path not in used (compared case-insensitively on Windows) and record it.
+    Protects batch jobs where inputs with the same name come from different folders.
+    """
+    base, ext = os.path.splitext(path)
+    candidate = path
+    counter = 2
+    while os.path.normcase(os.path.abspath(candidate)) in used:
+        candidate = f"{base}_{counter}{ext}"
+        counter += 1
+    used.add(os.path.normcase(os.path.abspath(candidate)))
+    return candidate
+
+
+def split_into_chunks(total: int, workers: int, chunks_per_worker: int = 4,
+                      max_chunk_size: Optional[int] = None) -> List[List[int]]:
+    """
+    تقسيم الفهارس 0..total-1 إلى مجموعات متتالية صغيرة.
+    Split indices 0..total-1 into small consecutive chunks so the load stays balanced
+    and progress is reported regularly.
+
+    Args:
+        total (int): Number of items (e.g. pages)
+        workers (int): Number of workers
+        chunks_per_worker (int): Target number of chunks per worker
+        max_chunk_size (Optional[int]): Upper bound on items per chunk, for tasks whose
+                                        results are large and must not pile up in memory
+
+    Returns:
+        List[List[int]]: Consecutive index chunks
+    """
+    chunk_size = max(1, total // max(1, workers * chunks_per_worker))
+    if max_chunk_size:
+        chunk_size = min(chunk_size, max_chunk_size)
+    return [list(range(start, min(start + chunk_size, total)))
+            for start in range(0, total, chunk_size)]
+
+
+def run_in_pool(func: Callable, tasks: Iterable[tuple], max_workers: Optional[int] = None,
+                use_processes: bool = True,
+                mp_context: Optional[str] = None) -> Iterator[Tuple[int, object, Optional[BaseException]]]:
+    """
+    تشغيل دالة على مجموعة مهام بشكل متوازٍ وإرجاع النتائج فور اكتمالها.
+    Run func(*task) for every task in a pool, yielding (index, result, exception) as each task finishes.
+
+    The function must be defined at module level when use_processes is True.
+    Closing the generator early cancels the tasks that have not started yet.
+
+    Args:
+        func (Callable): Worker function
+        tasks (Iterable[tuple]): Argument tuples, one per task
+        max_workers (Optional[int]): Concurrency limit (see get_worker_count)
+        use_processes (bool): Use a process pool instead of a thread pool
+        mp_context (Optional[str]): Start method for the process pool ("spawn", "fork", ...);
+                                    None uses the platform default
+
+    Yields:
+        Tuple[int, object, Optional[BaseException]]: Task index, result and raised exception (if any)
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    workers = get_worker_count(max_workers, len(tasks))
+
+    # لا داعي لإنشاء مجمع عمال لمهمة واحدة أو عامل واحد
+    if workers == 1:
+        for index, task in enumerate(tasks):
+            try:
+                yield index, func(*task), None
+            except Exception as e:
+                yield index, None, e
+        return
+
+    if use_processes:
+        context = multiprocessing.get_context(mp_context) if mp_context else None
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(func, *task): index for index, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                yield index, future.result(), None
+            except Exception as e:
+                yield index, None, e
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def run_ordered(func: Callable, tasks: Iterable[tuple], max_workers: Optional[int] = None,
+                use_processes: bool = True,
+                max_pending: Optional[int] = None,
+                mp_context: Optional[str] = None) -> Iterator[Tuple[int, object, Optional[BaseException]]]:
+    """
+    تشغيل المهام بشكل متوازٍ وإرجاع النتائج بترتيب المهام الأصلي.
+    Run func(*task) in a pool and yield (index, result, exception) in task order.
+
+    At most max_pending tasks are in flight (default: twice the worker count), so
+    results that finish early never pile up in memory while waiting for a slow task.
+    Useful when the consumer streams results into a single output such as an archive.
+
+    Args:
+        func (Callable): Worker function
+        tasks (Iterable[tuple]): Argument tuples, one per task
+        max_workers (Optional[int]): Concurrency limit (see get_worker_count)
+        use_processes (bool): Use a process pool instead of a thread pool
+        max_pending (Optional[int]): Maximum number of submitted but unconsumed tasks
+        mp_context (Optional[str]): Start method for the process pool (see run_in_pool)
+
+    Yields:
+        Tuple[int, object, Optional[BaseException]]: Task index, result and raised exception (if any)
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    workers = get_worker_count(max_workers, len(tasks))
+    if workers == 1:
+        yield from run_in_pool(func, tasks, 1, use_processes)
+        return
+
+    max_pending = max(workers, max_pending or workers * 2)
+    if use_processes:
+        context = multiprocessing.get_context(mp_context) if mp_context else None
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        next_task = 0
+        while next_task < len(tasks) or pending:
+            # إبقاء النافذة ممتلئة دون تجاوز الحد الأقصى
+            while next_task < len(tasks) and len(pending) < max_pending:
+                pending.append((next_task, executor.submit(func, *tasks[next_task])))
+                next_task += 1
+
+            index, future = pending.popleft()
+            try:
+                yield index, future.result(), None
+            except Exception as e:
+                yield index, None, e
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
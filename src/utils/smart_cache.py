@@ -4,13 +4,15 @@
 Smart Caching System for Images and Data
 """
 
-from PySide6.QtCore import QObject, Signal, QTimer, QThread, QIODevice, QBuffer
-from PySide6.QtGui import QPixmap
+from PySide6.QtCore import QObject, Signal, QTimer, QThread, QIODevice, QBuffer, Qt
+from PySide6.QtGui import QPixmap, QImage
 from typing import Dict, Optional, List, Any, Tuple
+from collections import OrderedDict
 import os
 import hashlib
 import pickle
 import json
+import threading
 from pathlib import Path
 import time
 import weakref
@@ -167,8 +169,123 @@ class SmartCache(QObject):
         if oldest_key in self.access_times:
             del self.access_times[oldest_key]
 
+class StampAssetCache:
+    """
+    ذاكرة مؤقتة مشتركة لصور الأختام (مدير الأختام، المعاينة، والتصدير).
+    المفتاح هو (المسار، وقت التعديل، الحجم المطلوب) بحيث يُفك ترميز كل ختم مرة واحدة،
+    ويُعاد حساب الصورة تلقائياً إذا تغير الملف. الحجم الكلي محدود ويُحذف الأقدم استخداماً أولاً.
+    آمنة للاستخدام من عدة خيوط (QImage وليس QPixmap).
+    """
+
+    def __init__(self, max_memory_mb: int = 64):
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self._entries = OrderedDict()  # key -> (value, size_in_bytes)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _file_key(image_path: str) -> Optional[Tuple[str, float]]:
+        try:
+            return os.path.abspath(image_path), os.path.getmtime(image_path)
+        except OSError:
+            return None
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key, value, size: int) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            # الإبقاء على العنصر الجديد حتى لو تجاوز الحد بمفرده
+            while self._total_bytes > self.max_memory_bytes and len(self._entries) > 1:
+                _, (_, old_size) = self._entries.popitem(last=False)
+                self._total_bytes -= old_size
+
+    def get_image(self, image_path: str, size: Optional[Tuple[int, int]] = None,
+                  smooth: bool = True) -> QImage:
+        """
+        الحصول على صورة الختم كـ QImage، مصغرة لتناسب size مع الحفاظ على النسبة.
+        تُرجع QImage فارغة (isNull) إذا تعذر تحميل الملف.
+        """
+        file_key = self._file_key(image_path)
+        if file_key is None:
+            return QImage()
+
+        size_key = (int(size[0]), int(size[1])) if size else None
+        key = (file_key, 'image', size_key, smooth)
+        image = self._lookup(key)
+        if image is not None:
+            return image
+
+        if size_key is None:
+            image = QImage(image_path)
+        else:
+            original = self.get_image(image_path)
+            if original.isNull():
+                return original
+            mode = Qt.TransformationMode.SmoothTransformation if smooth else Qt.TransformationMode.FastTransformation
+            image = original.scaled(max(1, size_key[0]), max(1, size_key[1]),
+                                    Qt.AspectRatioMode.KeepAspectRatio, mode)
+
+        if not image.isNull():
+            self._store(key, image, image.sizeInBytes())
+        return image
+
+    def get_pixmap(self, image_path: str, size: Optional[Tuple[int, int]] = None,
+                   smooth: bool = True) -> QPixmap:
+        """نسخة QPixmap من get_image للاستخدام في الخيط الرئيسي فقط."""
+        image = self.get_image(image_path, size, smooth)
+        return QPixmap.fromImage(image) if not image.isNull() else QPixmap()
+
+    def get_png_bytes(self, image_path: str, opacity: float = 1.0) -> bytes:
+        """
+        صورة الختم مرمزة كـ PNG مع دمج الشفافية في قناة ألفا (للإدراج في ملفات PDF).
+        """
+        # المرمز في وحدة خالية من Qt حتى تشاركه العمليات المتوازية
+        from src.core.stamp_render import encode_stamp_png, normalize_opacity
+
+        opacity = normalize_opacity(opacity)
+        file_key = self._file_key(image_path)
+        if file_key is None:
+            raise FileNotFoundError(f"صورة الختم غير موجودة: {image_path}")
+
+        key = (file_key, 'png', opacity)
+        data = self._lookup(key)
+        if data is not None:
+            return data
+
+        data = encode_stamp_png(image_path, opacity)
+        self._store(key, data, len(data))
+        return data
+
+    def invalidate(self, image_path: Optional[str] = None) -> None:
+        """حذف عناصر ملف معين (أو كل العناصر) من الذاكرة المؤقتة."""
+        with self._lock:
+            if image_path is None:
+                self._entries.clear()
+                self._total_bytes = 0
+                return
+            path = os.path.abspath(image_path)
+            for key in [k for k in self._entries if k[0][0] == path]:
+                self._total_bytes -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        """مسح الذاكرة المؤقتة بالكامل"""
+        self.invalidate()
+
 # إنشاء نسخة عامة من نظام التخزين المؤقت لملفات PDF
 pdf_cache = SmartCache()
 
 # إنشاء نسخة عامة من نظام التخزين المؤقت للصور
 image_cache = SmartCache()
+
+# إنشاء نسخة عامة من ذاكرة صور الأختام
+stamp_cache = StampAssetCache()
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+إعداد مسارات الاستيراد للاختبارات بنفس طريقة main.py
+Make both `src.` and the legacy `utils.` import styles resolvable, as main.py does.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
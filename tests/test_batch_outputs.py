@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""اختبارات مسارات الإخراج في العمليات المجمعة: ملفات بنفس الاسم من مجلدات مختلفة"""
+
+import os
+
+import fitz
+import pytest
+
+from src.core.integrity import check_pdfs
+from src.core.security import batch_security, batch_update_metadata
+
+
+@pytest.fixture
+def same_named_pdfs(tmp_path):
+    """ملفان باسم x.pdf في مجلدين مختلفين، لكل منهما نص مختلف"""
+    paths = []
+    for folder in ("a", "b"):
+        os.makedirs(tmp_path / folder)
+        path = str(tmp_path / folder / "x.pdf")
+        doc = fitz.open()
+        doc.new_page().insert_text((72, 72), f"from {folder}")
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def _page_text(path, password=None):
+    with fitz.open(path) as doc:
+        if password:
+            assert doc.authenticate(password)
+        return doc[0].get_text().strip()
+
+
+def test_batch_security_keeps_same_named_inputs_apart(tmp_path, same_named_pdfs):
+    output_folder = str(tmp_path / "out")
+
+    results = batch_security(same_named_pdfs, output_folder, password="secret", max_workers=2)
+
+    assert results['successful'] == 2
+    outputs = [entry['output_path'] for entry in results['files']]
+    assert outputs == [os.path.join(output_folder, "x.pdf"), os.path.join(output_folder, "x_2.pdf")]
+    assert [_page_text(path, "secret") for path in outputs] == ["from a", "from b"]
+
+
+def test_batch_update_metadata_keeps_same_named_inputs_apart(tmp_path, same_named_pdfs):
+    output_folder = str(tmp_path / "out")
+
+    results = batch_update_metadata(same_named_pdfs, {'title': "Report"}, output_folder, max_workers=2)
+
+    assert results['successful'] == 2
+    outputs = [entry['output_path'] for entry in results['files']]
+    assert outputs == [os.path.join(output_folder, "x.pdf"), os.path.join(output_folder, "x_2.pdf")]
+    assert [_page_text(path) for path in outputs] == ["from a", "from b"]
+
+
+def test_check_pdfs_keeps_same_named_repairs_apart(tmp_path, same_named_pdfs):
+    # إزاحة startxref خاطئة: يعيد MuPDF بناء جدول xref فيحتاج الملف إلى إصلاح
+    for path in same_named_pdfs:
+        with open(path, "rb") as f:
+            data = f.read()
+        with open(path, "wb") as f:
+            f.write(data[:data.rfind(b"startxref")] + b"startxref\n999999\n%%EOF\n")
+    output_folder = str(tmp_path / "out")
+
+    results = check_pdfs(same_named_pdfs, repair=True, output_folder=output_folder, max_workers=2)
+
+    assert results['repaired'] == 2
+    outputs = [entry['repair']['output_file'] for entry in results['files']]
+    assert outputs == [os.path.join(output_folder, "x.pdf"), os.path.join(output_folder, "x_2.pdf")]
+    assert [_page_text(path) for path in outputs] == ["from a", "from b"]
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""اختبارات المعالجة المسبقة في images_to_pdf: تقدير الميل ومقاس الصفحة"""
+
+import random
+
+import fitz
+import pytest
+from PIL import Image, ImageDraw
+
+from src.core.convert import _estimate_skew, images_to_pdf
+
+
+def _text_page(width=1000, height=1300, seed=1):
+    """صفحة بأسطر نص وهمية (مستطيلات سوداء بأطوال عشوائية)"""
+    rng = random.Random(seed)
+    img = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(img)
+    for y in range(80, height - 80, 40):
+        x = 80
+        while x < width - 120:
+            word = rng.randint(30, 110)
+            draw.rectangle((x, y, x + word, y + 14), fill=0)
+            x += word + 20
+    return img
+
+
+@pytest.mark.parametrize("angle", [-3.0, -1.5, 2.0, 4.5])
+def test_skewed_text_page_is_detected(angle):
+    skewed = _text_page().rotate(angle, expand=True, fillcolor=255, resample=Image.BICUBIC)
+    assert _estimate_skew(skewed) == -angle
+
+
+def test_straight_text_page_is_not_rotated():
+    assert _estimate_skew(_text_page()) == 0.0
+
+
+@pytest.mark.parametrize("color", [255, 30, 0])
+def test_flat_pages_are_not_rotated(color):
+    assert _estimate_skew(Image.new("L", (800, 600), color)) == 0.0
+
+
+def test_noise_and_photos_are_not_rotated():
+    rng = random.Random(0)
+    noise = Image.frombytes("L", (700, 900), bytes(rng.getrandbits(8) for _ in range(700 * 900)))
+    photo = Image.effect_mandelbrot((800, 600), (-2, -1.2, 1, 1.2), 100)
+    assert _estimate_skew(noise) == 0.0
+    assert _estimate_skew(photo) == 0.0
+
+
+@pytest.mark.parametrize("preprocess", [None, {"color": "bilevel"}, {"color": "grayscale", "jpeg_quality": 80}])
+def test_reencoding_keeps_the_page_size(tmp_path, preprocess):
+    # بدون DPI يفترض MuPDF دقة 96: 300×200 بكسل = 225×150 نقطة
+    image_file = str(tmp_path / "page.png")
+    Image.new("RGBA", (300, 200), (0, 0, 255, 100)).save(image_file)
+    output_file = str(tmp_path / "out.pdf")
+
+    assert images_to_pdf([image_file], output_file, preprocess=preprocess, max_workers=1)
+    with fitz.open(output_file) as doc:
+        assert (round(doc[0].rect.width), round(doc[0].rect.height)) == (225, 150)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""اختبارات خيارات الإخراج: الخطية و PDF/A"""
+
+import fitz
+
+from src.core import pdf_output
+from src.core.merge import merge_pdfs
+from src.core.pdf_output import convert_to_pdfa
+
+
+def _make_pdf(path, fontnames=("helv",)):
+    doc = fitz.open()
+    page = doc.new_page()
+    for offset, fontname in enumerate(fontnames):
+        page.insert_text((72, 72 + offset * 24), f"Sample {fontname}", fontname=fontname)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_standard_fonts_are_embedded_for_pdfa(tmp_path):
+    source = _make_pdf(tmp_path / "standard.pdf", ("helv", "tibo", "cour"))
+    output = str(tmp_path / "standard_pdfa.pdf")
+
+    report = convert_to_pdfa(source, output)
+
+    assert report['success'] and report['compliant']
+    assert report['non_embedded_fonts'] == []
+    with fitz.open(output) as doc, fitz.open(source) as original:
+        assert all(font[1] != "n/a" for font in doc.get_page_fonts(0))
+        # الخط المضمن يرسم الصفحة كما كانت
+        assert doc[0].get_pixmap().samples == original[0].get_pixmap().samples
+
+
+def test_windows_font_aliases_map_to_standard_fonts():
+    assert pdf_output._standard_font_name("ABCDEF+Arial,BoldItalic") == "helvetica-boldoblique"
+    assert pdf_output._standard_font_name("TimesNewRomanPSMT") == "times-roman"
+    assert pdf_output._standard_font_name("CourierNew,Bold") == "courier-bold"
+    assert pdf_output._standard_font_name("Calibri") is None
+
+
+def test_merge_reports_failure_when_linearization_is_unavailable(tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_output, "_linearize_with_pikepdf", lambda source, target: False)
+    monkeypatch.setattr(pdf_output, "_linearize_with_qpdf", lambda source, target: False)
+    first = _make_pdf(tmp_path / "a.pdf")
+    second = _make_pdf(tmp_path / "b.pdf")
+    output = tmp_path / "merged.pdf"
+
+    assert not merge_pdfs([first, second], str(output), linearize=True)
+    # الملف المدمج يبقى مكتوباً بدون خطية
+    assert output.exists() and not pdf_output.is_linearized(str(output))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""اختبارات فهرس البحث النصي الكامل"""
+
+import os
+
+import fitz
+import pytest
+
+from src.core.convert import text_to_pdf
+from src.core.search_index import SearchIndex
+
+
+def _make_pdf(path, page_texts):
+    doc = fitz.open()
+    for text in page_texts:
+        page = doc.new_page()
+        if text:
+            page.insert_text((72, 72), text)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def index(tmp_path):
+    with SearchIndex(str(tmp_path / "index.db")) as search_index:
+        yield search_index
+
+
+def test_arabic_text_from_text_to_pdf_is_searchable(tmp_path, index):
+    # text_to_pdf يكتب أشكال العرض العربية (U+FExx) التي يستخرجها MuPDF كما هي
+    text_file = tmp_path / "arabic.txt"
+    text_file.write_text("مرحبا بالعالم\nسطر ثان\n", encoding="utf-8")
+    pdf_file = str(tmp_path / "arabic.pdf")
+    assert text_to_pdf(str(text_file), pdf_file)
+
+    assert index.index_files([pdf_file], max_workers=1)['indexed'] == 1
+    hits = index.search("مرحبا")
+    assert [(hit['path'], hit['page']) for hit in hits] == [(os.path.abspath(pdf_file), 1)]
+    # البحث بأشكال العرض نفسها يعطي النتيجة ذاتها
+    assert len(index.search("ﻣﺮﺣﺒﺎ")) == 1
+
+
+def test_presentation_forms_are_normalized_when_stored(index):
+    index._store_document("/virtual/doc.pdf", 0.0, 0, ["ﻣﺮﺣﺒﺎ ﺑﺎﻟﻌﺎﻟﻢ", ""])
+    assert [hit['page'] for hit in index.search("بالعالم")] == [1]
+
+
+def test_reindexing_replaces_only_that_documents_pages(tmp_path, index):
+    first = _make_pdf(tmp_path / "first.pdf", ["apple one", "", "apple two"])
+    second = _make_pdf(tmp_path / "second.pdf", ["banana"])
+    index.index_files([first, second], max_workers=1)
+    assert len(index.search("apple")) == 2
+
+    os.remove(first)
+    _make_pdf(tmp_path / "first.pdf", ["cherry"])
+    os.utime(first, (0, 0))
+    assert index.index_files([first, second], max_workers=1)['indexed'] == 1
+
+    assert index.search("apple") == []
+    assert [hit['page'] for hit in index.search("cherry")] == [1]
+    assert [hit['path'] for hit in index.search("banana")] == [os.path.abspath(second)]
+    assert index.get_stats()['pages'] == 2
+
+
+def test_document_without_text_is_removed_cleanly(tmp_path, index):
+    empty = _make_pdf(tmp_path / "empty.pdf", ["", ""])
+    other = _make_pdf(tmp_path / "other.pdf", ["kept"])
+    index.index_files([empty, other], max_workers=1)
+
+    index.remove(empty)
+    assert index.get_stats()['documents'] == 1
+    assert len(index.search("kept")) == 1